@@ -0,0 +1,35 @@
+"""Add table for usage counts
+
+Revision ID: 5f0c3e1d9a27
+Revises: edf289098923
+Create Date: 2026-10-18 14:02:51.417306
+
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0c3e1d9a27"
+down_revision: str | Sequence[str] | None = "edf289098923"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "usage_count",
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False),
+        sa.Column("last_used", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("kind", "name", name=op.f("pk_usage_count")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("usage_count")
@@ -1,9 +1,11 @@
 import asyncio
 import code
+import json
 import logging
 import platform
 import sys
 import textwrap
+import tracemalloc
 from pathlib import Path
 from typing import Annotated, Any, Coroutine
 
@@ -18,6 +20,7 @@ from HexBug.core.env import HexBugEnv
 from HexBug.data.hex_math import HexDir, HexPattern, PatternSignature
 from HexBug.data.parsers import load_parsers
 from HexBug.data.registry import HexBugRegistry
+from HexBug.data.utils.build import BuildStageTimer
 from HexBug.resources import load_resource
 from HexBug.utils.logging import setup_logging
 
@@ -85,6 +88,9 @@ def build(
     output_path: Annotated[Path, Option("-o", "--output-path")] = Path("registry.json"),
     index_path: Annotated[Path, Option("--index-path")] = Path("book_index"),
     build_index: Annotated[bool, Option("--index/--no-index")] = True,
+    cache_dir: Annotated[Path | None, Option("--cache-dir")] = None,
+    workers: Annotated[int | None, Option("--workers")] = None,
+    profile: Annotated[bool, Option("--profile")] = False,
     indent: int | None = None,
     verbose: Annotated[bool, Option("-v", "--verbose")] = False,
 ):
@@ -102,14 +108,34 @@ def build(
     else:
         book_index = None
 
-    registry = HexBugRegistry.build(
-        pregenerated_numbers=pregenerated_numbers,
-        book_index=book_index,
-    )
+    timer = BuildStageTimer()
+    if profile:
+        # tracing makes the build noticeably slower, so only do it when asked
+        tracemalloc.start()
+
+    try:
+        registry = HexBugRegistry.build(
+            pregenerated_numbers=pregenerated_numbers,
+            book_index=book_index,
+            cache_dir=cache_dir,
+            max_workers=workers,
+            timer=timer,
+        )
+    finally:
+        if profile:
+            tracemalloc.stop()
 
     logger.info(f"Saving registry to file: {output_path}")
     registry.save(output_path, indent=indent)
 
+    if profile:
+        profile_path = output_path.with_suffix(".profile.json")
+        logger.info(f"Saving build profile to file: {profile_path}")
+        report = timer.to_report() | {
+            "mods": {mod.id: mod.version for mod in registry.mods.values()},
+        }
+        profile_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
 
 @app.command()
 def health_check(
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import math
+import secrets
 import sys
+import tracemalloc
 from asyncio import Task
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
@@ -13,11 +16,13 @@ from fastapi import (
     Depends,
     FastAPI,
     HTTPException,
+    Query,
     Response,
     WebSocket,
     WebSocketDisconnect,
     WebSocketException,
 )
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.routing import APIRouter
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from httpx import AsyncClient
@@ -25,6 +30,8 @@ from jwt import InvalidTokenError
 from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from starlette.status import (
     HTTP_401_UNAUTHORIZED,
+    HTTP_404_NOT_FOUND,
+    HTTP_409_CONFLICT,
     HTTP_500_INTERNAL_SERVER_ERROR,
     WS_1008_POLICY_VIOLATION,
 )
@@ -32,19 +39,44 @@ from uvicorn import Config, Server
 
 from HexBug.__version__ import VERSION
 from HexBug.cogs.app_commands.patterns import PatternsCog
+from HexBug.cogs.watchdog import WatchdogCog
 from HexBug.core.bot import HexBugBot
 from HexBug.core.cog import HexBugCog
 from HexBug.core.env import BotEnvironment
 from HexBug.data.hex_math import HexPattern
 from HexBug.data.registry import PatternMatchResult
 from HexBug.utils.jwt import JWTModel
+from HexBug.utils.profiling import MemorySnapshot, sample_stacks, take_memory_snapshot
 
 logger = logging.getLogger(__name__)
 
 
+STUCK_COMMAND_THRESHOLD = 10  # seconds
+
+MAX_DEBUG_SECONDS = 60
+
+MAX_STUCK_COMMAND_SAMPLES = 3
+"""Maximum number of stuck commands to log stacks for in each health check."""
+
+
+class StuckCommandInfo(BaseModel):
+    name: str
+    runtime: float
+
+
 class HealthInfo(BaseModel):
     websocket_latency: float
     longest_active_command_runtime: float | None
+    active_commands: dict[str, int]
+    stuck_commands: list[StuckCommandInfo]
+    event_loop_lag: float | None
+    """The highest event loop lag in seconds measured in the last minute."""
+    last_event_loop_block: EventLoopBlockInfo | None
+
+
+class EventLoopBlockInfo(BaseModel):
+    timestamp: datetime
+    duration: float | None
 
 
 class VersionInfo(BaseModel):
@@ -178,19 +210,39 @@ async def get_health(
         logger.error(f"WebSocket latency too high: {bot.latency:.2f} s")
         response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
 
-    longest_active_command_runtime = bot.get_longest_active_command_runtime()
-    if (
-        longest_active_command_runtime is not None
-        and longest_active_command_runtime > 10
-    ):
-        logger.error(
-            f"A command has been running for too long: {longest_active_command_runtime:.2f} s"
+    stuck_commands = list[StuckCommandInfo]()
+    for i, command in enumerate(bot.iter_stuck_commands(STUCK_COMMAND_THRESHOLD)):
+        stuck_commands.append(
+            StuckCommandInfo(name=command.name, runtime=command.runtime)
         )
+        if i < MAX_STUCK_COMMAND_SAMPLES:
+            logger.error(
+                f"Command /{command.name} has been running for too long: {command.runtime:.2f} s\n"
+                + (command.format_stack() or "(no stack available)")
+            )
+    if stuck_commands:
         response.status_code = HTTP_500_INTERNAL_SERVER_ERROR
 
+    event_loop_lag = None
+    last_event_loop_block = None
+    watchdog_cog = cast(WatchdogCog | None, bot.get_cog("Watchdog"))
+    if watchdog_cog and (watchdog := watchdog_cog.watchdog):
+        event_loop_lag = watchdog.max_recent_lag
+        if block := watchdog.last_block:
+            last_event_loop_block = EventLoopBlockInfo(
+                timestamp=block.timestamp,
+                duration=block.duration,
+            )
+
     return HealthInfo(
         websocket_latency=to_finite(bot.latency),
-        longest_active_command_runtime=to_finite(longest_active_command_runtime),
+        longest_active_command_runtime=to_finite(
+            bot.get_longest_active_command_runtime()
+        ),
+        active_commands=bot.get_active_command_counts(),
+        stuck_commands=stuck_commands,
+        event_loop_lag=event_loop_lag,
+        last_event_loop_block=last_event_loop_block,
     )
 
 
@@ -285,13 +337,101 @@ async def handle_activity_c2s_message(
         case PatternsC2SMessage(patterns=patterns):
             await post_activity_patterns(patterns, bot, api_token)
         case PatternInfoC2SMessage(pattern=pattern):
+            patterns_cog = cast(PatternsCog, bot.get_cog("Patterns"))
+            draw_message = patterns_cog.draw_messages.get(int(api_token.user_id))
+            matcher = await bot.per_world_patterns.get_matcher(
+                draw_message.interaction.guild_id if draw_message else None
+            )
             return PatternInfoS2CMessage(
                 pattern=pattern,
-                info=bot.registry.try_match_pattern(pattern),
+                info=matcher.try_match_pattern(pattern),
             )
 
 
+def verify_debug_token(
+    token: Annotated[HTTPAuthorizationCredentials, Depends(HTTPBearer())],
+    bot: BotDependency,
+):
+    expected = bot.env.debug_api_token
+    if expected is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+    if not secrets.compare_digest(
+        token.credentials.encode(),
+        expected.get_secret_value().encode(),
+    ):
+        raise HTTPException(
+            status_code=HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+debug_router = APIRouter(
+    prefix="/debug",
+    include_in_schema=False,
+    dependencies=[Depends(verify_debug_token)],
+)
+
+# profiling and tracemalloc are process-wide, so only allow one request at a time
+debug_lock = asyncio.Lock()
+
+
+@debug_router.get("/profile")
+async def get_debug_profile(
+    seconds: Annotated[float, Query(gt=0, le=MAX_DEBUG_SECONDS)] = 10,
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+) -> Response:
+    if debug_lock.locked():
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail="Another debug request is already running",
+        )
+    async with debug_lock:
+        logger.info(f"Profiling for {seconds} s")
+        profile = await asyncio.to_thread(sample_stacks, seconds)
+
+    match format:
+        case "collapsed":
+            return PlainTextResponse(profile.to_collapsed())
+        case "speedscope":
+            return JSONResponse(
+                profile.to_speedscope(),
+                headers={
+                    "Content-Disposition": 'attachment; filename="hexbug.speedscope.json"'
+                },
+            )
+
+
+@debug_router.get("/memory")
+async def get_debug_memory(
+    seconds: Annotated[float, Query(ge=0, le=MAX_DEBUG_SECONDS)] = 10,
+    limit: Annotated[int, Query(ge=1, le=100)] = 25,
+) -> MemorySnapshot:
+    """Returns the top memory allocations by line.
+
+    If tracemalloc isn't already running (eg. from `PYTHONTRACEMALLOC`), it's started
+    for `seconds`, so only allocations made during that time are included.
+    """
+    if debug_lock.locked():
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail="Another debug request is already running",
+        )
+    async with debug_lock:
+        if tracemalloc.is_tracing():
+            return await asyncio.to_thread(take_memory_snapshot, limit)
+
+        logger.info(f"Tracing memory allocations for {seconds} s")
+        tracemalloc.start()
+        try:
+            await asyncio.sleep(seconds)
+            return await asyncio.to_thread(take_memory_snapshot, limit)
+        finally:
+            tracemalloc.stop()
+
+
 app.include_router(activity_router)
+app.include_router(debug_router)
 
 
 @dataclass(eq=False)
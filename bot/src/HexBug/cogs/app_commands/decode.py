@@ -1,3 +1,5 @@
+import asyncio
+from dataclasses import dataclass, field
 from io import BytesIO
 from typing import Any
 
@@ -13,16 +15,22 @@ from discord.ui import (
     TextDisplay,
 )
 from discord.utils import MISSING
-from lark import LarkError
 
 from HexBug.core.cog import HexBugCog
 from HexBug.core.exceptions import InvalidInputError
-from HexBug.data.parsers.reveal import parse_reveal
+from HexBug.data.registry import HexBugRegistry
+from HexBug.utils.decode import (
+    DecodeParseError,
+    DecodePool,
+    DecodeResult,
+    DecodeTimeoutError,
+)
 from HexBug.utils.discord.visibility import (
     Visibility,
     VisibilityOption,
     add_visibility_buttons,
 )
+from HexBug.utils.matching import GuildPatternMatcher
 
 MAX_FILE_SIZE = 32 * 1024
 
@@ -30,10 +38,40 @@ MAX_CONTENT_LENGTH = 4000
 
 ATTACHMENT_NAME = "decoded.hexpattern"
 
+DECODE_WORKERS = 2
+
+MIN_WORKER_INPUT_LENGTH = 4 * 1024
+"""Inputs shorter than this are decoded on the event loop instead of in a worker."""
+
+DECODE_TIMEOUT = 10
+"""Maximum time in seconds to spend decoding one input in a worker."""
+
 TabWidthOption = Range[int, 1, 16]
 
 
+@dataclass
+class DecodeInput:
+    text: str
+    filename: str | None = None
+
+
+@dataclass(eq=False)
 class DecodeCog(HexBugCog, GroupCog, group_name="decode"):
+    pool: DecodePool = field(init=False)
+
+    async def cog_load(self):
+        await super().cog_load()
+        self.pool = DecodePool(
+            self.bot.iota_printer,
+            max_workers=DECODE_WORKERS,
+            min_worker_length=MIN_WORKER_INPUT_LENGTH,
+            timeout=DECODE_TIMEOUT,
+        )
+        await self.pool.start()
+
+    async def cog_unload(self):
+        self.pool.shutdown()
+
     @app_commands.command()
     async def text(
         self,
@@ -43,23 +81,45 @@ class DecodeCog(HexBugCog, GroupCog, group_name="decode"):
         tab_width: TabWidthOption = 4,
         visibility: VisibilityOption = Visibility.PRIVATE,
     ):
-        await self._decode(interaction, text, flatten_list, tab_width, visibility)
+        await interaction.response.defer(ephemeral=visibility.ephemeral, thinking=True)
+        await self._decode(
+            interaction,
+            [DecodeInput(text)],
+            flatten_list,
+            tab_width,
+            visibility,
+        )
 
     @app_commands.command()
     async def file(
         self,
         interaction: Interaction,
         file: Attachment,
+        file_2: Attachment | None = None,
+        file_3: Attachment | None = None,
+        file_4: Attachment | None = None,
         flatten_list: bool = True,
         tab_width: TabWidthOption = 4,
         visibility: VisibilityOption = Visibility.PRIVATE,
     ):
-        if file.size > MAX_FILE_SIZE:
-            raise InvalidInputError(
-                f"File is too large (max: {humanize.naturalsize(MAX_FILE_SIZE, binary=True)}).",
-                value=f"{file.filename} ({humanize.naturalsize(file.size, binary=True)})",
-            )
+        files = [f for f in [file, file_2, file_3, file_4] if f is not None]
+
+        for f in files:
+            if f.size > MAX_FILE_SIZE:
+                raise InvalidInputError(
+                    f"File is too large (max: {humanize.naturalsize(MAX_FILE_SIZE, binary=True)}).",
+                    value=f"{f.filename} ({humanize.naturalsize(f.size, binary=True)})",
+                )
+
+        # reading and decoding large files can take longer than discord allows for the
+        # initial response
+        await interaction.response.defer(ephemeral=visibility.ephemeral, thinking=True)
+
+        inputs = await asyncio.gather(*(self._read_file(f) for f in files))
 
+        await self._decode(interaction, inputs, flatten_list, tab_width, visibility)
+
+    async def _read_file(self, file: Attachment) -> DecodeInput:
         try:
             text = (await file.read()).decode()
         except UnicodeDecodeError as e:
@@ -67,63 +127,69 @@ class DecodeCog(HexBugCog, GroupCog, group_name="decode"):
                 "Unable to decode file as UTF-8.",
                 value=file.filename,
             ) from e
-
-        await self._decode(interaction, text, flatten_list, tab_width, visibility)
+        return DecodeInput(text, file.filename)
 
     async def _decode(
         self,
         interaction: Interaction,
-        text: str,
+        inputs: list[DecodeInput],
         flatten_list: bool,
         tab_width: int,
         visibility: Visibility,
     ):
-        try:
-            iota = parse_reveal(text)
-        except LarkError as e:
-            raise InvalidInputError("Failed to parse input.", fields=[]).add_field(
-                name="Reason",
-                value=f"```\n{e}\n```",
-                inline=False,
+        matcher = await self.bot.per_world_patterns.get_matcher(interaction.guild_id)
+        results = await asyncio.gather(
+            *(
+                self._decode_one(value, matcher, flatten_list, tab_width, len(inputs))
+                for value in inputs
             )
-
-        output = self.bot.iota_printer.pretty_print(
-            iota,
-            indent=" " * tab_width,
-            flatten_list=flatten_list,
         )
 
         view = LayoutView()
+        attachments = list[tuple[str, bytes]]()
+
+        for i, (value, result) in enumerate(zip(inputs, results, strict=True)):
+            if len(inputs) == 1:
+                content_template = "```\n{}\n```"
+                attachment_name = ATTACHMENT_NAME
+            else:
+                title = (value.filename or f"Input {i + 1}").replace("`", "")
+                content_template = f"`{title}`\n```\n{{}}\n```"
+                attachment_name = f"decoded_{i + 1}.hexpattern"
+
+            max_content_length = MAX_CONTENT_LENGTH // len(inputs)
 
-        content_template = "```\n{}\n```"
-        content = content_template.format(output)
+            if result.length + len(content_template.format("")) <= max_content_length:
+                view.add_item(TextDisplay(content_template.format(result.preview)))
+                continue
 
-        if len(content) <= MAX_CONTENT_LENGTH:
-            file_contents = None
-            view.add_item(TextDisplay(content))
-        else:
             too_long_error = "Output truncated due to length limits."
             ellipses = "\n..."
             max_output_length = (
-                MAX_CONTENT_LENGTH
+                max_content_length
                 - len(content_template)
                 - len(too_long_error)
                 - len(ellipses)
             )
 
-            truncated_output = output[:max_output_length].rsplit("\n", 1)[0] + ellipses
-            file_contents = output.encode()
+            truncated_output = (
+                result.preview[:max_output_length].rsplit("\n", 1)[0] + ellipses
+            )
+            attachments.append((attachment_name, result.contents))
 
             view.add_item(TextDisplay(content_template.format(truncated_output)))
 
             view.add_item(
                 Container[Any](
                     TextDisplay(too_long_error),
-                    FileComponent(f"attachment://{ATTACHMENT_NAME}"),
+                    FileComponent(f"attachment://{attachment_name}"),
                     accent_colour=Color.red(),
                 )
             )
 
+        def get_files():
+            return [File(BytesIO(contents), name) for name, contents in attachments]
+
         # TODO: make this a function
 
         row = ActionRow[Any]()
@@ -140,9 +206,7 @@ class DecodeCog(HexBugCog, GroupCog, group_name="decode"):
             )
             await i.response.send_message(
                 view=view,
-                file=File(BytesIO(file_contents), ATTACHMENT_NAME)
-                if file_contents
-                else MISSING,
+                files=get_files() or MISSING,
             )
 
         add_visibility_buttons(
@@ -154,10 +218,39 @@ class DecodeCog(HexBugCog, GroupCog, group_name="decode"):
             send_as_public=send_as_public,
         )
 
-        await interaction.response.send_message(
+        await interaction.followup.send(
             view=view,
             ephemeral=visibility.ephemeral,
-            file=File(BytesIO(file_contents), ATTACHMENT_NAME)
-            if file_contents
-            else MISSING,
+            files=get_files() or MISSING,
         )
+
+    async def _decode_one(
+        self,
+        value: DecodeInput,
+        matcher: HexBugRegistry | GuildPatternMatcher,
+        flatten_list: bool,
+        tab_width: int,
+        num_inputs: int,
+    ) -> DecodeResult:
+        try:
+            return await self.pool.decode(
+                value.text,
+                indent=" " * tab_width,
+                flatten_list=flatten_list,
+                preview_length=MAX_CONTENT_LENGTH // num_inputs,
+                matcher=matcher if isinstance(matcher, GuildPatternMatcher) else None,
+            )
+        except DecodeTimeoutError as e:
+            error = InvalidInputError("Input took too long to decode.", fields=[])
+            if value.filename is not None:
+                error.add_field(name="File", value=value.filename)
+            raise error from e
+        except DecodeParseError as e:
+            error = InvalidInputError("Failed to parse input.", fields=[])
+            if value.filename is not None:
+                error.add_field(name="File", value=value.filename)
+            raise error.add_field(
+                name="Reason",
+                value=f"```\n{e}\n```",
+                inline=False,
+            )
@@ -4,10 +4,8 @@ from enum import Enum
 
 from discord import Embed, Interaction, app_commands
 from discord.app_commands import Transform
-from sqlalchemy.dialects.postgresql import insert
 
 from HexBug.core.cog import HexBugCog
-from HexBug.db.models import InfoMessage as InfoMessageRow
 from HexBug.utils.discord.embeds import FOOTER_SEPARATOR
 from HexBug.utils.discord.translation import (
     LocaleEnumTransformer,
@@ -102,47 +100,23 @@ class InfoCog(HexBugCog):
         )
 
         if value.tracked:
-            async with self.bot.db_session() as session:
-                async with session.begin():
-                    now = datetime.now()
-
-                    if row := await session.get(InfoMessageRow, message.name):
-                        days = (now - row.last_used).days
-                    else:
-                        days = None
-
-                    stmt = (
-                        insert(InfoMessageRow)
-                        .values(
-                            name=message.name,
-                            usage_count=1,
-                            last_used=now,
-                        )
-                        .on_conflict_do_update(
-                            index_elements=[InfoMessageRow.name],
-                            set_=dict(
-                                usage_count=InfoMessageRow.usage_count + 1,
-                                last_used=now,
-                            ),
-                        )
-                        .returning(InfoMessageRow)
-                    )
-                    row = (await session.scalars(stmt)).one()
-
-                embed.set_footer(
-                    text=join_truthy(
-                        FOOTER_SEPARATOR,
-                        await translate_command_text(
-                            interaction,
-                            "footer-usage-count",
-                            count=await row.awaitable_attrs.usage_count,
-                        ),
-                        await translate_command_text(
-                            interaction, "footer-days-since", days=days
-                        )
-                        if days is not None
-                        else None,
+            usage = await self.bot.usage.record_info_message(message.name)
+            days = (datetime.now() - usage.last_used).days if usage.last_used else None
+
+            embed.set_footer(
+                text=join_truthy(
+                    FOOTER_SEPARATOR,
+                    await translate_command_text(
+                        interaction,
+                        "footer-usage-count",
+                        count=usage.count,
+                    ),
+                    await translate_command_text(
+                        interaction, "footer-days-since", days=days
                     )
+                    if days is not None
+                    else None,
                 )
+            )
 
         await respond_with_visibility(interaction, visibility, embed=embed)
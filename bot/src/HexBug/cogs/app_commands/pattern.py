@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-import time
+import asyncio
 from collections import defaultdict
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any
 
@@ -14,14 +15,18 @@ from hexdoc.core import ResourceLocation
 from HexBug.core.cog import HexBugCog
 from HexBug.core.exceptions import InvalidInputError
 from HexBug.data.hex_math import HexDir, HexPattern
+from HexBug.data.patterns import PatternInfo
 from HexBug.data.registry import PatternMatchResult
+from HexBug.data.similarity import ShapeMatch
 from HexBug.data.special_handlers import SpecialHandlerMatch
 from HexBug.data.static_data import SPECIAL_HANDLERS
+from HexBug.db.usage import UsageKind
 from HexBug.ui.views.patterns import (
     EmbedPatternView,
     NamedPatternView,
     PatternBuilderView,
 )
+from HexBug.utils.conflicts import RegexConflictScanner, RegexScanResult
 from HexBug.utils.discord.transformers import (
     HexDirOption,
     PatternInfoOption,
@@ -34,6 +39,13 @@ from HexBug.utils.discord.translation import (
 )
 from HexBug.utils.discord.visibility import Visibility, VisibilityOption
 from HexBug.utils.strings import truncate_str
+from HexBug.utils.tracing import span
+
+REGEX_SCAN_TIMEOUT = 2  # seconds
+
+SIMILAR_SHAPE_THRESHOLD = 0.6
+
+MAX_SIMILAR_SHAPES = 10
 
 
 class PatternCheckType(Enum):
@@ -48,7 +60,18 @@ PatternCheckTypeOption = Transform[
 ]
 
 
+@dataclass(eq=False)
 class PatternCog(HexBugCog, GroupCog, group_name="pattern"):
+    conflict_scanner: RegexConflictScanner = field(init=False)
+
+    async def cog_load(self):
+        await super().cog_load()
+        self.conflict_scanner = RegexConflictScanner(
+            self.bot.registry.patterns.values()
+        )
+        # build the similarity index now, since it takes a while
+        await asyncio.to_thread(lambda: self.bot.registry.lookups.shape_similarity)
+
     @app_commands.command()
     async def name(
         self,
@@ -56,6 +79,7 @@ class PatternCog(HexBugCog, GroupCog, group_name="pattern"):
         info: PatternInfoOption,
         visibility: VisibilityOption = Visibility.PRIVATE,
     ):
+        self.bot.usage.record(UsageKind.PATTERN, str(info.id))
         display_info = self.bot.registry.display_pattern(info)
         await NamedPatternView(
             interaction=interaction,
@@ -85,6 +109,7 @@ class PatternCog(HexBugCog, GroupCog, group_name="pattern"):
                 f"Generating {info.base_name} is not yet supported.", fields=[]
             ) from e
 
+        self.bot.usage.record(UsageKind.PATTERN, str(info.id))
         await NamedPatternView(
             interaction=interaction,
             pattern=pattern,
@@ -107,7 +132,11 @@ class PatternCog(HexBugCog, GroupCog, group_name="pattern"):
     ):
         pattern = HexPattern(direction, signature)
 
-        info = self.bot.registry.try_match_pattern(pattern)
+        matcher = await self.bot.per_world_patterns.get_matcher(interaction.guild_id)
+        with span("match"):
+            info = matcher.try_match_pattern(pattern)
+        if info:
+            self.bot.usage.record(UsageKind.PATTERN, str(info.id))
 
         await NamedPatternView(
             interaction=interaction,
@@ -136,7 +165,8 @@ class PatternCog(HexBugCog, GroupCog, group_name="pattern"):
             if conflict := registry.try_match_pattern(pattern):
                 conflicts[conflict.id] = ("signature", conflict)
 
-        timeout_time = None
+        similar_shapes = list[ShapeMatch[PatternInfo]]()
+        incomplete_scan: RegexScanResult | None = None
 
         match pattern_type:
             case PatternCheckType.NORMAL:
@@ -148,30 +178,40 @@ class PatternCog(HexBugCog, GroupCog, group_name="pattern"):
                 for conflict in registry.lookups.segments.get(segments, []):
                     conflicts[conflict.id] = ("shape", conflict)
 
+                with span("similarity"):
+                    similar_shapes = [
+                        match
+                        for match in registry.lookups.shape_similarity.query(
+                            pattern.iter_segments(),
+                            threshold=SIMILAR_SHAPE_THRESHOLD,
+                        )
+                        if match.value.id not in conflicts
+                    ][:MAX_SIMILAR_SHAPES]
+
             case PatternCheckType.REGEX:
-                start_time = time.time()
                 try:
-                    pat = regex.compile(signature)
-                except Exception as e:
+                    with span("regex_scan"):
+                        # no ReDoS for you
+                        result = await asyncio.to_thread(
+                            self.conflict_scanner.scan,
+                            signature,
+                            timeout=REGEX_SCAN_TIMEOUT,
+                        )
+                except regex.error as e:
                     raise InvalidInputError(
                         "Failed to parse regular expression.", value=f"`{signature}`"
                     ) from e
 
-                for info in registry.patterns.values():
-                    try:
-                        # no ReDoS for you
-                        if pat.fullmatch(info.signature, timeout=0.5):
-                            conflicts[info.id] = ("regex", info)
-                    except TimeoutError:
-                        pass
-                    if (elapsed := time.time() - start_time) >= 0.5:
-                        timeout_time = elapsed
-                        break
+                for pattern_id in result.matches:
+                    conflicts[pattern_id] = ("regex", registry.patterns[pattern_id])
+                if not result.completed:
+                    incomplete_scan = result
 
             case PatternCheckType.SPECIAL_PREFIX:
-                for info in registry.patterns.values():
-                    if info.signature.startswith(signature):
-                        conflicts[info.id] = ("prefix", info)
+                for info in registry.lookups.signature_prefixes.starting_with(
+                    signature
+                ):
+                    conflicts[info.id] = ("prefix", info)
 
         title = await translate_command_text(
             interaction, "title", conflicts=len(conflicts)
@@ -200,15 +240,34 @@ class PatternCog(HexBugCog, GroupCog, group_name="pattern"):
         else:
             embed = Embed(
                 title=title,
-                color=Color.green() if timeout_time is None else Color.orange(),
+                color=Color.green() if incomplete_scan is None else Color.orange(),
+            )
+
+        if similar_shapes:
+            if not conflicts:
+                embed.color = Color.orange()
+            embed.add_field(
+                name=await translate_command_text(interaction, "similar"),
+                value=truncate_str(
+                    "\n".join(
+                        f"- {registry.display_pattern(match.value).name} (`{match.value.id}`): {match.similarity:.0%}"
+                        for match in similar_shapes
+                    ),
+                    1024,
+                ),
+                inline=False,
             )
 
         if pattern_type is PatternCheckType.REGEX:
             embed.set_footer(text=signature)
 
-        if timeout_time is not None:
+        if incomplete_scan is not None:
             embed.description = await translate_command_text(
-                interaction, "timeout", time=timeout_time
+                interaction,
+                "timeout",
+                time=round(incomplete_scan.elapsed, 2),
+                checked=incomplete_scan.checked,
+                total=incomplete_scan.total,
             )
 
         await EmbedPatternView(
@@ -30,6 +30,7 @@ from HexBug.utils.discord.translation import (
 )
 from HexBug.utils.discord.visibility import Visibility, VisibilityOption
 from HexBug.utils.numbers import DecomposedNumber
+from HexBug.utils.tracing import span
 
 MAX_NUMBER = 1e12
 MAX_LENGTH = 48
@@ -217,13 +218,14 @@ class PatternsCog(HexBugCog, GroupCog, group_name="patterns"):
         target: int | Fraction,
         visibility: Visibility,
     ):
-        result = await asyncio.get_running_loop().run_in_executor(
-            None,
-            DecomposedNumber.generate_or_decompose,
-            target,
-            self.bot.registry.pregenerated_numbers,
-            timedelta(seconds=1),
-        )
+        with span("number_search"):
+            result = await asyncio.get_running_loop().run_in_executor(
+                None,
+                DecomposedNumber.generate_or_decompose,
+                target,
+                self.bot.registry.pregenerated_numbers,
+                timedelta(seconds=1),
+            )
 
         if result.is_equation:
             await EmbedPatternView(
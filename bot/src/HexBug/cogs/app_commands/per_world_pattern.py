@@ -1,12 +1,12 @@
-import sqlalchemy as sa
-from discord import Embed, Interaction, User, app_commands
+from io import BytesIO
+
+from discord import Embed, File, Interaction, User, app_commands
 from discord.app_commands import Transform
 from discord.ext.commands import GroupCog
 
 from HexBug.core.cog import HexBugCog
 from HexBug.core.exceptions import InvalidInputError
 from HexBug.data.hex_math import HexPattern
-from HexBug.data.patterns import PatternInfo
 from HexBug.db.models import PerWorldPattern
 from HexBug.ui.views.patterns import PerWorldPatternView
 from HexBug.utils.discord.transformers import (
@@ -21,7 +21,13 @@ from HexBug.utils.discord.visibility import (
     VisibilityOption,
     respond_with_visibility,
 )
-from HexBug.utils.per_world_patterns import add_per_world_pattern
+from HexBug.utils.per_world_patterns import (
+    add_per_world_pattern,
+    iter_export_lines,
+    match_per_world_pattern,
+)
+
+EXPORT_FILENAME = "per_world_patterns.json"
 
 
 @app_commands.guild_install()
@@ -36,19 +42,7 @@ class PerWorldPatternCog(HexBugCog, GroupCog, group_name="per-world-pattern"):
     ):
         # look up the pattern to make sure it's actually per-world
         pattern = HexPattern(direction, signature)
-        match self.bot.registry.try_match_pattern(pattern):
-            case PatternInfo(is_per_world=True, display_only=False) as info:
-                pass
-            case None:
-                raise InvalidInputError("Unknown pattern.", value=pattern.display())
-            case match:
-                raise InvalidInputError(
-                    "Pattern is not per-world.",
-                    value=pattern.display(),
-                ).add_field(
-                    name="Pattern",
-                    value=self.bot.registry.display_pattern(match).name,
-                )
+        info = match_per_world_pattern(self.bot.registry, pattern)
 
         await add_per_world_pattern(
             interaction,
@@ -66,13 +60,8 @@ class PerWorldPatternCog(HexBugCog, GroupCog, group_name="per-world-pattern"):
     ):
         assert interaction.guild
 
-        async with self.bot.db_session() as session:
-            stmt = sa.select(PerWorldPattern).where(
-                PerWorldPattern.guild_id == interaction.guild.id
-            )
-            if contributor:
-                stmt = stmt.where(PerWorldPattern.user_id == contributor.id)
-            entries = await session.scalars(stmt)
+        guild = await self.bot.per_world_patterns.get(interaction.guild.id)
+        entries = guild.filter_user(contributor.id if contributor else None)
 
         patterns = sorted(
             (
@@ -111,6 +100,38 @@ class PerWorldPatternCog(HexBugCog, GroupCog, group_name="per-world-pattern"):
 
         await respond_with_visibility(interaction, visibility, embed=embed)
 
+    @app_commands.command()
+    async def export(
+        self,
+        interaction: Interaction,
+        contributor: User | None = None,
+    ):
+        assert interaction.guild
+
+        guild = await self.bot.per_world_patterns.get(interaction.guild.id)
+        entries = sorted(
+            guild.filter_user(contributor.id if contributor else None),
+            key=lambda entry: str(entry.id),
+        )
+        if not entries:
+            if contributor:
+                raise InvalidInputError(
+                    "No patterns have been added to this server by this user.",
+                    value=contributor.name,
+                )
+            raise InvalidInputError("No patterns found in this server.", fields=[])
+
+        buf = BytesIO()
+        for line in iter_export_lines(entries):
+            buf.write(line.encode() + b"\n")
+        buf.seek(0)
+
+        await interaction.response.send_message(
+            await translate_command_text(interaction, "exported", count=len(entries)),
+            file=File(buf, EXPORT_FILENAME),
+            ephemeral=True,
+        )
+
     @app_commands.command()
     async def name(
         self,
@@ -138,8 +159,7 @@ class PerWorldPatternCog(HexBugCog, GroupCog, group_name="per-world-pattern"):
                 fields=[],
             )
 
-        async with self.bot.db_session() as session, session.begin():
-            await session.delete(entry)
+        await self.bot.per_world_patterns.remove(entry)
 
         view = await PerWorldPatternView.new(interaction, entry, contributor)
         await view.send(
@@ -1,17 +1,15 @@
 from typing import Any
 
-import sqlalchemy as sa
-from discord import ButtonStyle, Color, Interaction, User, app_commands
+import humanize
+from discord import Attachment, ButtonStyle, Color, Interaction, User, app_commands
 from discord.ext.commands import GroupCog
 from discord.ui import ActionRow, Button, Container, LayoutView, TextDisplay
-from sqlalchemy import func
+from hexdoc.core import ResourceLocation
 
 from HexBug.core.bot import HexBugBot
 from HexBug.core.cog import HexBugCog
 from HexBug.core.exceptions import InvalidInputError
 from HexBug.data.hex_math import HexPattern
-from HexBug.data.patterns import PatternInfo
-from HexBug.data.special_handlers import SpecialHandlerMatch
 from HexBug.db.models import PerWorldPattern
 from HexBug.ui.views.patterns import PerWorldPatternView
 from HexBug.utils.discord.transformers import (
@@ -22,7 +20,20 @@ from HexBug.utils.discord.transformers import (
 )
 from HexBug.utils.discord.translation import translate_command_text
 from HexBug.utils.discord.visibility import Visibility
-from HexBug.utils.per_world_patterns import add_per_world_pattern
+from HexBug.utils.per_world_patterns import (
+    add_per_world_pattern,
+    check_per_world_pattern_id,
+    match_per_world_pattern,
+    parse_per_world_pattern_file,
+)
+from HexBug.utils.strings import truncate_str
+
+MAX_IMPORT_FILE_SIZE = 256 * 1024
+
+MAX_IMPORT_PATTERNS = 1000
+
+MAX_REPORTED_PATTERNS = 20
+"""Maximum number of skipped patterns to list after an import."""
 
 
 @app_commands.guild_install()
@@ -40,37 +51,7 @@ class PerWorldPatternManageCog(
         signature: PatternSignatureOption,
     ):
         pattern = HexPattern(direction, signature)
-        match self.bot.registry.try_match_pattern(pattern):
-            case PatternInfo(is_per_world=True, display_only=False) as info:
-                if info.id != pattern_id:
-                    raise InvalidInputError(
-                        "A pattern with this shape exists, but does not match the provided ID.",
-                        value=f"`{pattern_id}`",
-                    ).add_field(
-                        name="Pattern",
-                        value=f"{self.bot.registry.display_pattern(info).name} (`{info.id}`)",
-                    )
-
-            case PatternInfo() as info:
-                raise InvalidInputError(
-                    "A pattern with this shape exists, but is not per-world.",
-                    value=pattern.display(),
-                ).add_field(
-                    name="Pattern",
-                    value=self.bot.registry.display_pattern(info).name,
-                )
-
-            # we allow special handler matches in case an addon adds a per-world pattern that conflicts with a special handler
-            # like craft phial, for instance
-            case SpecialHandlerMatch() | None:
-                if info := self.bot.registry.patterns.get(pattern_id):
-                    raise InvalidInputError(
-                        "A pattern with this ID exists, but does not match the provided shape.",
-                        value=pattern.display(),
-                    ).add_field(
-                        name="Pattern",
-                        value=self.bot.registry.display_pattern(info).name,
-                    )
+        info = check_per_world_pattern_id(self.bot.registry, pattern, pattern_id)
 
         await add_per_world_pattern(
             interaction,
@@ -79,10 +60,115 @@ class PerWorldPatternManageCog(
             info,
         )
 
+    @app_commands.command(name="import")
+    async def import_(self, interaction: Interaction, file: Attachment):
+        assert interaction.guild_id
+
+        if file.size > MAX_IMPORT_FILE_SIZE:
+            raise InvalidInputError(
+                f"File is too large (max: {humanize.naturalsize(MAX_IMPORT_FILE_SIZE, binary=True)}).",
+                value=f"{file.filename} ({humanize.naturalsize(file.size, binary=True)})",
+            )
+
+        try:
+            text = (await file.read()).decode()
+        except UnicodeDecodeError as e:
+            raise InvalidInputError(
+                "Unable to decode file as UTF-8.",
+                value=file.filename,
+            ) from e
+
+        values = parse_per_world_pattern_file(text)
+        if not values:
+            raise InvalidInputError("No patterns found in file.", value=file.filename)
+        if len(values) > MAX_IMPORT_PATTERNS:
+            raise InvalidInputError(
+                f"Too many patterns in file (max: {MAX_IMPORT_PATTERNS}).",
+                value=len(values),
+            )
+
+        # validate everything up front, so the insert can be done in one statement
+        entries = list[PerWorldPattern]()
+        skipped = list[tuple[HexPattern, str]]()
+        seen_ids = set[ResourceLocation]()
+        seen_signatures = set[str]()
+
+        for value in values:
+            pattern = HexPattern(value.direction, value.signature)
+            try:
+                if value.id is None:
+                    pattern_id = match_per_world_pattern(self.bot.registry, pattern).id
+                else:
+                    pattern_id = value.id
+                    check_per_world_pattern_id(self.bot.registry, pattern, pattern_id)
+            except InvalidInputError as e:
+                skipped.append((pattern, e.message))
+                continue
+
+            if pattern_id in seen_ids or pattern.signature in seen_signatures:
+                skipped.append((pattern, "Duplicate pattern in file."))
+                continue
+            seen_ids.add(pattern_id)
+            seen_signatures.add(pattern.signature)
+
+            entries.append(
+                PerWorldPattern(
+                    id=pattern_id,
+                    guild_id=interaction.guild_id,
+                    user_id=interaction.user.id,
+                    direction=pattern.direction,
+                    signature=pattern.signature,
+                )
+            )
+
+        inserted = await self.bot.per_world_patterns.add_many(entries)
+
+        inserted_ids = {entry.id for entry in inserted}
+        skipped += [
+            (entry.pattern, "Pattern has already been added to this server's database.")
+            for entry in entries
+            if entry.id not in inserted_ids
+        ]
+
+        view = LayoutView()
+        view.add_item(
+            TextDisplay(
+                await translate_command_text(
+                    interaction, "imported", count=len(inserted)
+                )
+            )
+        )
+
+        if skipped:
+            lines = [
+                truncate_str(f"- `{pattern.display()}`: {reason}", 200)
+                for pattern, reason in skipped[:MAX_REPORTED_PATTERNS]
+            ]
+            if len(skipped) > MAX_REPORTED_PATTERNS:
+                lines.append(
+                    await translate_command_text(
+                        interaction,
+                        "more",
+                        count=len(skipped) - MAX_REPORTED_PATTERNS,
+                    )
+                )
+            view.add_item(
+                Container[Any](
+                    TextDisplay(
+                        await translate_command_text(
+                            interaction, "skipped", count=len(skipped)
+                        )
+                    ),
+                    TextDisplay("\n".join(lines)),
+                    accent_colour=Color.red(),
+                )
+            )
+
+        await interaction.response.send_message(view=view, ephemeral=True)
+
     @app_commands.command()
     async def remove(self, interaction: Interaction, entry: PerWorldPatternOption):
-        async with self.bot.db_session() as session, session.begin():
-            await session.delete(entry)
+        await self.bot.per_world_patterns.remove(entry)
 
         view = await PerWorldPatternView.new(interaction, entry)
         await view.send(
@@ -99,13 +185,8 @@ class PerWorldPatternManageCog(
     ):
         assert interaction.guild_id
 
-        async with self.bot.db_session() as session:
-            stmt = sa.select(func.count(PerWorldPattern.id)).where(
-                PerWorldPattern.guild_id == interaction.guild_id
-            )
-            if contributor:
-                stmt = stmt.where(PerWorldPattern.user_id == contributor.id)
-            count = await session.scalar(stmt)
+        guild = await self.bot.per_world_patterns.get(interaction.guild_id)
+        count = len(guild.filter_user(contributor.id if contributor else None))
 
         if not count:
             if contributor:
@@ -181,13 +262,11 @@ class RemoveAllView(LayoutView):
         interaction: Interaction,
         button: Button[Any],
     ):
-        async with self.bot.db_session() as session, session.begin():
-            stmt = sa.delete(PerWorldPattern).where(
-                PerWorldPattern.guild_id == interaction.guild_id
-            )
-            if self.contributor:
-                stmt = stmt.where(PerWorldPattern.user_id == self.contributor.id)
-            await session.execute(stmt)
+        assert interaction.guild_id
+        await self.bot.per_world_patterns.remove_all(
+            interaction.guild_id,
+            self.contributor.id if self.contributor else None,
+        )
 
         self.container.clear_items()
         self.container.add_item(
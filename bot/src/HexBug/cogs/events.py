@@ -4,6 +4,7 @@ from discord import Interaction
 from discord.ext.commands import Cog
 
 from HexBug.core.cog import HexBugCog
+from HexBug.db.usage import UsageKind
 from HexBug.ui.views.sync import SyncButton
 from HexBug.utils.discord.commands import get_command, print_command
 from HexBug.utils.discord.visibility import DeleteButton
@@ -22,10 +23,12 @@ class EventsCog(HexBugCog):
             SyncButton,
         )
         await self.bot.fetch_custom_emojis()
+        await self.bot.per_world_patterns.warm(guild.id for guild in self.bot.guilds)
 
     @Cog.listener()
     async def on_interaction(self, interaction: Interaction):
         if command := get_command(interaction):
+            self.bot.usage.record(UsageKind.COMMAND, command.qualified_name)
             logger.debug(
                 f"Command executed: {
                     print_command(interaction, command, truncate=False)
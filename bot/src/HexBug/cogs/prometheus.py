@@ -5,6 +5,7 @@ from discord.ext.prometheus import PrometheusCog as BasePrometheusCog
 
 from HexBug.core.bot import HexBugBot
 from HexBug.utils.metrics import (
+    ACTIVE_COMMANDS_BY_NAME_GAUGE,
     ACTIVE_COMMANDS_GAUGE,
     APPROX_GUILD_GAUGE,
     APPROX_USER_INSTALL_GAUGE,
@@ -26,6 +27,9 @@ class PrometheusCog(BasePrometheusCog):
     @tasks.loop(minutes=1)
     async def fast_loop(self):
         ACTIVE_COMMANDS_GAUGE.set(self.bot.num_active_commands)
+        ACTIVE_COMMANDS_BY_NAME_GAUGE.clear()
+        for command, count in self.bot.get_active_command_counts().items():
+            ACTIVE_COMMANDS_BY_NAME_GAUGE.labels(command).set(count)
         LONGEST_ACTIVE_COMMAND_RUNTIME_GAUGE.set(
             self.bot.get_longest_active_command_runtime() or 0
         )
@@ -0,0 +1,26 @@
+import logging
+
+from discord.ext import tasks
+
+from HexBug.core.cog import HexBugCog
+
+logger = logging.getLogger(__name__)
+
+
+class UsageCog(HexBugCog):
+    """Periodically writes the usage counts in `HexBugBot.usage` to the database."""
+
+    async def cog_load(self):
+        await super().cog_load()
+        self.flush_loop.start()
+
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        await self.bot.usage.flush()
+
+    @tasks.loop(minutes=1)
+    async def flush_loop(self):
+        try:
+            await self.bot.usage.flush()
+        except Exception:
+            logger.warning("Failed to flush usage counts", exc_info=True)
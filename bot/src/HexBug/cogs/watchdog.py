@@ -0,0 +1,24 @@
+from dataclasses import dataclass, field
+
+from HexBug.core.cog import HexBugCog
+from HexBug.utils.watchdog import LoopWatchdog
+
+
+@dataclass(eq=False)
+class WatchdogCog(HexBugCog):
+    """Reports event loop lag, and logs what's running when the loop is blocked."""
+
+    watchdog: LoopWatchdog | None = field(default=None, init=False)
+
+    async def cog_load(self):
+        await super().cog_load()
+        threshold = self.env.loop_block_threshold
+        self.watchdog = LoopWatchdog(
+            block_threshold=threshold.total_seconds() if threshold else None,
+        )
+        self.watchdog.start()
+
+    async def cog_unload(self):
+        if watchdog := self.watchdog:
+            self.watchdog = None
+            watchdog.stop()
@@ -1,6 +1,6 @@
 import itertools
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Iterator
 
 from discord import AppCommandType, CustomActivity, Emoji, Intents, Interaction, Locale
@@ -17,7 +17,7 @@ from discord.app_commands import (
 )
 from discord.ext import commands
 from discord.ext.commands import Bot, Context, NoEntryPointError
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 from tantivy import Index
 
 from HexBug import cogs
@@ -25,7 +25,16 @@ from HexBug.__version__ import VERSION
 from HexBug.data.mods import Modloader
 from HexBug.data.parsers.pretty_print import IotaPrinter
 from HexBug.data.registry import HexBugRegistry
+from HexBug.db.cache import PerWorldPatternCache
+from HexBug.db.engine import create_db_engine
+from HexBug.db.usage import UsageCounter
+from HexBug.utils.autocomplete import AutocompleteIndexes
 from HexBug.utils.imports import iter_modules
+from HexBug.utils.tracing import (
+    OTLPJSONFileExporter,
+    add_span_exporter,
+    shutdown_span_exporters,
+)
 
 from .emoji import CustomEmoji
 from .env import HexBugEnv
@@ -46,6 +55,9 @@ class HexBugBot(Bot):
     db_engine: AsyncEngine
     start_time: datetime
     iota_printer: IotaPrinter
+    autocomplete: AutocompleteIndexes
+    per_world_patterns: PerWorldPatternCache
+    usage: UsageCounter
     _custom_emoji: dict[CustomEmoji, Emoji]
     _failed_translations: set[Locale]
 
@@ -74,12 +86,18 @@ class HexBugBot(Bot):
         self.book_index = book_index
         self.should_run = run
 
-        self.db_engine = create_async_engine(
-            env.db_url,
-            pool_pre_ping=True,
-        )
+        self.db_engine = create_db_engine(env)
         self.start_time = datetime.now()
         self.iota_printer = IotaPrinter(self.registry)
+        self.autocomplete = AutocompleteIndexes.build(self.registry)
+        self.per_world_patterns = PerWorldPatternCache(
+            self.db_session,
+            self.registry,
+            ttl=timedelta(minutes=30),
+        )
+        self.usage = UsageCounter(self.db_session)
+        if env.trace_export_path:
+            add_span_exporter(OTLPJSONFileExporter(env.trace_export_path))
         self._custom_emoji = {}
         self._failed_translations = set()
 
@@ -125,9 +143,25 @@ class HexBugBot(Bot):
         assert isinstance(self.tree, HexBugCommandTree)
         return self.tree.get_longest_active_command_runtime()
 
+    def get_active_command_counts(self):
+        assert isinstance(self.tree, HexBugCommandTree)
+        return self.tree.get_active_command_counts()
+
+    def iter_stuck_commands(self, threshold: float):
+        assert isinstance(self.tree, HexBugCommandTree)
+        return self.tree.iter_stuck_commands(threshold)
+
     def db_session(self):
         return AsyncSession(self.db_engine)
 
+    async def close(self):
+        try:
+            await self.usage.flush()
+        except Exception:
+            logger.warning("Failed to flush usage counts", exc_info=True)
+        shutdown_span_exporters()
+        await super().close()
+
     async def load(self):
         await self._check_database()
         await self._load_translator()
@@ -1,5 +1,10 @@
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
 from datetime import UTC, datetime
-from typing import override
+from io import StringIO
+from typing import Any, Iterator, override
 
 from discord import Color, Embed, Interaction
 from discord.app_commands import (
@@ -16,12 +21,40 @@ from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError
 
 from HexBug.core.exceptions import InvalidInputError, SilentError
+from HexBug.utils.discord.commands import get_qualified_name
 from HexBug.utils.discord.embeds import add_fields
-from HexBug.utils.metrics import COMMAND_RUNTIME_HISTOGRAM
+from HexBug.utils.tracing import root_span
+
+
+@dataclass(eq=False)
+class ActiveCommand:
+    name: str
+    """The qualified name of the command, or `unknown`."""
+    start: float
+    """The value of `time.monotonic()` when the command started."""
+    task: asyncio.Task[Any] | None
+
+    @property
+    def runtime(self) -> float:
+        return time.monotonic() - self.start
+
+    def format_stack(self, limit: int = 20) -> str | None:
+        """Returns the current stack of the task running this command."""
+        if self.task is None:
+            return None
+        buf = StringIO()
+        self.task.print_stack(limit=limit, file=buf)
+        return buf.getvalue()
 
 
 class HexBugCommandTree(CommandTree):
-    _command_start_times: dict[int, datetime]
+    _active_commands: dict[int, ActiveCommand]
+    """Active commands in the order they started.
+
+    Keys are assigned in increasing order, so the first value is always the oldest
+    active command.
+    """
+    _active_command_counts: Counter[str]
     _next_command_key: int
 
     def __init__(
@@ -38,22 +71,32 @@ class HexBugCommandTree(CommandTree):
             allowed_contexts=allowed_contexts,
             allowed_installs=allowed_installs,
         )
-        self._command_start_times = {}
+        self._active_commands = {}
+        self._active_command_counts = Counter()
         self._next_command_key = 0
 
     @property
     def num_active_commands(self):
-        return len(self._command_start_times)
+        return len(self._active_commands)
+
+    def get_oldest_active_command(self) -> ActiveCommand | None:
+        return next(iter(self._active_commands.values()), None)
 
     def get_longest_active_command_runtime(self):
-        now = datetime.now()
-        return max(
-            (
-                (now - start).total_seconds()
-                for start in self._command_start_times.values()
-            ),
-            default=None,
-        )
+        if oldest := self.get_oldest_active_command():
+            return oldest.runtime
+        return None
+
+    def get_active_command_counts(self) -> dict[str, int]:
+        return dict(self._active_command_counts)
+
+    def iter_stuck_commands(self, threshold: float) -> Iterator[ActiveCommand]:
+        """Yields active commands that have been running for at least `threshold`
+        seconds, oldest first."""
+        for command in self._active_commands.values():
+            if command.runtime < threshold:
+                return
+            yield command
 
     @override
     async def _call(self, interaction: Interaction) -> None:
@@ -62,25 +105,33 @@ class HexBugCommandTree(CommandTree):
             # lie
             interaction.data["type"] = 1  # pyright: ignore[reportGeneralTypeIssues]
 
-        start = datetime.now()
         key = self._next_command_key
         self._next_command_key += 1
-        try:
-            self._command_start_times[key] = start
-            await super()._call(interaction)
-        finally:
-            del self._command_start_times[key]
-            COMMAND_RUNTIME_HISTOGRAM.observe((datetime.now() - start).total_seconds())
+        active = ActiveCommand(
+            name=get_qualified_name(interaction) or "unknown",
+            start=time.monotonic(),
+            task=asyncio.current_task(),
+        )
+        with root_span("interaction", interaction=interaction.type.name) as span:
+            try:
+                self._active_commands[key] = active
+                self._active_command_counts[active.name] += 1
+                await super()._call(interaction)
+            finally:
+                del self._active_commands[key]
+                self._active_command_counts[active.name] -= 1
+                if not self._active_command_counts[active.name]:
+                    del self._active_command_counts[active.name]
+                if interaction.command:
+                    span.attributes["command"] = interaction.command.qualified_name
+                if interaction.command_failed:
+                    span.set_error()
 
     @override
     async def on_error(self, interaction: Interaction, error: AppCommandError):
         if isinstance(error, SilentError):
             return
 
-        if interaction.response.is_done():
-            await super().on_error(interaction, error)
-            return
-
         embed = Embed(
             color=Color.red(),
             timestamp=datetime.now(UTC),
@@ -138,4 +189,8 @@ class HexBugCommandTree(CommandTree):
             footer += f" ({context.__class__.__name__})"
         embed.set_footer(text=footer)
 
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        # commands that take a while defer the response first
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        else:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
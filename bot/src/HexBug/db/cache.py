@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable, Iterable, Sequence
+
+import sqlalchemy as sa
+from hexdoc.core import ResourceLocation
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from HexBug.data.registry import HexBugRegistry
+from HexBug.utils.autocomplete import AutocompleteIndex
+from HexBug.utils.matching import GuildPatternMatcher
+from HexBug.utils.tracing import span
+
+from .models import PerWorldPattern
+
+logger = logging.getLogger(__name__)
+
+MAX_LOAD_ATTEMPTS = 3
+"""Number of times `PerWorldPatternCache.get` loads a guild before giving up on caching
+it, if it keeps being written to during the load."""
+
+
+@dataclass
+class GuildPerWorldPatterns:
+    """All of the per-world patterns that have been added to a guild."""
+
+    by_id: dict[ResourceLocation, PerWorldPattern] = field(default_factory=dict)
+    by_signature: dict[str, PerWorldPattern] = field(default_factory=dict)
+
+    autocomplete_indexes: dict[int | None, AutocompleteIndex] = field(
+        default_factory=dict
+    )
+    """Autocomplete indexes built from this guild's patterns, keyed by user id (or None
+    for all users).
+
+    Filled in lazily by `PerWorldPatternTransformer`, and cleared on every write.
+    """
+
+    matcher: GuildPatternMatcher | None = None
+    """Filled in lazily by `PerWorldPatternCache.get_matcher`, and cleared on every
+    write."""
+
+    expires_at: float = 0
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def filter_user(self, user_id: int | None) -> list[PerWorldPattern]:
+        if user_id is None:
+            return list(self.by_id.values())
+        return [entry for entry in self.by_id.values() if entry.user_id == user_id]
+
+    def _add(self, entry: PerWorldPattern):
+        self.by_id[entry.id] = entry
+        self.by_signature[entry.signature] = entry
+        self._clear_derived()
+
+    def _remove(self, entry: PerWorldPattern):
+        if self.by_id.pop(entry.id, None) is not None:
+            self.by_signature.pop(entry.signature, None)
+        self._clear_derived()
+
+    def _clear_derived(self):
+        self.autocomplete_indexes.clear()
+        self.matcher = None
+
+
+class PerWorldPatternCache:
+    """Write-through cache of the `per_world_pattern` table, grouped by guild.
+
+    Reads are served from memory after a guild is first loaded. All writes to the table
+    should go through this class, so that the cache and the database stay in sync.
+    Guilds are reloaded after `ttl` as a safety net, in case the table is modified
+    externally.
+
+    The returned `PerWorldPattern` objects are shared between callers, so they must not
+    be modified.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        registry: HexBugRegistry,
+        *,
+        ttl: timedelta,
+    ):
+        self.session_factory = session_factory
+        self.registry = registry
+        self.ttl = ttl.total_seconds()
+        self._guilds = dict[int, GuildPerWorldPatterns]()
+        self._generations = dict[int, int]()
+
+    async def get(self, guild_id: int) -> GuildPerWorldPatterns:
+        guild = self._guilds.get(guild_id)
+        if guild is not None and guild.expires_at > time.monotonic():
+            return guild
+
+        # if a write happens during the load, the result isn't cached, so try again
+        for _ in range(MAX_LOAD_ATTEMPTS - 1):
+            await self._load([guild_id])
+            if (guild := self._guilds.get(guild_id)) is not None:
+                return guild
+
+        loaded = await self._load([guild_id])
+        if (guild := self._guilds.get(guild_id)) is not None:
+            return guild
+
+        # the guild keeps being written to, so use the last load without caching it
+        logger.warning(
+            f"Failed to cache per-world patterns for guild {guild_id} after "
+            f"{MAX_LOAD_ATTEMPTS} attempts"
+        )
+        return loaded[guild_id]
+
+    async def get_matcher(
+        self,
+        guild_id: int | None,
+    ) -> HexBugRegistry | GuildPatternMatcher:
+        """Returns a pattern matcher that knows about the given guild's per-world
+        patterns, or the registry if `guild_id` is None."""
+
+        if guild_id is None:
+            return self.registry
+
+        guild = await self.get(guild_id)
+        if guild.matcher is None:
+            guild.matcher = GuildPatternMatcher(
+                self.registry,
+                {
+                    signature: entry.id
+                    for signature, entry in guild.by_signature.items()
+                },
+            )
+        return guild.matcher
+
+    async def warm(self, guild_ids: Iterable[int], *, reload: bool = False):
+        """Loads all of the given guilds that aren't already cached in one query."""
+
+        now = time.monotonic()
+        guild_ids = [
+            guild_id
+            for guild_id in set(guild_ids)
+            if reload
+            or (guild := self._guilds.get(guild_id)) is None
+            or guild.expires_at <= now
+        ]
+        if guild_ids:
+            await self._load(guild_ids)
+
+    async def _load(self, guild_ids: list[int]) -> dict[int, GuildPerWorldPatterns]:
+        """Loads the given guilds, and caches the ones that weren't written to during
+        the load."""
+
+        generations = {guild_id: self._generation(guild_id) for guild_id in guild_ids}
+
+        logger.debug(f"Loading per-world patterns for {len(guild_ids)} guild(s)")
+        with span("db"):
+            async with self.session_factory() as session:
+                stmt = sa.select(PerWorldPattern).where(
+                    PerWorldPattern.guild_id
+                    == sa.any_(
+                        sa.bindparam("guild_ids", guild_ids, ARRAY(sa.BigInteger))
+                    )
+                )
+                entries = (await session.scalars(stmt)).all()
+
+        expires_at = time.monotonic() + self.ttl
+        guilds = {
+            guild_id: GuildPerWorldPatterns(expires_at=expires_at)
+            for guild_id in guild_ids
+        }
+        for entry in entries:
+            guilds[entry.guild_id]._add(entry)
+
+        for guild_id, guild in guilds.items():
+            # don't overwrite the results of a write that finished during the load
+            if self._generation(guild_id) == generations[guild_id]:
+                self._guilds[guild_id] = guild
+
+        return guilds
+
+    async def add(self, entry: PerWorldPattern):
+        """Inserts a pattern into the database and the cache.
+
+        Raises `IntegrityError` if the pattern conflicts with an existing one.
+        """
+        # committing expires the entry's attributes, so cache a copy instead
+        cached = _copy(entry)
+        async with self.session_factory() as session, session.begin():
+            session.add(entry)
+        self._on_write(cached.guild_id, add=[cached])
+
+    async def add_many(
+        self, entries: Sequence[PerWorldPattern]
+    ) -> list[PerWorldPattern]:
+        """Inserts patterns into the database and the cache in a single statement.
+
+        Patterns that conflict with existing ones are skipped. Returns the patterns that
+        were inserted.
+        """
+        if not entries:
+            return []
+
+        cached = [_copy(entry) for entry in entries]
+        async with self.session_factory() as session, session.begin():
+            result = await session.execute(
+                insert(PerWorldPattern)
+                .on_conflict_do_nothing()
+                .returning(PerWorldPattern.id, PerWorldPattern.guild_id),
+                [
+                    {
+                        "id": entry.id,
+                        "guild_id": entry.guild_id,
+                        "user_id": entry.user_id,
+                        "direction": entry.direction,
+                        "signature": entry.signature,
+                    }
+                    for entry in cached
+                ],
+            )
+            inserted_keys = set(result.tuples())
+
+        inserted = [
+            entry for entry in cached if (entry.id, entry.guild_id) in inserted_keys
+        ]
+        for guild_id in {entry.guild_id for entry in inserted}:
+            self._on_write(
+                guild_id,
+                add=[entry for entry in inserted if entry.guild_id == guild_id],
+            )
+        return inserted
+
+    async def remove(self, entry: PerWorldPattern):
+        async with self.session_factory() as session, session.begin():
+            await session.execute(
+                sa.delete(PerWorldPattern)
+                .where(PerWorldPattern.id == entry.id)
+                .where(PerWorldPattern.guild_id == entry.guild_id)
+            )
+        self._on_write(entry.guild_id, remove=[entry])
+
+    async def remove_all(self, guild_id: int, user_id: int | None = None):
+        async with self.session_factory() as session, session.begin():
+            stmt = sa.delete(PerWorldPattern).where(
+                PerWorldPattern.guild_id == guild_id
+            )
+            if user_id is not None:
+                stmt = stmt.where(PerWorldPattern.user_id == user_id)
+            await session.execute(stmt)
+
+        guild = self._guilds.get(guild_id)
+        self._on_write(
+            guild_id,
+            remove=guild.filter_user(user_id) if guild else [],
+        )
+
+    def invalidate(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+        self._generations[guild_id] = self._generation(guild_id) + 1
+
+    def _generation(self, guild_id: int) -> int:
+        return self._generations.get(guild_id, 0)
+
+    def _on_write(
+        self,
+        guild_id: int,
+        *,
+        add: Iterable[PerWorldPattern] = (),
+        remove: Iterable[PerWorldPattern] = (),
+    ):
+        self._generations[guild_id] = self._generation(guild_id) + 1
+        if (guild := self._guilds.get(guild_id)) is not None:
+            for entry in remove:
+                guild._remove(entry)
+            for entry in add:
+                guild._add(entry)
+
+
+def _copy(entry: PerWorldPattern) -> PerWorldPattern:
+    return PerWorldPattern(
+        id=entry.id,
+        guild_id=entry.guild_id,
+        user_id=entry.user_id,
+        direction=entry.direction,
+        signature=entry.signature,
+    )
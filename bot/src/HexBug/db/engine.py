@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import Connection, event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from HexBug.core.env import HexBugEnv
+from HexBug.utils.metrics import (
+    DB_POOL_CHECKED_OUT_GAUGE,
+    DB_POOL_CHECKOUT_HISTOGRAM,
+    DB_POOL_SATURATION_GAUGE,
+    DB_QUERY_HISTOGRAM,
+)
+
+logger = logging.getLogger(__name__)
+
+_QUERY_START_KEY = "hexbug_query_start"
+
+_STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout takes, including waiting for a
+    free connection, opening new connections and pre-pinging."""
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT_HISTOGRAM.observe(time.perf_counter() - start)
+
+
+def create_db_engine(env: HexBugEnv) -> AsyncEngine:
+    engine = create_async_engine(
+        env.db_url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=env.db_pool_size,
+        max_overflow=env.db_max_overflow,
+        pool_timeout=env.db_pool_timeout.total_seconds(),
+        pool_recycle=int(env.db_pool_recycle.total_seconds())
+        if env.db_pool_recycle
+        else -1,
+        pool_pre_ping=env.db_pool_pre_ping,
+    )
+
+    pool = engine.pool
+    assert isinstance(pool, InstrumentedQueuePool)
+    capacity = env.db_pool_size + max(env.db_max_overflow, 0)
+    DB_POOL_CHECKED_OUT_GAUGE.set_function(pool.checkedout)
+    DB_POOL_SATURATION_GAUGE.set_function(lambda: pool.checkedout() / capacity)
+
+    slow_query_threshold = (
+        env.db_slow_query_threshold.total_seconds()
+        if env.db_slow_query_threshold
+        else None
+    )
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(  # pyright: ignore[reportUnusedFunction]
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ):
+        conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(  # pyright: ignore[reportUnusedFunction]
+        conn: Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ):
+        duration = time.perf_counter() - conn.info[_QUERY_START_KEY].pop()
+        DB_QUERY_HISTOGRAM.labels(get_statement_type(statement)).observe(duration)
+
+        if slow_query_threshold is not None and duration >= slow_query_threshold:
+            # don't log the parameters, since they may contain user data
+            logger.warning(f"Slow query ({duration:.3f} s): {statement}")
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(  # pyright: ignore[reportUnusedFunction]
+        context: ExceptionContext,
+    ):
+        # after_cursor_execute isn't called for failed queries
+        if (conn := context.connection) and (stack := conn.info.get(_QUERY_START_KEY)):
+            stack.pop()
+
+    return engine
+
+
+def get_statement_type(statement: str) -> str:
+    """Returns the first keyword of a SQL statement, for use as a metric label."""
+    match statement.split(None, 1):
+        case [keyword, *_] if (keyword := keyword.upper()) in _STATEMENT_TYPES:
+            return keyword
+        case _:
+            return "OTHER"
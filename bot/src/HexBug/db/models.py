@@ -59,3 +59,17 @@ class InfoMessage(Base):
     name: Mapped[str] = mapped_column(primary_key=True)
     usage_count: Mapped[int]
     last_used: Mapped[datetime]
+
+
+class UsageCount(Base):
+    __tablename__ = "usage_count"
+
+    kind: Mapped[str] = mapped_column(primary_key=True)
+    """The type of thing being counted.
+
+    See `HexBug.db.usage.UsageKind`.
+    """
+    name: Mapped[str] = mapped_column(primary_key=True)
+    """The name of the thing being counted, eg. a command name or pattern ID."""
+    count: Mapped[int] = mapped_column(BigInteger)
+    last_used: Mapped[datetime]
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
+from typing import Callable
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import InfoMessage, UsageCount
+
+logger = logging.getLogger(__name__)
+
+
+class UsageKind(StrEnum):
+    COMMAND = "command"
+    PATTERN = "pattern"
+
+
+@dataclass
+class InfoMessageUsage:
+    count: int
+    """The total number of times the message has been used, including this time."""
+    last_used: datetime | None
+    """The previous time the message was used, if any."""
+
+
+@dataclass
+class _PendingUsage:
+    count: int
+    last_used: datetime
+
+
+class UsageCounter:
+    """Counts how often commands, patterns and info messages are used.
+
+    Usage is aggregated in memory and written to the database in batches by `flush`,
+    which should be called periodically, rather than once per interaction.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self.session_factory = session_factory
+        self._pending = dict[tuple[UsageKind, str], _PendingUsage]()
+        self._pending_info = dict[str, _PendingUsage]()
+        self._info_totals = dict[str, InfoMessageUsage]()
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, kind: UsageKind, name: str):
+        _add_usage(self._pending, (kind, name), 1, datetime.now())
+
+    async def record_info_message(self, name: str) -> InfoMessageUsage:
+        """Records a use of an info message, and returns its updated usage stats.
+
+        The totals are loaded from the database the first time each message is used,
+        then kept in memory.
+        """
+        if name not in self._info_totals:
+            async with self.session_factory() as session:
+                row = await session.get(InfoMessage, name)
+            self._info_totals.setdefault(
+                name,
+                InfoMessageUsage(row.usage_count, row.last_used)
+                if row
+                else InfoMessageUsage(0, None),
+            )
+
+        now = datetime.now()
+        totals = self._info_totals[name]
+        result = InfoMessageUsage(totals.count + 1, totals.last_used)
+        self._info_totals[name] = InfoMessageUsage(result.count, now)
+        _add_usage(self._pending_info, name, 1, now)
+        return result
+
+    async def most_used(
+        self, kind: UsageKind, limit: int = 10
+    ) -> list[tuple[str, int]]:
+        """Returns the names and counts of the most used things of the given kind."""
+        await self.flush()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                sa.select(UsageCount.name, UsageCount.count)
+                .where(UsageCount.kind == kind.value)
+                .order_by(UsageCount.count.desc())
+                .limit(limit)
+            )
+            return list(result.tuples())
+
+    async def flush(self):
+        """Writes all pending usage to the database with one upsert per table."""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            pending_info, self._pending_info = self._pending_info, {}
+            if not pending and not pending_info:
+                return
+
+            logger.debug(
+                f"Flushing usage counts ({len(pending) + len(pending_info)} rows)"
+            )
+            try:
+                async with self.session_factory() as session, session.begin():
+                    if pending:
+                        await session.execute(
+                            _upsert_usage_count(),
+                            [
+                                {
+                                    "kind": kind.value,
+                                    "name": name,
+                                    "count": usage.count,
+                                    "last_used": usage.last_used,
+                                }
+                                for (kind, name), usage in pending.items()
+                            ],
+                        )
+                    if pending_info:
+                        await session.execute(
+                            _upsert_info_message(),
+                            [
+                                {
+                                    "name": name,
+                                    "usage_count": usage.count,
+                                    "last_used": usage.last_used,
+                                }
+                                for name, usage in pending_info.items()
+                            ],
+                        )
+            except BaseException:
+                # keep the counts so they're retried by the next flush
+                for key, usage in pending.items():
+                    _add_usage(self._pending, key, usage.count, usage.last_used)
+                for key, usage in pending_info.items():
+                    _add_usage(self._pending_info, key, usage.count, usage.last_used)
+                raise
+
+
+def _add_usage[K](
+    pending: dict[K, _PendingUsage],
+    key: K,
+    count: int,
+    last_used: datetime,
+):
+    if usage := pending.get(key):
+        usage.count += count
+        usage.last_used = max(usage.last_used, last_used)
+    else:
+        pending[key] = _PendingUsage(count, last_used)
+
+
+def _upsert_usage_count():
+    stmt = insert(UsageCount)
+    return stmt.on_conflict_do_update(
+        index_elements=[UsageCount.kind, UsageCount.name],
+        set_={
+            UsageCount.count: UsageCount.count + stmt.excluded["count"],
+            UsageCount.last_used: sa.func.greatest(
+                UsageCount.last_used, stmt.excluded.last_used
+            ),
+        },
+    )
+
+
+def _upsert_info_message():
+    stmt = insert(InfoMessage)
+    return stmt.on_conflict_do_update(
+        index_elements=[InfoMessage.name],
+        set_={
+            InfoMessage.usage_count: InfoMessage.usage_count
+            + stmt.excluded.usage_count,
+            InfoMessage.last_used: sa.func.greatest(
+                InfoMessage.last_used, stmt.excluded.last_used
+            ),
+        },
+    )
@@ -257,6 +257,9 @@ group_decode =
 -decode_contents_description =
         The result of using Reveal on an iota, copied from latest.log.
 
+-decode_extra-file_description =
+        An additional file to decode at the same time.
+
 -decode_flatten-list =
         flatten_list
 -decode_flatten-list_description =
@@ -298,6 +301,18 @@ command_decode-file =
         file
     .parameter_file_description = {-decode_contents_description}
 
+    .parameter_file-2 =
+        file_2
+    .parameter_file-2_description = {-decode_extra-file_description}
+
+    .parameter_file-3 =
+        file_3
+    .parameter_file-3_description = {-decode_extra-file_description}
+
+    .parameter_file-4 =
+        file_4
+    .parameter_file-4_description = {-decode_extra-file_description}
+
     .parameter_flatten-list = {-decode_flatten-list}
     .parameter_flatten-list_description = {-decode_flatten-list_description}
 
@@ -526,13 +541,15 @@ command_pattern-check =
            *[other] Conflicts found!
         }
 
-    .text_timeout = ⚠️ Timed out after { $time } seconds.
+    .text_timeout = ⚠️ Timed out after { $time } seconds. Only { $checked } of { $total } patterns were checked, so there may be more conflicts.
 
     .text_conflict-signature = Signature
     .text_conflict-shape = Shape
     .text_conflict-prefix = Prefix
     .text_conflict-regex = Regular Expression
 
+    .text_similar = Similar Shapes
+
 # /pattern build
 
 command_pattern-build =
@@ -657,6 +674,24 @@ command_per-world-pattern-add =
     .parameter_signature = {-parameter_signature}
     .parameter_signature_description = {-parameter_signature_description}
 
+# /per-world-pattern export
+
+command_per-world-pattern-export =
+        export
+    .description =
+        Export the per-world patterns in this server's database to a file.
+
+    .parameter_contributor =
+        contributor
+    .parameter_contributor_description =
+        Only export patterns that were added by this user.
+
+    .text_exported =
+        { $count ->
+            [one]   Exported **{ $count } pattern**.
+           *[other] Exported **{ $count } patterns**.
+        }
+
 # /per-world-pattern list
 
 command_per-world-pattern-list =
@@ -730,6 +765,30 @@ command_per-world-pattern-manage-add =
     .parameter_signature = {-parameter_signature}
     .parameter_signature_description = {-parameter_signature_description}
 
+# /per-world-pattern-manage import
+
+command_per-world-pattern-manage-import =
+        import
+    .description =
+        Add many per-world patterns to this server's database from a file.
+
+    .parameter_file =
+        file
+    .parameter_file_description =
+        A file from /per-world-pattern export, or the output of Reveal on a list of patterns.
+
+    .text_imported =
+        { $count ->
+            [one]   ✅ **{ $count } pattern imported.**
+           *[other] ✅ **{ $count } patterns imported.**
+        }
+    .text_skipped =
+        { $count ->
+            [one]   { $count } pattern skipped:
+           *[other] { $count } patterns skipped:
+        }
+    .text_more = ...and { $count } more.
+
 # /per-world-pattern-manage remove
 
 command_per-world-pattern-manage-remove =
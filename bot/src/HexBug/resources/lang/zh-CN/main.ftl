@@ -21,6 +21,9 @@ group_decode =
 -decode_contents_description =
         对iota使用揭示的输出结果，直接从latest.log复制而来。
 
+-decode_extra-file_description =
+        同时解码的附加文件。
+
 -decode_tab-width =
         tab_width
 -decode_tab-width_description =
@@ -54,6 +57,18 @@ command_decode-file =
         file
     .parameter_file_description = {-decode_contents_description}
 
+    .parameter_file-2 =
+        file_2
+    .parameter_file-2_description = {-decode_extra-file_description}
+
+    .parameter_file-3 =
+        file_3
+    .parameter_file-3_description = {-decode_extra-file_description}
+
+    .parameter_file-4 =
+        file_4
+    .parameter_file-4_description = {-decode_extra-file_description}
+
     .parameter_tab-width = {-decode_tab-width}
     .parameter_tab-width_description = {-decode_tab-width_description}
 
@@ -39,6 +39,7 @@ from HexBug.utils.discord.embeds import FOOTER_SEPARATOR, set_embed_mod_author
 from HexBug.utils.discord.translation import translate
 from HexBug.utils.discord.visibility import Visibility, add_visibility_buttons
 from HexBug.utils.strings import join_truthy
+from HexBug.utils.tracing import span
 
 from .options import OptionsView, option_button, option_select
 
@@ -85,13 +86,17 @@ class BasePatternView(ui.View, ABC):
     ):
         self.clear_items()
         self.add_items(interaction, visibility, message, show_usage)
-        await interaction.response.send_message(
-            content=content,
-            embeds=await self.get_embeds(interaction),
-            files=self.get_attachments(),
-            view=self,
-            ephemeral=visibility.ephemeral,
-        )
+        embeds = await self.get_embeds(interaction)
+        with span("render"):
+            files = self.get_attachments()
+        with span("discord"):
+            await interaction.response.send_message(
+                content=content,
+                embeds=embeds,
+                files=files,
+                view=self,
+                ephemeral=visibility.ephemeral,
+            )
 
     async def send_as_public(self, interaction: Interaction):
         await self.send(interaction, Visibility.PUBLIC, show_usage=True)
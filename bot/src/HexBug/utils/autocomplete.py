@@ -0,0 +1,471 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Hashable, Iterable, Iterator, Self, Sequence, TypedDict
+
+import pfzy
+from pfzy.score import (
+    BONUS_MAP,
+    SCORE_GAP_INNER,
+    SCORE_GAP_LEADING,
+    SCORE_GAP_TRAILING,
+    SCORE_MATCH_CAPITAL,
+    SCORE_MATCH_CONSECUTIVE,
+    SCORE_MAX,
+)
+
+from HexBug.data.registry import HexBugRegistry
+from HexBug.data.sources import UserInfo
+from HexBug.data.static_data import SPECIAL_HANDLERS
+from HexBug.utils.strings import truncate_str
+
+MAX_AUTOCOMPLETE_CHOICES = 25
+
+_MAX_BONUS = max(*BONUS_MAP.values(), SCORE_MATCH_CAPITAL)
+
+assert SCORE_GAP_LEADING == SCORE_GAP_TRAILING >= SCORE_GAP_INNER
+
+
+class AutocompleteWord(TypedDict):
+    search_term: str
+    name: str
+    value: str
+
+
+class AutocompleteIndex:
+    """Prebuilt fuzzy search index for autocomplete.
+
+    Search terms are lowercased once up front, and each character maps to a bitset of
+    the terms containing it, so a query only visits terms that contain all of its
+    characters. The remaining candidates are scored in order of an upper bound on
+    their score, stopping as soon as the top results can't change.
+
+    Results are ranked by `pfzy.fzy_scorer` on the original search terms, in the same
+    order as `pfzy.fuzzy_match`.
+    """
+
+    def __init__(self, words: Iterable[AutocompleteWord]):
+        self.terms = list[str]()
+        self.lower_terms = list[str]()
+        self.values = list[str]()
+        self.name_ids = list[int]()
+        self.names = list[str]()
+        """Deduplicated display names, indexed by `name_ids`."""
+        self.char_bitsets = dict[str, int]()
+        """Maps each lowercase character to a bitset of the terms containing it."""
+
+        name_ids = dict[str, int]()
+        for i, word in enumerate(words):
+            name = word["name"]
+            if (name_id := name_ids.get(name)) is None:
+                name_id = name_ids[name] = len(self.names)
+                self.names.append(name)
+
+            lower_term = word["search_term"].lower()
+            self.terms.append(word["search_term"])
+            self.lower_terms.append(lower_term)
+            self.values.append(word["value"])
+            self.name_ids.append(name_id)
+
+            bit = 1 << i
+            for c in set(lower_term):
+                self.char_bitsets[c] = self.char_bitsets.get(c, 0) | bit
+
+    def __len__(self):
+        return len(self.terms)
+
+    def search(
+        self,
+        query: str,
+        limit: int = MAX_AUTOCOMPLETE_CHOICES,
+        *,
+        candidates: Sequence[int] | None = None,
+    ) -> list[AutocompleteWord]:
+        """Returns the best `limit` matches for `query`, with at most one result per
+        display name.
+
+        If given, `candidates` must be the result of `find_candidates(query)`.
+        """
+
+        if candidates is None:
+            candidates = self.find_candidates(query)
+
+        if not query:
+            # every term has the maximum score
+            return self._collect(candidates, limit)
+
+        lower_query = query.lower()
+        bounded = sorted(
+            (-score_upper_bound(lower_query, self.lower_terms[i]), i)
+            for i in candidates
+        )
+
+        scores = list[tuple[float, int]]()
+        batch_size = limit
+        start = 0
+        while start < len(bounded):
+            for _, i in bounded[start : start + batch_size]:
+                score, indices = pfzy.fzy_scorer(query, self.terms[i])
+                if indices is not None:
+                    scores.append((-score, i))
+            start += batch_size
+            batch_size *= 2
+
+            if start < len(bounded):
+                scores.sort()
+                threshold = self._limit_score(scores, limit)
+                # bounds are negated, so this means next bound < threshold
+                if threshold is not None and -bounded[start][0] < threshold:
+                    break
+
+        scores.sort()
+        return self._collect((i for _, i in scores), limit)
+
+    def find_candidates(
+        self,
+        query: str,
+        within: Iterable[int] | None = None,
+    ) -> list[int]:
+        """Returns the indices of all terms containing `query` as a case-insensitive
+        subsequence, in ascending order.
+
+        If `within` is given, only those indices are checked. Any term matching a query
+        also matches every prefix of that query, so the candidates for a prefix can be
+        reused as `within` when the query is extended.
+        """
+
+        lower_query = query.lower()
+
+        if within is None:
+            if not lower_query:
+                return list(range(len(self)))
+
+            bitset = -1
+            for c in set(lower_query):
+                bitset &= self.char_bitsets.get(c, 0)
+                if not bitset:
+                    return []
+            within = iter_bits(bitset)
+
+        lower_terms = self.lower_terms
+        return [i for i in within if is_subsequence(lower_query, lower_terms[i])]
+
+    def _limit_score(
+        self,
+        scores: list[tuple[float, int]],
+        limit: int,
+    ) -> float | None:
+        """Returns the score of the `limit`-th distinct name in `scores`, or None if
+        there aren't enough distinct names yet."""
+        seen = set[int]()
+        for score, i in scores:
+            seen.add(self.name_ids[i])
+            if len(seen) >= limit:
+                return -score
+        return None
+
+    def _collect(self, ranked: Iterable[int], limit: int) -> list[AutocompleteWord]:
+        results = list[AutocompleteWord]()
+        seen = set[int]()
+        for i in ranked:
+            name_id = self.name_ids[i]
+            if name_id in seen:
+                continue
+            seen.add(name_id)
+            results.append(
+                AutocompleteWord(
+                    search_term=self.terms[i],
+                    name=self.names[name_id],
+                    value=self.values[i],
+                )
+            )
+            if len(results) >= limit:
+                break
+        return results
+
+
+class AutocompleteSessionCache[K: Hashable]:
+    """Remembers the candidates for each user's last autocomplete query.
+
+    Discord sends a new autocomplete request for every character typed, and most
+    queries extend the previous one. Since a term matching the new query must also
+    match the old one, the previous candidates can be filtered instead of searching
+    the whole index again.
+
+    Sessions expire after `ttl` without being used. At most `max_size` sessions are
+    kept; the least recently used ones are dropped first.
+    """
+
+    def __init__(self, ttl: timedelta, max_size: int):
+        self.ttl = ttl.total_seconds()
+        self.max_size = max_size
+        self._sessions = dict[K, _AutocompleteSession]()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def search(
+        self,
+        key: K,
+        index: AutocompleteIndex,
+        query: str,
+        limit: int = MAX_AUTOCOMPLETE_CHOICES,
+    ) -> list[AutocompleteWord]:
+        now = time.monotonic()
+        lower_query = query.lower()
+
+        # pop and reinsert to keep the dict in least recently used order
+        session = self._sessions.pop(key, None)
+        if (
+            session is not None
+            and session.expires_at > now
+            and session.index is index
+            and lower_query.startswith(session.query)
+        ):
+            candidates = index.find_candidates(query, within=session.candidates)
+        else:
+            candidates = index.find_candidates(query)
+
+        self._sessions[key] = _AutocompleteSession(
+            index=index,
+            query=lower_query,
+            candidates=candidates,
+            expires_at=now + self.ttl,
+        )
+        self._evict(now)
+
+        return index.search(query, limit, candidates=candidates)
+
+    def _evict(self, now: float):
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if session.expires_at > now and len(self._sessions) <= self.max_size:
+                break
+            del self._sessions[key]
+
+
+@dataclass
+class _AutocompleteSession:
+    index: AutocompleteIndex
+    query: str
+    candidates: list[int]
+    expires_at: float
+
+
+@dataclass
+class AutocompleteIndexes:
+    """All of the autocomplete indexes for a registry, built once on startup."""
+
+    mod_authors: AutocompleteIndex
+    mods: AutocompleteIndex
+    patterns: AutocompleteIndex
+    special_handlers: AutocompleteIndex
+    categories: AutocompleteIndex
+    entries: AutocompleteIndex
+    pages: AutocompleteIndex
+    recipes: AutocompleteIndex
+
+    authors: dict[str, UserInfo]
+    """Mod authors by lowercased name."""
+
+    @classmethod
+    def build(cls, registry: HexBugRegistry) -> Self:
+        authors = dict[str, UserInfo]()
+        for mod in registry.mods.values():
+            authors[mod.source.author.name.lower().strip()] = mod.source.author
+
+        return cls(
+            mod_authors=AutocompleteIndex(
+                sorted(
+                    (
+                        AutocompleteWord(
+                            search_term=author.name,
+                            name=author.name,
+                            value=author.name,
+                        )
+                        for mod in registry.mods.values()
+                        for author in [mod.source.author]
+                    ),
+                    key=_sort_key,
+                )
+            ),
+            mods=AutocompleteIndex(
+                AutocompleteWord(
+                    search_term=search_term,
+                    name=mod.name,
+                    value=mod.id,
+                )
+                for mod in registry.mods.values()
+                for search_term in [
+                    mod.name,
+                    mod.id,
+                    mod.source.search_term,
+                ]
+            ),
+            patterns=AutocompleteIndex(
+                sorted(
+                    (
+                        AutocompleteWord(
+                            search_term=search_term,
+                            name=pattern.name,
+                            value=str(pattern.id),
+                        )
+                        for pattern in registry.patterns.values()
+                        if not pattern.is_hidden
+                        for search_term in [
+                            pattern.name,
+                            str(pattern.id),
+                        ]
+                    ),
+                    key=_sort_key,
+                )
+            ),
+            special_handlers=AutocompleteIndex(
+                sorted(
+                    (
+                        AutocompleteWord(
+                            search_term=search_term,
+                            name=info.base_name,
+                            value=str(info.id),
+                        )
+                        for info in registry.special_handlers.values()
+                        if SPECIAL_HANDLERS[info.id].supports_generate_pattern
+                        for search_term in [
+                            info.base_name,
+                            str(info.id),
+                        ]
+                    ),
+                    key=_sort_key,
+                )
+            ),
+            categories=AutocompleteIndex(
+                sorted(
+                    (
+                        AutocompleteWord(
+                            search_term=search_term,
+                            name=category.name,
+                            value=str(category.id),
+                        )
+                        for category in registry.categories.values()
+                        for search_term in [
+                            category.name,
+                            str(category.id),
+                        ]
+                    ),
+                    key=_sort_key,
+                )
+            ),
+            entries=AutocompleteIndex(
+                sorted(
+                    (
+                        AutocompleteWord(
+                            search_term=search_term,
+                            name=entry.name,
+                            value=str(entry.id),
+                        )
+                        for entry in registry.entries.values()
+                        for search_term in [
+                            entry.name,
+                            str(entry.id),
+                            str(entry.category_id),
+                        ]
+                    ),
+                    key=_sort_key,
+                )
+            ),
+            pages=AutocompleteIndex(
+                sorted(
+                    (
+                        AutocompleteWord(
+                            search_term=search_term,
+                            name=name,
+                            value=str(page.key),
+                        )
+                        for page in registry.pages.values()
+                        for name in [
+                            truncate_str(
+                                f"{page.title} ({registry.entries[page.entry_id].name})",
+                                100,
+                            )
+                        ]
+                        for search_term in [
+                            name,
+                            page.anchor,
+                            page.key,
+                            str(page.entry_id),
+                        ]
+                    ),
+                    key=_sort_key,
+                )
+            ),
+            recipes=AutocompleteIndex(
+                sorted(
+                    (
+                        AutocompleteWord(
+                            search_term=search_term,
+                            name=recipe.name,
+                            value=str(recipe_id),
+                        )
+                        for recipe_id, recipes in registry.recipes.items()
+                        for recipe in recipes
+                        for search_term in [
+                            recipe.name,
+                            str(recipe_id),
+                        ]
+                    ),
+                    key=_sort_key,
+                )
+            ),
+            authors=authors,
+        )
+
+
+def iter_bits(bitset: int) -> Iterator[int]:
+    """Yields the indices of the set bits in `bitset`, from lowest to highest."""
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+
+def score_upper_bound(lower_needle: str, lower_haystack: str) -> float:
+    """Returns an upper bound for `pfzy.fzy_scorer(needle, haystack)`.
+
+    Assumes `lower_needle` is a non-empty subsequence of `lower_haystack`. The first
+    matched character scores at most the largest bonus, each later one scores at most
+    `SCORE_MATCH_CONSECUTIVE` (or a bonus, if it isn't consecutive), and every unmatched
+    character in the haystack costs at least one leading/trailing gap penalty, or an
+    inner gap penalty if it's between two matches.
+    """
+    needle_len = len(lower_needle)
+    haystack_len = len(lower_haystack)
+    if needle_len == haystack_len:
+        return SCORE_MAX
+
+    bound = (
+        _MAX_BONUS
+        + (needle_len - 1) * SCORE_MATCH_CONSECUTIVE
+        + (haystack_len - needle_len) * SCORE_GAP_TRAILING
+    )
+    if lower_needle not in lower_haystack:
+        # at least one match isn't consecutive, so there's at least one inner gap
+        bound += (
+            _MAX_BONUS - SCORE_MATCH_CONSECUTIVE + SCORE_GAP_INNER - SCORE_GAP_TRAILING
+        )
+    # make sure floating point error can't push a real score above the bound
+    return bound + 1e-9
+
+
+def is_subsequence(needle: str, haystack: str) -> bool:
+    offset = 0
+    for c in needle:
+        offset = haystack.find(c, offset) + 1
+        if offset <= 0:
+            return False
+    return True
+
+
+def _sort_key(word: AutocompleteWord):
+    return word["name"].lower()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Iterable
+
+import regex
+from hexdoc.core import ResourceLocation
+
+from HexBug.data.patterns import PatternInfo
+
+
+@dataclass
+class RegexScanResult:
+    matches: list[ResourceLocation]
+    """Ids of the patterns whose signatures fully matched the regex."""
+    completed: bool
+    """False if the scan hit its deadline before checking every signature."""
+    checked: int
+    """The number of signatures that were checked."""
+    total: int
+    elapsed: float
+
+
+class RegexConflictScanner:
+    """Finds every pattern whose signature fully matches a regular expression.
+
+    The signatures are stored in one newline-separated buffer, and the regex is wrapped
+    in multiline anchors, so a single series of searches over the buffer tests all of
+    them. This is much faster than calling `fullmatch` on each signature, and the
+    `regex` module releases the GIL while searching, so `scan` can be run in a thread.
+
+    Anchors like `\\A` and `\\Z` would only match at the ends of the buffer, so regexes
+    that use them are checked against each signature separately instead.
+    """
+
+    def __init__(self, patterns: Iterable[PatternInfo]):
+        self.ids = list[ResourceLocation]()
+        self.signatures = list[str]()
+        for info in patterns:
+            self.ids.append(info.id)
+            self.signatures.append(info.signature)
+
+        self.buffer = "\n".join(self.signatures)
+        self.line_starts = list[int]()
+        position = 0
+        for signature in self.signatures:
+            self.line_starts.append(position)
+            position += len(signature) + 1
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+    def scan(self, pattern: str, *, timeout: float) -> RegexScanResult:
+        """Scans all signatures, stopping after `timeout` seconds.
+
+        Raises `regex.error` if `pattern` is invalid.
+        """
+        line_pattern = regex.compile(pattern)
+
+        start = time.perf_counter()
+        deadline = start + timeout
+
+        if _has_absolute_anchors(pattern):
+            return self._scan_each(line_pattern, start, deadline)
+
+        buffer_pattern = regex.compile(rf"^(?:{pattern})$", regex.MULTILINE)
+        matches = list[ResourceLocation]()
+        position = 0
+        completed = True
+
+        try:
+            while self.ids and position <= len(self.buffer):
+                match = buffer_pattern.search(
+                    self.buffer,
+                    pos=position,
+                    concurrent=True,
+                    timeout=_remaining(deadline),
+                )
+                if match is None:
+                    position = len(self.buffer) + 1
+                    break
+
+                index = bisect_right(self.line_starts, match.start()) - 1
+                line_start = self.line_starts[index]
+                if index + 1 < len(self.line_starts):
+                    line_end = self.line_starts[index + 1] - 1
+                else:
+                    line_end = len(self.buffer)
+
+                # patterns like [^q]* can match across several lines, so check this one
+                # on its own; any earlier lines can't match, or search would have
+                # returned them first
+                if match.end() <= line_end or line_pattern.fullmatch(
+                    self.buffer,
+                    pos=line_start,
+                    endpos=line_end,
+                    concurrent=True,
+                    timeout=_remaining(deadline),
+                ):
+                    matches.append(self.ids[index])
+
+                position = line_end + 1
+        except TimeoutError:
+            completed = False
+
+        return RegexScanResult(
+            matches=matches,
+            completed=completed,
+            checked=bisect_left(self.line_starts, position),
+            total=self.total,
+            elapsed=time.perf_counter() - start,
+        )
+
+    def _scan_each(
+        self,
+        pattern: regex.Pattern[str],
+        start: float,
+        deadline: float,
+    ) -> RegexScanResult:
+        matches = list[ResourceLocation]()
+        checked = 0
+        completed = True
+
+        try:
+            for pattern_id, signature in zip(self.ids, self.signatures):
+                if pattern.fullmatch(
+                    signature,
+                    concurrent=True,
+                    timeout=_remaining(deadline),
+                ):
+                    matches.append(pattern_id)
+                checked += 1
+        except TimeoutError:
+            completed = False
+
+        return RegexScanResult(
+            matches=matches,
+            completed=completed,
+            checked=checked,
+            total=self.total,
+            elapsed=time.perf_counter() - start,
+        )
+
+
+def _has_absolute_anchors(pattern: str) -> bool:
+    """Returns True if `pattern` might contain an anchor that matches relative to the
+    whole string or the search position, rather than the current line.
+
+    This can have false positives (eg. inside character classes), which are harmless.
+    """
+    escaped = False
+    for char in pattern:
+        if escaped:
+            if char in "AZzG":
+                return True
+            escaped = False
+        elif char == "\\":
+            escaped = True
+    return False
+
+
+def _remaining(deadline: float) -> float:
+    remaining = deadline - time.perf_counter()
+    if remaining <= 0:
+        raise TimeoutError
+    return remaining
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO, TextIOWrapper
+from typing import override
+
+from hexdoc.core import ResourceLocation
+from lark import LarkError
+
+from HexBug.data.parsers.pretty_print import IotaPrinter
+from HexBug.data.parsers.reveal import parse_reveal
+from HexBug.data.registry import HexBugRegistry
+from HexBug.utils.matching import GuildPatternMatcher
+
+logger = logging.getLogger(__name__)
+
+_worker_printer: IotaPrinter | None = None
+
+
+class DecodeParseError(Exception):
+    """Raised when the input to `decode_reveal` fails to parse.
+
+    Lark's exceptions can't always be pickled, so this carries the formatted message
+    back from worker processes instead.
+    """
+
+
+class DecodeTimeoutError(Exception):
+    """Raised when a worker takes longer than the pool's timeout to decode an input."""
+
+
+@dataclass
+class DecodeResult:
+    preview: str
+    """The first `preview_length` or more characters of the output."""
+    length: int
+    """The total length of the output, in characters."""
+    contents: bytes
+    """The full output, encoded as UTF-8."""
+
+
+def decode_reveal(
+    printer: IotaPrinter,
+    text: str,
+    *,
+    indent: str,
+    flatten_list: bool,
+    preview_length: int,
+) -> DecodeResult:
+    """Parses and pretty prints a Reveal output."""
+    try:
+        iota = parse_reveal(text, validate=False)
+    except LarkError as e:
+        raise DecodeParseError(str(e)) from None
+
+    output = DecodeOutput(preview_length=preview_length)
+    printer.write_pretty_print(
+        output,
+        iota,
+        indent=indent,
+        flatten_list=flatten_list,
+    )
+    return DecodeResult(
+        preview=output.preview,
+        length=output.length,
+        contents=output.getvalue(),
+    )
+
+
+class DecodePool:
+    """Runs `decode_reveal` in worker processes, so large inputs don't block the event
+    loop while Lark is running.
+
+    Inputs shorter than `min_worker_length` are decoded in the current process, since
+    the overhead of sending them to a worker outweighs the parse time.
+
+    `start` must be called before decoding any large inputs. If a worker takes longer
+    than `timeout` seconds, the pool is replaced with a new one.
+    """
+
+    def __init__(
+        self,
+        printer: IotaPrinter,
+        *,
+        max_workers: int,
+        min_worker_length: int,
+        timeout: float,
+    ):
+        self.printer = printer
+        self.max_workers = max_workers
+        self.min_worker_length = min_worker_length
+        self.timeout = timeout
+        self._registry_json: str | None = None
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def start(self):
+        """Serializes the registry for the workers and starts them in the background,
+        so the first large input doesn't have to wait for them."""
+        self._registry_json = await asyncio.to_thread(
+            self.printer.registry.model_dump_json,
+            round_trip=True,
+        )
+        self._get_executor()
+
+    async def decode(
+        self,
+        text: str,
+        *,
+        indent: str,
+        flatten_list: bool,
+        preview_length: int,
+        matcher: GuildPatternMatcher | None = None,
+    ) -> DecodeResult:
+        if len(text) < self.min_worker_length:
+            return decode_reveal(
+                self.printer.with_matcher(matcher) if matcher else self.printer,
+                text,
+                indent=indent,
+                flatten_list=flatten_list,
+                preview_length=preview_length,
+            )
+
+        executor = self._get_executor()
+        future = asyncio.get_running_loop().run_in_executor(
+            executor,
+            _decode_in_worker,
+            text,
+            indent,
+            flatten_list,
+            preview_length,
+            # the workers have their own copy of the registry
+            dict(matcher.signatures) if matcher else None,
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except TimeoutError:
+            # the worker is still busy, so the only way to free it is to kill it
+            logger.warning(f"Decode timed out after {self.timeout} seconds")
+            self._recycle(executor)
+            raise DecodeTimeoutError(
+                f"Decoding took longer than {self.timeout} seconds."
+            ) from None
+        except BrokenProcessPool:
+            # start a new pool for the next request
+            self._recycle(executor)
+            raise
+
+    def shutdown(self):
+        if executor := self._executor:
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            assert self._registry_json is not None, "DecodePool was not started"
+            logger.info(f"Starting decode pool with {self.max_workers} workers")
+            executor = self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # forking a process with a running event loop is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._registry_json,),
+            )
+            # workers are spawned on demand, so submit one task for each of them
+            for _ in range(self.max_workers):
+                executor.submit(_warm_up_worker)
+        return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        if self._executor is executor:
+            self._executor = None
+
+        # shutdown doesn't stop running tasks, and ProcessPoolExecutor.terminate_workers
+        # was only added in Python 3.14
+        processes = list((executor._processes or {}).values())  # pyright: ignore[reportPrivateUsage]
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+
+def _init_worker(registry_json: str):
+    global _worker_printer
+    _worker_printer = IotaPrinter(HexBugRegistry.model_validate_json(registry_json))
+
+
+def _warm_up_worker():
+    pass
+
+
+def _decode_in_worker(
+    text: str,
+    indent: str,
+    flatten_list: bool,
+    preview_length: int,
+    signatures: dict[str, ResourceLocation] | None,
+) -> DecodeResult:
+    assert _worker_printer is not None, "Decode worker was not initialized"
+    printer = _worker_printer
+    if signatures:
+        printer = printer.with_matcher(
+            GuildPatternMatcher(printer.registry, signatures)
+        )
+    return decode_reveal(
+        printer,
+        text,
+        indent=indent,
+        flatten_list=flatten_list,
+        preview_length=preview_length,
+    )
+
+
+class DecodeOutput(TextIOWrapper):
+    """Text stream that encodes everything written to it into an in-memory attachment,
+    while also keeping the first `preview_length` or more characters as a string."""
+
+    def __init__(self, preview_length: int):
+        super().__init__(BytesIO(), encoding="utf-8", newline="")
+        self.length = 0
+        self._preview_length = preview_length
+        self._preview_chunks = list[str]()
+
+    @property
+    def preview(self) -> str:
+        return "".join(self._preview_chunks)
+
+    def getvalue(self) -> bytes:
+        self.flush()
+        buffer = self.buffer
+        assert isinstance(buffer, BytesIO)
+        return buffer.getvalue()
+
+    @override
+    def write(self, s: str, /) -> int:
+        if self.length < self._preview_length:
+            self._preview_chunks.append(s)
+        self.length += len(s)
+        return super().write(s)
@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from typing import Any, Callable
+from typing import Any, Callable, cast
 
 from discord import (
     Interaction,
@@ -24,6 +24,24 @@ def get_command(interaction: Interaction) -> AnyCommand | None:
             pass
 
 
+def get_qualified_name(interaction: Interaction) -> str | None:
+    """Returns the qualified name of an application command interaction's command.
+
+    Unlike `interaction.command`, this is available before the command is resolved.
+    """
+    data = cast(dict[str, Any], interaction.data or {})
+    if not (name := data.get("name")):
+        return None
+
+    parts = [name]
+    options = cast(list[dict[str, Any]], data.get("options", []))
+    # SUB_COMMAND or SUB_COMMAND_GROUP
+    while options and options[0].get("type") in (1, 2):
+        parts.append(options[0]["name"])
+        options = options[0].get("options", [])
+    return " ".join(parts)
+
+
 def print_command(
     interaction: Interaction,
     command: AnyCommand,
@@ -1,8 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Any, Iterator, TypedDict, cast, override
+from datetime import timedelta
+from typing import Any, cast, override
 
-import pfzy
-import sqlalchemy as sa
 from discord import Interaction
 from discord.app_commands import (
     Transform,
@@ -20,33 +19,27 @@ from HexBug.data.mods import ModInfo, Modloader
 from HexBug.data.patterns import PatternInfo
 from HexBug.data.sources import UserInfo
 from HexBug.data.special_handlers import SpecialHandlerInfo
-from HexBug.data.static_data import SPECIAL_HANDLERS
 from HexBug.db.models import PerWorldPattern
-from HexBug.utils.strings import truncate_str
-
-
-class AutocompleteWord(TypedDict):
-    search_term: str
-    name: str
-    value: str
-
+from HexBug.utils.autocomplete import (
+    AutocompleteIndex,
+    AutocompleteSessionCache,
+    AutocompleteWord,
+)
+from HexBug.utils.tracing import span
 
-class AutocompleteResult(AutocompleteWord):
-    indices: list[int]
+type AutocompleteSessionKey = tuple[int, str, str]
+"""User id, qualified command name, option name."""
 
 
 class PfzyAutocompleteTransformer(Transformer, ABC):
-    def __init_subclass__(cls):
-        cls._words: list[AutocompleteWord] = []
+    _sessions = AutocompleteSessionCache[AutocompleteSessionKey](
+        ttl=timedelta(seconds=30),
+        max_size=10_000,
+    )
 
     @abstractmethod
-    async def _setup_autocomplete(self, interaction: Interaction) -> None:
-        """Adds values to self._words."""
-
-    async def _get_words(self, interaction: Interaction) -> list[AutocompleteWord]:
-        if not self._words:
-            await self._setup_autocomplete(interaction)
-        return self._words
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        """Returns the index to search for autocomplete suggestions."""
 
     @override
     async def autocomplete(  # pyright: ignore[reportIncompatibleMethodOverride]
@@ -54,60 +47,40 @@ class PfzyAutocompleteTransformer(Transformer, ABC):
         interaction: Interaction,
         value: str,
     ) -> list[Choice[str]]:
-        matches = await pfzy.fuzzy_match(
-            value,
-            await self._get_words(interaction),  # pyright: ignore[reportArgumentType]
-            scorer=pfzy.fzy_scorer,
-            key="search_term",
+        index = await self._get_index(interaction)
+        key = (
+            interaction.user.id,
+            interaction.command.qualified_name if interaction.command else "",
+            _get_focused_option_name(interaction) or "",
         )
+        with span("autocomplete"):
+            words = self._sessions.search(key, index, value)
+        return [Choice(name=word["name"], value=word["value"]) for word in words]
 
-        return list(self._process_matches(cast(list[AutocompleteResult], matches)))
 
-    def _preprocess_input(self, text: str) -> str:
-        return text.lower().strip()
-
-    def _process_matches(
-        self,
-        matches: list[AutocompleteResult],
-    ) -> Iterator[Choice[str]]:
-        seen = set[str]()
-        for match in matches:
-            if match["name"] in seen:
-                continue
-            seen.add(match["name"])
-            yield Choice(name=match["name"], value=match["value"])
-            if len(seen) >= 25:
-                break
+def _get_focused_option_name(interaction: Interaction) -> str | None:
+    options = cast(list[dict[str, Any]], (interaction.data or {}).get("options", []))
+    while options:
+        for option in options:
+            if option.get("focused"):
+                return option["name"]
+        # descend into subcommands and subcommand groups
+        options = [child for option in options for child in option.get("options", [])]
+    return None
 
 
 class ModAuthorTransformer(PfzyAutocompleteTransformer):
-    _authors: dict[str, UserInfo] = {}
-
     @override
     async def transform(self, interaction: Interaction, value: str) -> UserInfo:
-        author = self._authors.get(value.lower().strip())
+        authors = HexBugBot.of(interaction).autocomplete.authors
+        author = authors.get(value.lower().strip())
         if author is None:
             raise ValueError("Unknown author.")
         return author
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-        self._authors.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for mod in registry.mods.values():
-            author = mod.source.author
-            self._words.append(
-                AutocompleteWord(
-                    search_term=author.name,
-                    name=author.name,
-                    value=author.name,
-                )
-            )
-            self._authors[author.name.lower().strip()] = author
-
-        self._words.sort(key=lambda w: w["name"].lower())
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.mod_authors
 
 
 class ModInfoTransformer(PfzyAutocompleteTransformer):
@@ -120,23 +93,8 @@ class ModInfoTransformer(PfzyAutocompleteTransformer):
         return mod
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for mod in registry.mods.values():
-            for search_term in [
-                mod.name,
-                mod.id,
-                mod.source.search_term,
-            ]:
-                self._words.append(
-                    AutocompleteWord(
-                        search_term=search_term,
-                        name=mod.name,
-                        value=mod.id,
-                    )
-                )
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.mods
 
 
 class PatternInfoTransformer(PfzyAutocompleteTransformer):
@@ -150,26 +108,8 @@ class PatternInfoTransformer(PfzyAutocompleteTransformer):
         return pattern
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for pattern in registry.patterns.values():
-            if pattern.is_hidden:
-                continue
-            for search_term in [
-                pattern.name,
-                str(pattern.id),
-            ]:
-                self._words.append(
-                    AutocompleteWord(
-                        search_term=search_term,
-                        name=pattern.name,
-                        value=str(pattern.id),
-                    )
-                )
-
-        self._words.sort(key=lambda w: w["name"].lower())
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.patterns
 
 
 class SpecialHandlerInfoTransformer(PfzyAutocompleteTransformer):
@@ -187,26 +127,8 @@ class SpecialHandlerInfoTransformer(PfzyAutocompleteTransformer):
         return info
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for info in registry.special_handlers.values():
-            if not SPECIAL_HANDLERS[info.id].supports_generate_pattern:
-                continue
-            for search_term in [
-                info.base_name,
-                str(info.id),
-            ]:
-                self._words.append(
-                    AutocompleteWord(
-                        search_term=search_term,
-                        name=info.base_name,
-                        value=str(info.id),
-                    )
-                )
-
-        self._words.sort(key=lambda w: w["name"].lower())
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.special_handlers
 
 
 class PerWorldPatternTransformer(PfzyAutocompleteTransformer):
@@ -224,66 +146,55 @@ class PerWorldPatternTransformer(PfzyAutocompleteTransformer):
         id_ = ResourceLocation.from_str(value)
         bot = HexBugBot.of(interaction)
 
-        async with bot.db_session() as session:
-            stmt = (
-                sa.select(PerWorldPattern)
-                .where(PerWorldPattern.id == id_)
-                .where(PerWorldPattern.guild_id == interaction.guild_id)
+        guild = await bot.per_world_patterns.get(interaction.guild_id)
+        result = guild.by_id.get(id_)
+        if result is None:
+            raise ValueError(
+                "Pattern has not been added to this server's database."
+                if id_ in bot.registry.patterns
+                else "Pattern not found."
             )
-
-            result = await session.scalar(stmt)
-            if result is None:
-                raise ValueError(
-                    "Pattern has not been added to this server's database."
-                    if id_ in bot.registry.patterns
-                    else "Pattern not found."
-                )
-            return result
+        return result
 
     @override
-    async def _get_words(self, interaction: Interaction) -> list[AutocompleteWord]:
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
         if not interaction.guild_id:
-            return []
+            return AutocompleteIndex([])
 
         bot = HexBugBot.of(interaction)
+        guild = await bot.per_world_patterns.get(interaction.guild_id)
+        user_id = interaction.user.id if self.autocomplete_filter_user else None
+
+        if index := guild.autocomplete_indexes.get(user_id):
+            return index
 
-        # TODO: this feels inefficient
         words = list[AutocompleteWord]()
-        async with bot.db_session() as session:
-            stmt = sa.select(PerWorldPattern).where(
-                PerWorldPattern.guild_id == interaction.guild_id
-            )
-            if self.autocomplete_filter_user:
-                stmt = stmt.where(PerWorldPattern.user_id == interaction.user.id)
-
-            for entry in await session.scalars(stmt):
-                if info := bot.registry.patterns.get(entry.id):
-                    if info.is_hidden:
-                        continue
-                    for search_term in [
-                        info.name,
-                        str(info.id),
-                    ]:
-                        words.append(
-                            AutocompleteWord(
-                                search_term=search_term,
-                                name=info.name,
-                                value=str(entry.id),
-                            )
-                        )
-                else:
+        for entry in guild.filter_user(user_id):
+            if info := bot.registry.patterns.get(entry.id):
+                if info.is_hidden:
+                    continue
+                for search_term in [
+                    info.name,
+                    str(info.id),
+                ]:
                     words.append(
                         AutocompleteWord(
-                            search_term=str(entry.id),
-                            name=str(entry.id),
+                            search_term=search_term,
+                            name=info.name,
                             value=str(entry.id),
                         )
                     )
-        return words
+            else:
+                words.append(
+                    AutocompleteWord(
+                        search_term=str(entry.id),
+                        name=str(entry.id),
+                        value=str(entry.id),
+                    )
+                )
 
-    @override
-    async def _setup_autocomplete(self, interaction: Interaction) -> None:
-        raise NotImplementedError()
+        index = guild.autocomplete_indexes[user_id] = AutocompleteIndex(words)
+        return index
 
 
 class CategoryInfoTransformer(PfzyAutocompleteTransformer):
@@ -296,24 +207,8 @@ class CategoryInfoTransformer(PfzyAutocompleteTransformer):
         return category
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for category in registry.categories.values():
-            for search_term in [
-                category.name,
-                str(category.id),
-            ]:
-                self._words.append(
-                    AutocompleteWord(
-                        search_term=search_term,
-                        name=category.name,
-                        value=str(category.id),
-                    )
-                )
-
-        self._words.sort(key=lambda w: w["name"].lower())
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.categories
 
 
 class EntryInfoTransformer(PfzyAutocompleteTransformer):
@@ -326,25 +221,8 @@ class EntryInfoTransformer(PfzyAutocompleteTransformer):
         return entry
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for entry in registry.entries.values():
-            for search_term in [
-                entry.name,
-                str(entry.id),
-                str(entry.category_id),
-            ]:
-                self._words.append(
-                    AutocompleteWord(
-                        search_term=search_term,
-                        name=entry.name,
-                        value=str(entry.id),
-                    )
-                )
-
-        self._words.sort(key=lambda w: w["name"].lower())
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.entries
 
 
 class PageInfoTransformer(PfzyAutocompleteTransformer):
@@ -356,29 +234,8 @@ class PageInfoTransformer(PfzyAutocompleteTransformer):
         return page
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for page in registry.pages.values():
-            name = truncate_str(
-                f"{page.title} ({registry.entries[page.entry_id].name})", 100
-            )
-            for search_term in [
-                name,
-                page.anchor,
-                page.key,
-                str(page.entry_id),
-            ]:
-                self._words.append(
-                    AutocompleteWord(
-                        search_term=search_term,
-                        name=name,
-                        value=str(page.key),
-                    )
-                )
-
-        self._words.sort(key=lambda w: w["name"].lower())
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.pages
 
 
 class RecipeInfoTransformer(PfzyAutocompleteTransformer):
@@ -391,25 +248,8 @@ class RecipeInfoTransformer(PfzyAutocompleteTransformer):
         return recipe
 
     @override
-    async def _setup_autocomplete(self, interaction: Interaction):
-        self._words.clear()
-
-        registry = HexBugBot.registry_of(interaction)
-        for recipe_id, recipes in registry.recipes.items():
-            for recipe in recipes:
-                for search_term in [
-                    recipe.name,
-                    str(recipe_id),
-                ]:
-                    self._words.append(
-                        AutocompleteWord(
-                            search_term=search_term,
-                            name=recipe.name,
-                            value=str(recipe_id),
-                        )
-                    )
-
-        self._words.sort(key=lambda w: w["name"].lower())
+    async def _get_index(self, interaction: Interaction) -> AutocompleteIndex:
+        return HexBugBot.of(interaction).autocomplete.recipes
 
 
 class PatternSignatureTransformer(Transformer):
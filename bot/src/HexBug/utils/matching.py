@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import Mapping, overload
+
+from hexdoc.core import ResourceLocation
+
+from HexBug.data.hex_math import HexDir, HexPattern
+from HexBug.data.patterns import PatternInfo
+from HexBug.data.registry import HexBugRegistry, PatternMatchResult
+
+
+class GuildPatternMatcher:
+    """Matches patterns using the per-world patterns that have been added to a guild,
+    falling back to the registry.
+
+    The registry can only tell that a pattern has the same shape as a per-world pattern,
+    so a guild's stored signatures are checked first to find the exact stroke order. If
+    a guild has added a per-world pattern, other stroke orders with the same shape don't
+    match it.
+
+    This only holds plain data, so it can be sent to the `/decode` worker processes.
+    """
+
+    def __init__(
+        self,
+        registry: HexBugRegistry,
+        signatures: Mapping[str, ResourceLocation],
+    ):
+        self.registry = registry
+        self.signatures = signatures
+        """Map from per-world pattern signature to pattern id."""
+        self.ids = frozenset(signatures.values())
+
+    @overload
+    def try_match_pattern(
+        self,
+        pattern: HexPattern,
+        /,
+    ) -> PatternMatchResult | None: ...
+
+    @overload
+    def try_match_pattern(
+        self,
+        direction: HexDir,
+        signature: str,
+        /,
+    ) -> PatternMatchResult | None: ...
+
+    def try_match_pattern(
+        self,
+        direction_or_pattern: HexDir | HexPattern,
+        signature: str | None = None,
+        /,
+    ) -> PatternMatchResult | None:
+        match direction_or_pattern:
+            case HexPattern() as pattern:
+                pass
+            case HexDir() as direction:
+                assert signature is not None
+                pattern = HexPattern(direction, signature)
+
+        if (pattern_id := self.signatures.get(pattern.signature)) and (
+            info := self.registry.patterns.get(pattern_id)
+        ):
+            return info
+
+        match self.registry.try_match_pattern(pattern):
+            case PatternInfo(is_per_world=True, id=pattern_id) if (
+                pattern_id in self.ids
+            ):
+                # same shape as one of this guild's patterns, but wrong stroke order
+                return None
+            case result:
+                return result
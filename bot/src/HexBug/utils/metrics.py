@@ -1,9 +1,16 @@
 from discord.ext.prometheus.prometheus_cog import METRIC_PREFIX
-from prometheus_client import Gauge, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 COMMAND_RUNTIME_HISTOGRAM = Histogram(
     METRIC_PREFIX + "command_runtime",
     "Runtime in seconds of all executed commands",
+    ["command", "interaction", "status"],
+)
+
+COMMAND_PHASE_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "command_phase",
+    "Runtime in seconds of each phase of executed commands (see HexBug.utils.tracing)",
+    ["command", "interaction", "phase"],
 )
 
 ACTIVE_COMMANDS_GAUGE = Gauge(
@@ -11,11 +18,49 @@ ACTIVE_COMMANDS_GAUGE = Gauge(
     "The number of currently active commands",
 )
 
+ACTIVE_COMMANDS_BY_NAME_GAUGE = Gauge(
+    METRIC_PREFIX + "active_commands_by_name",
+    "The number of currently active commands, by command name",
+    ["command"],
+)
+
 LONGEST_ACTIVE_COMMAND_RUNTIME_GAUGE = Gauge(
     METRIC_PREFIX + "longest_active_command_runtime",
     "The longest runtime in seconds of any currently active command",
 )
 
+DB_POOL_CHECKOUT_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "db_pool_checkout",
+    "Time in seconds spent waiting to check out a database connection",
+)
+
+DB_POOL_CHECKED_OUT_GAUGE = Gauge(
+    METRIC_PREFIX + "db_pool_checked_out",
+    "The number of database connections currently checked out of the pool",
+)
+
+DB_POOL_SATURATION_GAUGE = Gauge(
+    METRIC_PREFIX + "db_pool_saturation",
+    "The fraction of the database pool's maximum capacity currently checked out",
+)
+
+DB_QUERY_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "db_query",
+    "Runtime in seconds of database queries",
+    ["statement"],
+)
+
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    METRIC_PREFIX + "event_loop_lag",
+    "Delay in seconds between when the watchdog's callback was scheduled and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+EVENT_LOOP_BLOCKED_COUNTER = Counter(
+    METRIC_PREFIX + "event_loop_blocked",
+    "The number of times the event loop was blocked for longer than the threshold",
+)
+
 APPROX_GUILD_GAUGE = Gauge(
     METRIC_PREFIX + "stat_approx_guilds",
     "The approximate count of the guilds the bot was added to",
@@ -1,12 +1,22 @@
+import json
+from typing import Iterator
+
 from discord import Interaction
 from hexdoc.core import ResourceLocation
+from lark import LarkError
 from psycopg.errors import UniqueViolation
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from sqlalchemy.exc import IntegrityError
 
 from HexBug.core.bot import HexBugBot
 from HexBug.core.exceptions import InvalidInputError
-from HexBug.data.hex_math import HexPattern
+from HexBug.data.hex_math import HexDir, HexPattern, PatternSignature
+from HexBug.data.parsers.ast import BubbleIota, Iota, ListIota, PatternIota
+from HexBug.data.parsers.fast_ast import FastIota, FastPatternIota
+from HexBug.data.parsers.reveal import parse_reveal
 from HexBug.data.patterns import PatternInfo
+from HexBug.data.registry import HexBugRegistry
+from HexBug.data.special_handlers import SpecialHandlerMatch
 from HexBug.db.models import PerWorldPattern
 from HexBug.ui.views.patterns import PerWorldPatternView
 from HexBug.utils.discord.translation import translate
@@ -24,16 +34,15 @@ async def add_per_world_pattern(
 
     # insert the pattern
     try:
-        async with bot.db_session() as session, session.begin():
-            session.add(
-                PerWorldPattern(
-                    id=pattern_id,
-                    guild_id=interaction.guild_id,
-                    user_id=interaction.user.id,
-                    direction=pattern.direction,
-                    signature=pattern.signature,
-                )
+        await bot.per_world_patterns.add(
+            PerWorldPattern(
+                id=pattern_id,
+                guild_id=interaction.guild_id,
+                user_id=interaction.user.id,
+                direction=pattern.direction,
+                signature=pattern.signature,
             )
+        )
     except IntegrityError as e:
         if isinstance(e.orig, UniqueViolation):
             raise InvalidInputError(
@@ -57,3 +66,146 @@ async def add_per_world_pattern(
         Visibility.PRIVATE,
         content=await translate(interaction, "per-world-pattern-added"),
     )
+
+
+class PerWorldPatternExport(BaseModel):
+    """The format of each pattern in `/per-world-pattern export` and
+    `/per-world-pattern-manage import`."""
+
+    id: ResourceLocation | None = None
+    direction: HexDir
+    signature: PatternSignature
+
+
+def match_per_world_pattern(
+    registry: HexBugRegistry,
+    pattern: HexPattern,
+) -> PatternInfo:
+    """Looks up a pattern in the registry, making sure it's actually per-world."""
+
+    match registry.try_match_pattern(pattern):
+        case PatternInfo(is_per_world=True, display_only=False) as info:
+            return info
+        case None:
+            raise InvalidInputError("Unknown pattern.", value=pattern.display())
+        case match:
+            raise InvalidInputError(
+                "Pattern is not per-world.",
+                value=pattern.display(),
+            ).add_field(
+                name="Pattern",
+                value=registry.display_pattern(match).name,
+            )
+
+
+def check_per_world_pattern_id(
+    registry: HexBugRegistry,
+    pattern: HexPattern,
+    pattern_id: ResourceLocation,
+) -> PatternInfo | None:
+    """Makes sure a pattern with an explicit ID doesn't conflict with the registry.
+
+    Unlike `match_per_world_pattern`, this allows patterns that aren't in the registry.
+    """
+
+    match registry.try_match_pattern(pattern):
+        case PatternInfo(is_per_world=True, display_only=False) as info:
+            if info.id != pattern_id:
+                raise InvalidInputError(
+                    "A pattern with this shape exists, but does not match the provided ID.",
+                    value=f"`{pattern_id}`",
+                ).add_field(
+                    name="Pattern",
+                    value=f"{registry.display_pattern(info).name} (`{info.id}`)",
+                )
+            return info
+
+        case PatternInfo() as info:
+            raise InvalidInputError(
+                "A pattern with this shape exists, but is not per-world.",
+                value=pattern.display(),
+            ).add_field(
+                name="Pattern",
+                value=registry.display_pattern(info).name,
+            )
+
+        # we allow special handler matches in case an addon adds a per-world pattern that conflicts with a special handler
+        # like craft phial, for instance
+        case SpecialHandlerMatch() | None:
+            if info := registry.patterns.get(pattern_id):
+                raise InvalidInputError(
+                    "A pattern with this ID exists, but does not match the provided shape.",
+                    value=pattern.display(),
+                ).add_field(
+                    name="Pattern",
+                    value=registry.display_pattern(info).name,
+                )
+            return None
+
+
+def parse_per_world_pattern_file(text: str) -> list[PerWorldPatternExport]:
+    """Parses a file in either the format written by `/per-world-pattern export`, or the
+    output of Reveal.
+
+    Patterns from Reveal don't have IDs, so they must be in the registry.
+    """
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    else:
+        try:
+            return _EXPORT_ADAPTER.validate_python(data)
+        except ValidationError as e:
+            raise InvalidInputError(
+                "Invalid per-world pattern file.", fields=[]
+            ).add_field(name="Reason", value=f"```\n{e}\n```", inline=False)
+
+    try:
+        iota = parse_reveal(text, validate=False)
+    except LarkError as e:
+        raise InvalidInputError("Failed to parse input.", fields=[]).add_field(
+            name="Reason",
+            value=f"```\n{e}\n```",
+            inline=False,
+        )
+
+    return [
+        PerWorldPatternExport(direction=pattern.direction, signature=pattern.signature)
+        for pattern in _iter_pattern_iotas(iota)
+    ]
+
+
+def iter_export_lines(entries: list[PerWorldPattern]) -> Iterator[str]:
+    """Yields a JSON array of patterns in the format read by
+    `parse_per_world_pattern_file`, with one pattern per line."""
+
+    yield "["
+    for i, entry in enumerate(entries):
+        value = PerWorldPatternExport(
+            id=entry.id,
+            direction=entry.direction,
+            signature=entry.signature,
+        ).model_dump_json()
+        yield f"  {value}," if i < len(entries) - 1 else f"  {value}"
+    yield "]"
+
+
+_EXPORT_ADAPTER = TypeAdapter(list[PerWorldPatternExport])
+
+
+def _iter_pattern_iotas(
+    iota: Iota | FastIota,
+) -> Iterator[PatternIota | FastPatternIota]:
+    stack: list[Iota | FastIota] = [iota]
+    while stack:
+        match stack.pop():
+            case PatternIota() as pattern:
+                yield pattern
+            case ListIota(values=values):
+                stack.extend(reversed(values))
+            case BubbleIota(inner=inner):
+                stack.append(inner)
+            case _:
+                pass
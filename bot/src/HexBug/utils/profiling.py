@@ -0,0 +1,181 @@
+"""In-process sampling profiler and memory snapshots for the `/debug` API endpoints."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any
+
+from HexBug.__version__ import VERSION
+
+DEFAULT_SAMPLE_INTERVAL = 0.01  # seconds
+
+type Stack = tuple[StackFrame, ...]
+
+
+@dataclass(frozen=True)
+class StackFrame:
+    name: str
+    file: str
+    line: int
+    """The first line of the function, so samples from the same function are merged."""
+
+    @classmethod
+    def from_frame(cls, frame: FrameType) -> StackFrame:
+        code = frame.f_code
+        return cls(
+            name=code.co_qualname,
+            file=code.co_filename,
+            line=code.co_firstlineno,
+        )
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.file}:{self.line})"
+
+
+@dataclass(kw_only=True)
+class Profile:
+    interval: float
+    duration: float
+    samples: dict[str, Counter[Stack]] = field(default_factory=dict)
+    """Map from thread name to the number of times each stack (root first) was seen."""
+
+    def to_collapsed(self) -> str:
+        """Formats the profile as collapsed stacks, as used by `flamegraph.pl` and
+        most other flame graph tools."""
+        lines = list[str]()
+        for thread_name, stacks in self.samples.items():
+            for stack, count in stacks.most_common():
+                path = ";".join([thread_name, *(str(frame) for frame in stack)])
+                lines.append(f"{path} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self) -> dict[str, Any]:
+        """Formats the profile as a speedscope file, with one profile per thread.
+
+        https://github.com/jlfwong/speedscope/wiki/Importing-from-custom-sources
+        """
+        frame_indexes = dict[StackFrame, int]()
+        profiles = list[dict[str, Any]]()
+
+        for thread_name, stacks in self.samples.items():
+            samples = list[list[int]]()
+            weights = list[float]()
+            for stack, count in stacks.items():
+                samples.append([
+                    frame_indexes.setdefault(frame, len(frame_indexes))
+                    for frame in stack
+                ])
+                weights.append(count * self.interval)
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"HexBug {VERSION} ({self.duration:.1f} s)",
+            "exporter": f"HexBug {VERSION}",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": frame.name, "file": frame.file, "line": frame.line}
+                    for frame in frame_indexes
+                ],
+            },
+            "profiles": profiles,
+        }
+
+
+def sample_stacks(
+    seconds: float,
+    *,
+    interval: float = DEFAULT_SAMPLE_INTERVAL,
+) -> Profile:
+    """Periodically samples the stacks of every thread except the current one.
+
+    This blocks for `seconds`, so it should be run in a separate thread (eg. with
+    `asyncio.to_thread`) to profile the event loop.
+    """
+    own_thread_id = threading.get_ident()
+    samples = defaultdict[str, Counter[Stack]](Counter)
+
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        frames = sys._current_frames()  # pyright: ignore[reportPrivateUsage]
+        for thread_id, frame in frames.items():
+            if thread_id == own_thread_id:
+                continue
+            thread_name = thread_names.get(thread_id, str(thread_id))
+            samples[thread_name][_get_stack(frame)] += 1
+        del frames
+        time.sleep(interval)
+
+    return Profile(
+        interval=interval,
+        duration=time.perf_counter() - start,
+        samples=dict(samples),
+    )
+
+
+def _get_stack(frame: FrameType | None) -> Stack:
+    stack = list[StackFrame]()
+    while frame is not None:
+        stack.append(StackFrame.from_frame(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+@dataclass
+class MemoryAllocation:
+    file: str
+    line: int
+    size: int
+    """Total size in bytes of the live allocations from this line."""
+    count: int
+
+
+@dataclass
+class MemorySnapshot:
+    current: int
+    peak: int
+    top: list[MemoryAllocation]
+
+
+def take_memory_snapshot(limit: int) -> MemorySnapshot:
+    """Returns the lines that allocated the most memory that's still alive.
+
+    `tracemalloc` must already be tracing.
+    """
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ])
+    current, peak = tracemalloc.get_traced_memory()
+    return MemorySnapshot(
+        current=current,
+        peak=peak,
+        top=[
+            MemoryAllocation(
+                file=stat.traceback[0].filename,
+                line=stat.traceback[0].lineno,
+                size=stat.size,
+                count=stat.count,
+            )
+            for stat in snapshot.statistics("lineno")[:limit]
+        ],
+    )
@@ -0,0 +1,243 @@
+"""Lightweight spans for timing the phases of a command.
+
+`HexBugCommandTree` starts a root span for every interaction. Code running inside an
+interaction can then use `span` to time individual phases:
+
+```py
+with span("render"):
+    file = render(...)
+```
+
+When the root span ends, the command runtime and the duration of each phase are
+recorded in Prometheus, labelled with the command name. Spans are also passed to any
+exporters registered with `add_span_exporter`, eg. `OTLPJSONFileExporter`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import secrets
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal, Protocol
+
+from HexBug.__version__ import VERSION
+from HexBug.utils.metrics import COMMAND_PHASE_HISTOGRAM, COMMAND_RUNTIME_HISTOGRAM
+
+logger = logging.getLogger(__name__)
+
+type SpanStatus = Literal["success", "error"]
+
+
+@dataclass(kw_only=True, eq=False)
+class Span:
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent: Span | None = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    status: SpanStatus = "success"
+    attributes: dict[str, str] = field(default_factory=dict)
+
+    _start_perf: float = field(default_factory=time.perf_counter, repr=False)
+    _children: list[Span] = field(default_factory=list, repr=False)
+
+    @property
+    def root(self) -> Span:
+        span = self
+        while span.parent:
+            span = span.parent
+        return span
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds, or the time since the span started if it's active."""
+        if self.end_ns is None:
+            return time.perf_counter() - self._start_perf
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_error(self):
+        self.status = "error"
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None:
+        """Called with all of the spans in a trace after the root span ends."""
+        ...
+
+    def shutdown(self) -> None: ...
+
+
+_current_span = ContextVar[Span | None]("current_span", default=None)
+
+_exporters = list[SpanExporter]()
+
+
+def add_span_exporter(exporter: SpanExporter):
+    _exporters.append(exporter)
+
+
+def shutdown_span_exporters():
+    while _exporters:
+        exporter = _exporters.pop()
+        try:
+            exporter.shutdown()
+        except Exception:
+            logger.warning(f"Failed to shut down span exporter: {exporter}")
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def root_span(name: str, **attributes: str) -> Generator[Span]:
+    """Starts a new trace.
+
+    When the span ends, its `command` and `interaction` attributes are used as labels
+    for the command runtime and phase histograms.
+    """
+    value = Span(
+        name=name,
+        trace_id=secrets.token_hex(16),
+        attributes=attributes,
+    )
+    try:
+        with _activate(value):
+            yield value
+    finally:
+        _finish_root(value)
+
+
+@contextmanager
+def span(name: str, **attributes: str) -> Generator[Span]:
+    """Times a phase of the current command.
+
+    Does nothing except create a throwaway `Span` if there is no active root span, eg.
+    in background tasks.
+    """
+    parent = _current_span.get()
+    value = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else "",
+        parent=parent,
+        attributes=attributes,
+    )
+    try:
+        with _activate(value):
+            yield value
+    finally:
+        if parent:
+            parent.root._children.append(value)
+
+
+def _finish_root(value: Span):
+    command = value.attributes.get("command", "unknown")
+    interaction = value.attributes.get("interaction", "unknown")
+    COMMAND_RUNTIME_HISTOGRAM.labels(command, interaction, value.status).observe(
+        value.duration
+    )
+    for child in value._children:
+        COMMAND_PHASE_HISTOGRAM.labels(command, interaction, child.name).observe(
+            child.duration
+        )
+
+    if _exporters:
+        spans = [value, *value._children]
+        for exporter in _exporters:
+            try:
+                exporter.export(spans)
+            except Exception:
+                logger.warning(f"Failed to export spans: {exporter}", exc_info=True)
+
+
+@contextmanager
+def _activate(value: Span) -> Generator[None]:
+    token = _current_span.set(value)
+    try:
+        yield
+    except BaseException:
+        value.set_error()
+        raise
+    finally:
+        _current_span.reset(token)
+        value.end_ns = value.start_ns + int(
+            (time.perf_counter() - value._start_perf) * 1e9
+        )
+
+
+class OTLPJSONFileExporter:
+    """Appends spans to a file in the OTLP JSON format, one export request per line.
+
+    The file can be read by the OpenTelemetry Collector's `otlpjsonfile` receiver, so
+    spans can be forwarded to any tracing backend without adding a dependency on the
+    OpenTelemetry SDK.
+    """
+
+    def __init__(self, path: Path, *, batch_size: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+        self._buffer = list[Span]()
+
+    def export(self, spans: list[Span]):
+        self._buffer += spans
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        spans, self._buffer = self._buffer, []
+
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _to_otlp_attributes({
+                            "service.name": "hexbug",
+                            "service.version": VERSION,
+                        }),
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [_to_otlp_span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+    def shutdown(self):
+        self.flush()
+
+
+def _to_otlp_span(span: Span) -> dict[str, Any]:
+    data: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 2 if span.parent is None else 1,  # SERVER or INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns or span.start_ns),
+        "attributes": _to_otlp_attributes(span.attributes),
+        "status": {"code": 2 if span.status == "error" else 1},  # ERROR or OK
+    }
+    if span.parent:
+        data["parentSpanId"] = span.parent.span_id
+    return data
+
+
+def _to_otlp_attributes(attributes: dict[str, str]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": {"stringValue": value}}
+        for key, value in attributes.items()
+    ]
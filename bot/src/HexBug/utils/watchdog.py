@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from HexBug.utils.metrics import EVENT_LOOP_BLOCKED_COUNTER, EVENT_LOOP_LAG_HISTOGRAM
+
+logger = logging.getLogger(__name__)
+
+LAG_WINDOW = 60  # seconds
+
+
+@dataclass
+class LoopBlock:
+    timestamp: datetime
+    """When the block was detected."""
+    duration: float | None
+    """The total time the loop was blocked for, or None if it's still blocked."""
+    stack: str | None
+    """The event loop thread's stack when the block was detected."""
+
+
+class LoopWatchdog:
+    """Measures event loop lag, and logs the event loop thread's stack when it's blocked.
+
+    A task on the event loop repeatedly sleeps for `interval` seconds and records how
+    late it wakes up. If `block_threshold` is set, a separate thread checks that the task
+    is still waking up; if it hasn't for longer than the threshold, whatever is currently
+    running on the loop must be blocking it, so the thread logs the loop thread's stack.
+    """
+
+    def __init__(self, *, interval: float = 0.25, block_threshold: float | None):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.last_block: LoopBlock | None = None
+
+        self._lags = deque[float](maxlen=int(LAG_WINDOW / interval))
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def max_recent_lag(self) -> float | None:
+        """The highest lag measured in the last minute."""
+        return max(self._lags, default=None)
+
+    def start(self):
+        """Starts the watchdog. Must be called from the event loop's thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._measure_lag())
+
+        if self.block_threshold is not None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._watch_for_blocks,
+                args=(self.block_threshold,),
+                name="LoopWatchdog",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        if task := self._task:
+            self._task = None
+            task.cancel()
+        if thread := self._thread:
+            self._thread = None
+            self._stop.set()
+            thread.join()
+
+    async def _measure_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - start - self.interval, 0)
+
+            EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+            self._lags.append(lag)
+            self._heartbeat = time.monotonic()
+
+            if (block := self.last_block) and block.duration is None:
+                block.duration = lag
+                logger.warning(f"Event loop was blocked for {lag:.2f} s")
+
+    def _watch_for_blocks(self, threshold: float):
+        reported_heartbeat = None
+        while not self._stop.wait(min(self.interval, threshold / 2)):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+
+            frame = sys._current_frames().get(self._loop_thread_id or 0)  # pyright: ignore[reportPrivateUsage]
+            stack = "".join(traceback.format_stack(frame)) if frame else None
+            del frame
+
+            EVENT_LOOP_BLOCKED_COUNTER.inc()
+            self.last_block = LoopBlock(
+                timestamp=datetime.now(UTC),
+                duration=None,
+                stack=stack,
+            )
+            logger.warning(
+                f"Event loop has been blocked for {blocked_for:.2f} s:\n"
+                + (stack or "(no stack available)")
+            )
@@ -0,0 +1,86 @@
+import pytest
+import regex
+from hexdoc.core import ResourceLocation
+
+from HexBug.data.hex_math import HexDir
+from HexBug.data.patterns import PatternInfo
+from HexBug.utils.conflicts import RegexConflictScanner
+
+SIGNATURES = [
+    "qaq",
+    "aqaa",
+    "aqaaw",
+    "wawqwawaw",
+    "qqqqqaqwawaq",
+    "dedd",
+    "eee",
+    "qa",
+    "aqaawede",
+]
+
+
+def pattern_info(index: int, signature: str) -> PatternInfo:
+    return PatternInfo(
+        id=ResourceLocation("hexcasting", f"pattern_{index}"),
+        name=signature,
+        direction=HexDir.EAST,
+        signature=signature,
+        is_per_world=False,
+        display_only=False,
+        display_as=None,
+        operators=[],
+    )
+
+
+def describe_RegexConflictScanner():
+    @pytest.fixture()
+    def scanner() -> RegexConflictScanner:
+        return RegexConflictScanner(
+            pattern_info(i, signature) for i, signature in enumerate(SIGNATURES)
+        )
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            "qaq",
+            "aqaa.*",
+            "[aq]+",
+            "[^w]*",
+            "(?s).*",
+            "(?s)aqaa.*qa",
+            "q.*",
+            ".*aq",
+            "^qa$",
+            r"\Aqa",
+            r"qa\Z",
+            r"\Aaqaa\w*\Z",
+            r"\Gqa",
+            r"\\A|qa",
+            "w*",
+        ],
+    )
+    def test_same_as_fullmatch(scanner: RegexConflictScanner, pattern: str):
+        compiled = regex.compile(pattern)
+        want = [
+            ResourceLocation("hexcasting", f"pattern_{i}")
+            for i, signature in enumerate(SIGNATURES)
+            if compiled.fullmatch(signature)
+        ]
+
+        result = scanner.scan(pattern, timeout=10)
+
+        assert result.completed
+        assert result.checked == result.total == len(SIGNATURES)
+        assert result.matches == want
+
+    @pytest.mark.parametrize("pattern", ["qaq", r"\Aqaq"])
+    def test_timeout(scanner: RegexConflictScanner, pattern: str):
+        result = scanner.scan(pattern, timeout=0)
+
+        assert not result.completed
+        assert result.checked == 0
+        assert result.matches == []
+
+    def test_invalid_pattern(scanner: RegexConflictScanner):
+        with pytest.raises(regex.error):
+            scanner.scan("(", timeout=10)
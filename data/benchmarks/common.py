@@ -0,0 +1,70 @@
+"""Shared helpers for the benchmark scripts in this directory."""
+
+import gc
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, cast
+
+from HexBug.data.hex_math import HexDir
+from HexBug.data.parsers.pretty_print import IotaPrinter
+from HexBug.data.patterns import PatternInfo
+from HexBug.data.registry import HexBugRegistry
+from HexBug.data.static_data import INTROSPECTION, RETROSPECTION
+
+MOCK_PATTERNS = {
+    "qaq": PatternInfo.model_construct(name="Mind's Reflection"),
+    "aa": PatternInfo.model_construct(name="Compass' Purification"),
+    "wa": PatternInfo.model_construct(name="Archer's Distillation"),
+    "qqq": PatternInfo.model_construct(id=INTROSPECTION, name="Introspection"),
+    "eee": PatternInfo.model_construct(id=RETROSPECTION, name="Retrospection"),
+    "deaqq": PatternInfo.model_construct(name="Hermes' Gambit"),
+}
+
+
+class MockRegistry:
+    def try_match_pattern(self, direction: HexDir, signature: str):
+        return MOCK_PATTERNS.get(signature)
+
+
+def mock_printer() -> IotaPrinter:
+    return IotaPrinter(cast(HexBugRegistry, MockRegistry()))
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    """Fastest time out of all repeats."""
+    peak_bytes: int
+    """Peak memory traced by `tracemalloc` during a single call."""
+    retained_blocks: int
+    """Number of memory blocks still allocated by the return value of a single call."""
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "seconds": self.seconds,
+            "peak_bytes": self.peak_bytes,
+            "retained_blocks": self.retained_blocks,
+        }
+
+
+def measure(fn: Callable[[], Any], *, number: int) -> Measurement:
+    seconds = min(timeit.repeat(fn, number=1, repeat=number))
+
+    # measure memory separately, since tracing slows everything down considerably
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    retained_blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, "lineno")
+    )
+    del result
+
+    return Measurement(seconds, peak_bytes, retained_blocks)
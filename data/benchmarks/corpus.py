@@ -0,0 +1,125 @@
+"""Reveal-formatted benchmark inputs.
+
+Each entry is generated from a fixed seed, so the corpus is identical between runs and
+machines without checking in large blobs of text. The inputs are modelled on real
+dumps from latest.log: spell lists made mostly of patterns, with numbers, vectors,
+entity references and the occasional nested list or bubble mixed in.
+"""
+
+import random
+from typing import Callable
+
+MAX_INPUT_SIZE = 32 * 1024
+"""The same limit as `/decode file`."""
+
+_DIRECTIONS = ["EAST", "NORTH_EAST", "NORTH_WEST", "WEST", "SOUTH_WEST", "SOUTH_EAST"]
+
+_SIGNATURES = ["qaq", "aa", "wa", "deaqq", "qqq", "eee", "waqaw", "aqaa", "qqqqqaww"]
+
+_UNKNOWNS = [
+    "Player",
+    "Zombie",
+    "Amethyst Dust x64",
+    "Amethyst Shard x244808",
+    "minecraft:stone",
+    "Allay (Entity)",
+    "Focus: Overworld",
+    "Iron Golem",
+]
+
+
+def _pattern(rng: random.Random) -> str:
+    direction = rng.choice(_DIRECTIONS)
+    match rng.randrange(3):
+        case 0:
+            return f"HexPattern({direction} {rng.choice(_SIGNATURES)})"
+        case 1:
+            return f"<{direction.lower().replace('_', '')},{rng.choice(_SIGNATURES)}>"
+        case _:
+            return f"HexPattern[{direction}, {rng.choice(_SIGNATURES)}]"
+
+
+def _number(rng: random.Random) -> str:
+    return f"{rng.uniform(-1000, 1000):.2f}"
+
+
+def _scalar(rng: random.Random) -> str:
+    match rng.randrange(10):
+        case 0:
+            return _number(rng)
+        case 1:
+            return f"({_number(rng)}, {_number(rng)}, {_number(rng)})"
+        case 2:
+            return rng.choice(_UNKNOWNS)
+        case 3:
+            return rng.choice(["True", "False", "Null"])
+        case _:
+            return _pattern(rng)
+
+
+def _spell(rng: random.Random, size: int, depth: int = 0) -> str:
+    items = list[str]()
+    length = 2
+    while length < size:
+        match rng.randrange(20):
+            case 0 if depth < 4:
+                item = _spell(rng, rng.randrange(50, 500), depth + 1)
+            case 1:
+                item = "{" + _scalar(rng) + "}"
+            case _:
+                item = _scalar(rng)
+        items.append(item)
+        length += len(item) + 2
+    return "[" + ", ".join(items) + "]"
+
+
+def small() -> str:
+    return _spell(random.Random(0), 256)
+
+
+def large() -> str:
+    return _spell(random.Random(1), MAX_INPUT_SIZE - 1024)
+
+
+def deeply_nested() -> str:
+    # Lark's transformer is recursive, so stay well below the recursion limit
+    rng = random.Random(2)
+    text = _pattern(rng)
+    for _ in range(200):
+        text = f"[{_pattern(rng)}, {_number(rng)}, {text}, {_pattern(rng)}]"
+    return text
+
+
+def matrix_heavy() -> str:
+    rng = random.Random(3)
+    items = list[str]()
+    length = 2
+    while length < MAX_INPUT_SIZE - 1024:
+        rows, columns = rng.randrange(1, 8), rng.randrange(1, 8)
+        data = "; ".join(
+            ", ".join(_number(rng) for _ in range(columns)) for _ in range(rows)
+        )
+        item = f"[({rows}, {columns}) | {data}]"
+        items.append(item)
+        length += len(item) + 2
+    return "[" + ", ".join(items) + "]"
+
+
+def unknown_heavy() -> str:
+    rng = random.Random(4)
+    items = list[str]()
+    length = 2
+    while length < MAX_INPUT_SIZE - 1024:
+        item = rng.choice(_UNKNOWNS) if rng.random() < 0.8 else _pattern(rng)
+        items.append(item)
+        length += len(item) + 2
+    return "[" + ", ".join(items) + "]"
+
+
+CORPUS: dict[str, Callable[[], str]] = {
+    "small": small,
+    "32 KiB": large,
+    "deeply nested": deeply_nested,
+    "matrix heavy": matrix_heavy,
+    "unknown heavy": unknown_heavy,
+}
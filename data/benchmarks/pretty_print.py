@@ -0,0 +1,81 @@
+"""Benchmarks for `IotaPrinter` on deeply nested and very wide iotas.
+
+Usage: python data/benchmarks/pretty_print.py [--number N]
+"""
+
+import argparse
+import timeit
+from typing import Callable
+
+from common import mock_printer
+
+from HexBug.data.hex_math import HexDir
+from HexBug.data.parsers.fast_ast import (
+    FastBubbleIota,
+    FastIota,
+    FastListIota,
+    FastNumberIota,
+    FastPatternIota,
+)
+
+
+def nested_lists(depth: int) -> FastIota:
+    iota = FastListIota([FastNumberIota(0)])
+    for _ in range(depth - 1):
+        iota = FastListIota([FastPatternIota(HexDir.EAST, "qaq"), iota])
+    return iota
+
+
+def nested_bubbles(depth: int) -> FastIota:
+    iota: FastIota = FastNumberIota(0)
+    for _ in range(depth):
+        iota = FastBubbleIota(iota)
+    return FastListIota([iota])
+
+
+def wide_list(width: int) -> FastIota:
+    values = list[FastIota]()
+    for i in range(width):
+        match i % 4:
+            case 0:
+                values.append(FastPatternIota(HexDir.WEST, "qqq"))
+            case 1:
+                values.append(FastPatternIota(HexDir.EAST, "qaq"))
+            case 2:
+                values.append(FastNumberIota(i))
+            case _:
+                values.append(FastPatternIota(HexDir.EAST, "eee"))
+    return FastListIota(values)
+
+
+CASES: dict[str, Callable[[], FastIota]] = {
+    "nested lists (depth 400)": lambda: nested_lists(400),
+    "nested lists (depth 5000)": lambda: nested_lists(5000),
+    "nested bubbles (depth 5000)": lambda: nested_bubbles(5000),
+    "wide list (100k items)": lambda: wide_list(100_000),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    printer = mock_printer()
+
+    for name, factory in CASES.items():
+        iota = factory()
+        for method in [printer.pretty_print, printer.print]:
+            label = f"{name}: {method.__name__}"
+            try:
+                seconds = min(
+                    timeit.repeat(lambda: method(iota), number=1, repeat=args.number)
+                )
+            except RecursionError:
+                print(f"{label:<50} RecursionError")
+            else:
+                print(f"{label:<50} {seconds * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmarks for each stage of decoding a Reveal output, over the inputs in `corpus`.
+
+The stages are measured separately so it's clear which one to optimize:
+
+- `lark`: building the parse tree (`load_reveal_parser().parse`).
+- `transform`/`transform (fast)`: `RevealTransformer`/`FastRevealTransformer` on an
+  existing parse tree.
+- `parse_reveal`/`parse_reveal (fast)`: both of the above, end to end.
+- `pretty_print`/`print`: `IotaPrinter` on an existing iota.
+
+Use `--save` to record a baseline, then `--compare` against it after changing the
+grammar or parser to catch regressions.
+
+Usage: python data/benchmarks/reveal.py [--number N] [--save PATH] [--compare PATH]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+from common import Measurement, measure, mock_printer
+from corpus import CORPUS
+
+from HexBug.data.parsers.reveal import (
+    FastRevealTransformer,
+    RevealTransformer,
+    load_reveal_parser,
+    parse_reveal,
+)
+
+REGRESSION_THRESHOLD = 1.2
+"""Slowdown ratio above which `--compare` reports a regression."""
+
+
+def get_stages(text: str) -> dict[str, Callable[[], Any]]:
+    parser = load_reveal_parser()
+    printer = mock_printer()
+
+    tree = parser.parse(text)  # pyright: ignore[reportUnknownMemberType]
+    iota = parse_reveal(text, validate=False)
+
+    return {
+        "lark": lambda: parser.parse(text),  # pyright: ignore[reportUnknownMemberType]
+        "transform": lambda: RevealTransformer().transform(tree),
+        "transform (fast)": lambda: FastRevealTransformer().transform(tree),
+        "parse_reveal": lambda: parse_reveal(text),
+        "parse_reveal (fast)": lambda: parse_reveal(text, validate=False),
+        "pretty_print": lambda: printer.pretty_print(iota),
+        "print": lambda: printer.print(iota),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=5)
+    parser.add_argument("--save", type=Path, help="Write the results to a JSON file.")
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        help="Compare the results to a JSON file written by --save.",
+    )
+    args = parser.parse_args()
+
+    baseline: dict[str, dict[str, Any]] = (
+        json.loads(args.compare.read_text("utf-8")) if args.compare else {}
+    )
+    results = dict[str, dict[str, Any]]()
+    regressions = list[str]()
+
+    print(f"{'':<40} {'time':>12} {'peak':>12} {'retained':>10}")
+
+    for name, factory in CORPUS.items():
+        text = factory()
+        print(f"{name} ({len(text)} chars)")
+
+        for stage, fn in get_stages(text).items():
+            label = f"{name}: {stage}"
+            result = measure(fn, number=args.number)
+            results[label] = result.to_json()
+
+            line = f"  {stage:<38} {format_result(result)}"
+            if before := baseline.get(label):
+                ratio = result.seconds / before["seconds"]
+                line += f"  {ratio:5.2f}x"
+                if ratio > REGRESSION_THRESHOLD:
+                    line += "  REGRESSION"
+                    regressions.append(label)
+            print(line)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2), "utf-8")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {REGRESSION_THRESHOLD}x:")
+        for label in regressions:
+            print(f"  {label}")
+        sys.exit(1)
+
+
+def format_result(result: Measurement) -> str:
+    return (
+        f"{result.seconds * 1000:9.2f} ms"
+        + f" {result.peak_bytes / 1024:8.0f} KiB"
+        + f" {result.retained_blocks:10}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -162,6 +162,11 @@ class HexSegment:
     def shifted_by(self, other: HexCoord | HexDir) -> HexSegment:
         return HexSegment(self.root.shifted_by(other), self.direction)
 
+    @property
+    def canonical(self) -> HexSegment:
+        """An equal segment pointing north-east, east, or south-east."""
+        return HexSegment(*self._canonical_values)
+
     def rotated_by(self, angle: HexAngle) -> HexSegment:
         return HexSegment(self.root.rotated_by(angle), self.direction.rotated_by(angle))
 
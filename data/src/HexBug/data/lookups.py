@@ -1,10 +1,12 @@
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Callable
+from typing import Callable, Iterator
 
 from .exceptions import DuplicatePatternError
 from .hex_math import HexAngle, HexPattern, HexSegment, align_segments_to_origin
 from .patterns import PatternInfo
+from .similarity import ShapeSimilarityIndex
 from .special_handlers import SpecialHandlerInfo
 from .utils.shorthand import get_shorthand_names
 
@@ -33,27 +35,71 @@ class SpecialHandlerLookup[K](dict[K, SpecialHandlerInfo]):
         super().__init__()
 
 
+class SignaturePrefixIndex[V]:
+    """Sorted array of signatures, for finding values by signature prefix in logarithmic
+    time. Multiple values may have the same signature."""
+
+    def __init__(self):
+        self._signatures = list[str]()
+        self._values = list[V]()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, signature: str, value: V):
+        index = bisect_right(self._signatures, signature)
+        self._signatures.insert(index, signature)
+        self._values.insert(index, value)
+
+    def starting_with(self, prefix: str) -> Iterator[V]:
+        """Yields all values whose signature starts with `prefix`, sorted by
+        signature."""
+        index = bisect_left(self._signatures, prefix)
+        while index < len(self._signatures) and self._signatures[index].startswith(
+            prefix
+        ):
+            yield self._values[index]
+            index += 1
+
+
 class PatternLookups:
     def __init__(self):
         self.name = PatternLookup("name", lambda p: p.name)
         self.signature = PatternLookup("signature", lambda p: p.signature)
+        self.signature_prefixes = SignaturePrefixIndex[PatternInfo]()
 
         self.segments = defaultdict[frozenset[HexSegment], list[PatternInfo]](list)
         self.per_world_segments = dict[frozenset[HexSegment], PatternInfo]()
+        self._shape_similarity = ShapeSimilarityIndex[PatternInfo]()
+        self._unindexed_shapes = list[tuple[frozenset[HexSegment], PatternInfo]]()
 
         self.special_handler_name = SpecialHandlerLookup("name", lambda i: i.base_name)
 
         self.shorthand = dict[str, PatternInfo]()
         self.special_handler_shorthand = dict[str, SpecialHandlerInfo]()
 
+    @property
+    def shape_similarity(self) -> ShapeSimilarityIndex[PatternInfo]:
+        """Index for finding patterns with similar shapes.
+
+        Hashing every shape takes a while, so this is only built when first needed.
+        """
+        if self._unindexed_shapes:
+            for segments, pattern in self._unindexed_shapes:
+                self._shape_similarity.add(segments, pattern)
+            self._unindexed_shapes.clear()
+        return self._shape_similarity
+
     def add_pattern(self, pattern: PatternInfo):
         if not pattern.is_hidden:
             self.name.add_or_raise(pattern)
 
+        self.signature_prefixes.add(pattern.signature, pattern)
+
         if not pattern.display_only:
             self.signature.add_or_raise(pattern)
 
-            segments = list(
+            segments = frozenset(
                 HexPattern(pattern.direction, pattern.signature).iter_segments()
             )
             for _ in range(6):
@@ -86,6 +132,8 @@ class PatternLookups:
 
                 self.segments[segments].append(pattern)
 
+            self._unindexed_shapes.append((segments, pattern))
+
         for name in get_shorthand_names(pattern.id, pattern.name):
             if name not in self.shorthand:
                 self.shorthand[name] = pattern
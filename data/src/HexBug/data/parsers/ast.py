@@ -37,9 +37,7 @@ class PatternIota(BaseIota):
     @classmethod
     def _uppercase_direction(cls, value: str | Any):
         if isinstance(value, str):
-            value = value.upper()
-            if value.startswith(("NORTH", "SOUTH")) and "_" not in value:
-                value = value[:5] + "_" + value[5:]
+            return normalize_direction(value)
         return value
 
 
@@ -145,9 +143,7 @@ class StringIota(BaseIota):
     @field_validator("value", mode="after")
     @classmethod
     def _strip_quotes(cls, value: str) -> str:
-        if value and value[0] == value[-1] == '"':
-            return value[1:-1]
-        return value
+        return strip_quotes(value)
 
 
 @dataclass
@@ -155,6 +151,21 @@ class UnknownIota(BaseIota):
     value: str
 
 
+def normalize_direction(value: str) -> str:
+    """Converts a direction from any of the formats accepted by the reveal parser (eg.
+    `northeast`, `north_east`, `NORTH_EAST`) into a `HexDir` member name."""
+    value = value.upper()
+    if value.startswith(("NORTH", "SOUTH")) and "_" not in value:
+        value = value[:5] + "_" + value[5:]
+    return value
+
+
+def strip_quotes(value: str) -> str:
+    if value and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
 type Iota = (
     PatternIota
     | BubbleIota
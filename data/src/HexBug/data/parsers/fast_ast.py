@@ -0,0 +1,200 @@
+"""Lightweight, non-validating versions of the nodes in `ast`.
+
+These are plain slotted dataclasses that skip Pydantic validation entirely, relying on
+the reveal grammar to guarantee the shape of each token. Each class is registered as a
+virtual subclass of its validated counterpart, so `isinstance` checks and `match`
+statements written against `ast` (eg. in `IotaPrinter`) work with both.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Self
+
+from lark import Token
+from lark.tree import Meta
+
+from HexBug.data.hex_math import PATTERN_SIGNATURE_MAX_LENGTH, HexDir
+
+from . import ast
+
+
+class FastBaseIota:
+    __slots__ = ("meta",)
+
+    meta: Meta | None
+
+    def __post_init__(self):
+        self.meta = None
+
+    @classmethod
+    def parse(cls, meta: Meta, tokens: list[Any]) -> Self:
+        iota = cls._from_tokens(tokens)
+        iota.meta = meta
+        return iota
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Any]) -> Self:
+        return cls(*tokens)
+
+
+@ast.PatternIota.register
+@dataclass(slots=True)
+class FastPatternIota(FastBaseIota):
+    direction: HexDir
+    signature: str = ""
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        direction = HexDir[ast.normalize_direction(tokens[0])]
+        signature = tokens[1].lower() if len(tokens) > 1 else ""
+        if len(signature) > PATTERN_SIGNATURE_MAX_LENGTH:
+            raise ValueError(
+                f"Pattern signature is too long (max {PATTERN_SIGNATURE_MAX_LENGTH}): {len(signature)}"
+            )
+        return cls(direction, signature)
+
+
+@ast.BubbleIota.register
+@dataclass(slots=True)
+class FastBubbleIota(FastBaseIota):
+    inner: FastIota
+
+
+@ast.JumpIota.register
+@dataclass(slots=True)
+class FastJumpIota(FastBaseIota):
+    frames: list[str]
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        return cls([str(token) for token in tokens])
+
+
+@ast.CallIota.register
+@dataclass(slots=True)
+class FastCallIota(FastBaseIota):
+    frames: list[str]
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        return cls([str(token) for token in tokens])
+
+
+@ast.ListIota.register
+@dataclass(slots=True)
+class FastListIota(FastBaseIota):
+    values: list[FastIota]
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Any]) -> Self:
+        return cls(tokens)
+
+
+@ast.VectorIota.register
+@dataclass(slots=True)
+class FastVectorIota(FastBaseIota):
+    x: float
+    y: float
+    z: float
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        x, y, z = tokens
+        return cls(float(x), float(y), float(z))
+
+
+@ast.MatrixIota.register
+@dataclass(slots=True)
+class FastMatrixIota(FastBaseIota):
+    rows: int
+    """m"""
+    columns: int
+    """n"""
+    data: list[list[float]]
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Any]) -> Self:
+        if len(tokens) > 2:
+            rows, columns, data = tokens
+        else:
+            rows, columns = tokens
+            data = list[Any]()
+
+        rows, columns = int(rows), int(columns)
+        data = [[float(value) for value in row] for row in data]
+
+        # the grammar can't check this for us
+        if len(data) != rows:
+            raise ValueError(
+                f"Invalid number of rows (expected {rows}, got {len(data)}): {data}"
+            )
+        for row in data:
+            if len(row) != columns:
+                raise ValueError(
+                    f"Invalid number of columns (expected {columns}, got {len(row)}): {row}"
+                )
+
+        return cls(rows, columns, data)
+
+
+@ast.NumberIota.register
+@dataclass(slots=True)
+class FastNumberIota(FastBaseIota):
+    value: float
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        return cls(float(tokens[0]))
+
+
+@ast.BooleanIota.register
+@dataclass(slots=True)
+class FastBooleanIota(FastBaseIota):
+    value: bool
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        return cls(tokens[0].lower() == "true")
+
+
+@ast.NullIota.register
+@dataclass(slots=True)
+class FastNullIota(FastBaseIota):
+    pass
+
+
+@ast.StringIota.register
+@dataclass(slots=True)
+class FastStringIota(FastBaseIota):
+    value: str
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        return cls(ast.strip_quotes(tokens[0]))
+
+
+@ast.UnknownIota.register
+@dataclass(slots=True)
+class FastUnknownIota(FastBaseIota):
+    value: str
+
+    @classmethod
+    def _from_tokens(cls, tokens: list[Token]) -> Self:
+        return cls(str(tokens[0]))
+
+
+type FastIota = (
+    FastPatternIota
+    | FastBubbleIota
+    | FastJumpIota
+    | FastCallIota
+    | FastListIota
+    | FastVectorIota
+    | FastMatrixIota
+    | FastNumberIota
+    | FastBooleanIota
+    | FastNullIota
+    | FastStringIota
+    | FastUnknownIota
+)
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Iterator
+from typing import Iterator, Protocol, TextIO, cast
 
 from HexBug.data import static_data
+from HexBug.data.hex_math import HexDir
 from HexBug.data.patterns import PatternInfo
-from HexBug.data.registry import HexBugRegistry
+from HexBug.data.registry import HexBugRegistry, PatternMatchResult
 
 from .ast import (
     BooleanIota,
@@ -23,43 +23,91 @@ from .ast import (
     UnknownIota,
     VectorIota,
 )
+from .fast_ast import FastIota
+
+
+class PatternMatcher(Protocol):
+    def try_match_pattern(
+        self,
+        direction: HexDir,
+        signature: str,
+        /,
+    ) -> PatternMatchResult | None: ...
 
 
 class IotaPrinter:
     registry: HexBugRegistry
-    _level: int
-    _min_level: int
+    matcher: PatternMatcher
+    """Used to look up pattern names. Defaults to `registry`."""
 
-    def __init__(self, registry: HexBugRegistry):
+    def __init__(
+        self,
+        registry: HexBugRegistry,
+        matcher: PatternMatcher | None = None,
+    ):
         self.registry = registry
-        self._level = 0
-        self._min_level = 0
+        self.matcher = matcher or registry
+
+    def with_matcher(self, matcher: PatternMatcher) -> IotaPrinter:
+        return IotaPrinter(self.registry, matcher)
 
-    def print(self, iota: Iota):
-        with self._reset():
-            return "".join(node.value for node in self._iter_nodes(iota, inline=True))
+    def print(self, iota: Iota | FastIota):
+        return "".join(
+            node.value for node in self._iter_nodes(iota, _PrintState(), inline=True)
+        )
 
     def pretty_print(
         self,
-        iota: Iota,
+        iota: Iota | FastIota,
+        *,
+        indent: str = " " * 4,
+        flatten_list: bool = False,
+    ) -> str:
+        return "\n".join(
+            self.iter_pretty_print(iota, indent=indent, flatten_list=flatten_list)
+        )
+
+    def write_pretty_print(
+        self,
+        stream: TextIO,
+        iota: Iota | FastIota,
         *,
         indent: str = " " * 4,
         flatten_list: bool = False,
     ):
-        with self._reset():
-            if flatten_list and isinstance(iota, ListIota):
-                nodes = (
-                    node
-                    for inner in iota.values
-                    for node in self._iter_embedded_nodes(inner, inline=False)
-                )
-            else:
-                nodes = self._iter_nodes(iota, inline=False)
-
-            return "\n".join(node.pretty_print(indent) for node in nodes)
-
-    def _iter_embedded_nodes(self, iota: Iota, inline: bool) -> Iterator[Node]:
-        nodes = self._iter_nodes(iota, inline)
+        """Writes the same output as `pretty_print` to `stream`, one line at a time."""
+        for i, line in enumerate(
+            self.iter_pretty_print(iota, indent=indent, flatten_list=flatten_list)
+        ):
+            if i > 0:
+                stream.write("\n")
+            stream.write(line)
+
+    def iter_pretty_print(
+        self,
+        iota: Iota | FastIota,
+        *,
+        indent: str = " " * 4,
+        flatten_list: bool = False,
+    ) -> Iterator[str]:
+        """Lazily generates the lines of `pretty_print`, without trailing newlines."""
+        state = _PrintState()
+        if flatten_list and isinstance(iota, ListIota):
+            nodes = (
+                node
+                for inner in iota.values
+                for node in self._iter_embedded_nodes(inner, state)
+            )
+        else:
+            nodes = self._iter_nodes(iota, state, inline=False)
+
+        for node in nodes:
+            yield node.pretty_print(indent)
+
+    def _iter_embedded_nodes(
+        self, iota: Iota | FastIota, state: _PrintState
+    ) -> Iterator[Node]:
+        nodes = self._iter_nodes(iota, state, inline=False)
         if isinstance(iota, PatternIota):
             yield from nodes
             return
@@ -74,127 +122,161 @@ class IotaPrinter:
             case other:
                 yield from other
 
-    def _iter_nodes(self, iota: Iota, inline: bool) -> Iterator[Node]:
-        match iota:
-            case PatternIota(direction=direction, signature=signature):
-                match self.registry.try_match_pattern(direction, signature):
-                    case PatternInfo(id=static_data.INTROSPECTION) if not inline:
-                        yield self._node("{")
-                        self._level += 1
-                    case PatternInfo(id=static_data.RETROSPECTION) if not inline:
-                        self._level -= 1
-                        yield self._node("}")
-                    case None:
-                        signature = (" " + signature) if signature else ""
-                        yield self._node(f"HexPattern({direction.name}{signature})")
-                    case match:
-                        yield self._node(match.name)
-
-            case BubbleIota(inner=inner):
-                yield self._node("{" + self.print(inner) + "}")
-
-            case JumpIota():
-                yield self._node("[Jump]")
-
-            case CallIota():
-                yield self._node("[Call]")
-
-            case NumberIota(value=value):
-                yield self._node(self._number(value))
-
-            case VectorIota(x=x, y=y, z=z):
-                yield self._node(
-                    f"({self._number(x)}, {self._number(y)}, {self._number(z)})"
-                )
-
-            case BooleanIota(value=value):
-                yield self._node(str(value))
-
-            case NullIota():
-                yield self._node("Null")
-
-            case StringIota(value=value):
-                yield self._node(f'"{value}"')
-
-            case UnknownIota(value=value):
-                yield self._node(value)
-
-            case ListIota([]):
-                yield self._node("[]")
-
-            case ListIota([*children]):
-                yield self._node("[")
-                with self._indent(), self._set_min_level():
-                    for i, child in enumerate(children):
-                        if inline and i > 0:
-                            yield self._node(", ")
-                        yield from self._iter_nodes(child, inline)
-                yield self._node("]")
-
-            case MatrixIota(rows=m, columns=n) if m == 0 or n == 0:
-                yield self._node(f"[({m}, {n})]")
-
-            case MatrixIota(rows=1, columns=n, data=data):
-                yield self._node(
-                    f"[({1}, {n}) | {', '.join(self._number(v) for v in data[0])}]"
-                )
-
-            case MatrixIota(rows=m, columns=n, data=data):
-                yield self._node(f"[({m}, {n}) |")
-
-                if inline:
-                    for i, row in enumerate(data):
-                        if i > 0:
-                            yield self._node("; ")
-                        yield self._node(", ".join(self._number(v) for v in row))
-                else:
-                    widths = [0] * n
-                    for row in data:
-                        for j, value in enumerate(row):
-                            widths[j] = max(widths[j], len(self._number(value)))
-
-                    with self._indent():
-                        for row in data:
-                            yield self._node(
-                                " ".join(
-                                    self._number(value).ljust(widths[j])
-                                    for j, value in enumerate(row)
+    def _iter_nodes(
+        self,
+        iota: Iota | FastIota,
+        state: _PrintState,
+        inline: bool,
+    ) -> Iterator[Node]:
+        """Walks `iota` depth-first using an explicit stack, so deeply nested lists and
+        bubbles don't hit the recursion limit.
+
+        `state` tracks the indentation level. It's passed in rather than created here so
+        that it can carry over between the top-level iotas of a flattened list, and is
+        updated when the iterator is exhausted or closed.
+        """
+        # fast_ast nodes are virtual subclasses of the ast classes, so they match the
+        # same cases
+        stack: list[Iota | _Close] = [cast(Iota, iota)]
+        level, min_level = state.level, state.min_level
+
+        try:
+            while stack:
+                item = stack.pop()
+                safe_level = max(level, min_level)
+
+                match item:
+                    case PatternIota(direction=direction, signature=signature):
+                        match self.matcher.try_match_pattern(direction, signature):
+                            case PatternInfo(id=static_data.INTROSPECTION) if (
+                                not inline
+                            ):
+                                yield Node("{", safe_level)
+                                level += 1
+                            case PatternInfo(id=static_data.RETROSPECTION) if (
+                                not inline
+                            ):
+                                level -= 1
+                                yield Node("}", max(level, min_level))
+                            case None:
+                                signature = (" " + signature) if signature else ""
+                                yield Node(
+                                    f"HexPattern({direction.name}{signature})",
+                                    safe_level,
+                                )
+                            case match:
+                                yield Node(match.name, safe_level)
+
+                    case _Close(value=value):
+                        level, min_level = item.level, item.min_level
+                        yield Node(value, max(level, min_level))
+
+                    case BubbleIota(inner=inner):
+                        if inline:
+                            yield Node("{", safe_level)
+                            stack.append(_Close("}", level, min_level))
+                            stack.append(inner)
+                        else:
+                            # nested bubbles are inline, so this only goes one level deeper
+                            yield Node("{" + self.print(inner) + "}", safe_level)
+
+                    case JumpIota():
+                        yield Node("[Jump]", safe_level)
+
+                    case CallIota():
+                        yield Node("[Call]", safe_level)
+
+                    case NumberIota(value=value):
+                        yield Node(self._number(value), safe_level)
+
+                    case VectorIota(x=x, y=y, z=z):
+                        yield Node(
+                            f"({self._number(x)}, {self._number(y)}, {self._number(z)})",
+                            safe_level,
+                        )
+
+                    case BooleanIota(value=value):
+                        yield Node(str(value), safe_level)
+
+                    case NullIota():
+                        yield Node("Null", safe_level)
+
+                    case StringIota(value=value):
+                        yield Node(f'"{value}"', safe_level)
+
+                    case UnknownIota(value=value):
+                        yield Node(value, safe_level)
+
+                    case ListIota([]):
+                        yield Node("[]", safe_level)
+
+                    case ListIota(values=children):
+                        yield Node("[", safe_level)
+                        stack.append(_Close("]", level, min_level))
+                        level = min_level = safe_level + 1
+                        if inline:
+                            for i in range(len(children) - 1, 0, -1):
+                                stack.append(children[i])
+                                stack.append(_Close(", ", level, min_level))
+                            stack.append(children[0])
+                        else:
+                            stack.extend(reversed(children))
+
+                    case MatrixIota(rows=m, columns=n) if m == 0 or n == 0:
+                        yield Node(f"[({m}, {n})]", safe_level)
+
+                    case MatrixIota(rows=1, columns=n, data=data):
+                        yield Node(
+                            f"[({1}, {n}) | {', '.join(self._number(v) for v in data[0])}]",
+                            safe_level,
+                        )
+
+                    case MatrixIota(rows=m, columns=n, data=data):
+                        yield Node(f"[({m}, {n}) |", safe_level)
+
+                        if inline:
+                            for i, row in enumerate(data):
+                                if i > 0:
+                                    yield Node("; ", safe_level)
+                                yield Node(
+                                    ", ".join(self._number(v) for v in row), safe_level
+                                )
+                        else:
+                            widths = [0] * n
+                            for row in data:
+                                for j, value in enumerate(row):
+                                    widths[j] = max(widths[j], len(self._number(value)))
+
+                            for row in data:
+                                yield Node(
+                                    " ".join(
+                                        self._number(value).ljust(widths[j])
+                                        for j, value in enumerate(row)
+                                    ),
+                                    safe_level + 1,
                                 )
-                            )
 
-                yield self._node("]")
+                        yield Node("]", safe_level)
+        finally:
+            state.level, state.min_level = level, min_level
 
     def _number(self, n: float):
         return f"{n:.4f}".rstrip("0").rstrip(".")
 
-    @property
-    def _safe_level(self):
-        return max(self._level, self._min_level)
-
-    def _node(self, value: str):
-        return Node(value, self._safe_level)
-
-    @contextmanager
-    def _reset(self):
-        prev = (self._level, self._min_level)
-        self._level = 0
-        self._min_level = 0
-        yield
-        self._level, self._min_level = prev
-
-    @contextmanager
-    def _indent(self, amount: int = 1):
-        prev = self._level
-        self._level = self._safe_level + amount
-        yield
-        self._level = prev
-
-    @contextmanager
-    def _set_min_level(self):
-        prev = self._min_level
-        self._min_level = self._safe_level
-        yield
-        self._level = self._min_level = prev
+
+@dataclass
+class _PrintState:
+    level: int = 0
+    min_level: int = 0
+
+
+@dataclass
+class _Close:
+    """Stack entry that emits `value` after restoring the indentation state."""
+
+    value: str
+    level: int
+    min_level: int
 
 
 @dataclass
@@ -1,5 +1,5 @@
 from importlib import resources
-from typing import Any
+from typing import Any, Literal, overload
 
 from lark import Lark, ParseError, Token, Transformer, UnexpectedToken
 
@@ -18,6 +18,21 @@ from .ast import (
     UnknownIota,
     VectorIota,
 )
+from .fast_ast import (
+    FastBooleanIota,
+    FastBubbleIota,
+    FastCallIota,
+    FastIota,
+    FastJumpIota,
+    FastListIota,
+    FastMatrixIota,
+    FastNullIota,
+    FastNumberIota,
+    FastPatternIota,
+    FastStringIota,
+    FastUnknownIota,
+    FastVectorIota,
+)
 from .helpers import v_args
 
 _parser: Lark | None = None
@@ -51,6 +66,25 @@ class RevealTransformer(Transformer[Token, Iota]):
     unknown = UnknownIota.parse
 
 
+@v_args(meta=True)
+class FastRevealTransformer(RevealTransformer):
+    """Variant of `RevealTransformer` that produces the non-validating nodes from
+    `fast_ast` instead of Pydantic dataclasses."""
+
+    pattern = FastPatternIota.parse
+    bubble = FastBubbleIota.parse
+    jump = FastJumpIota.parse
+    call = FastCallIota.parse
+    list = FastListIota.parse
+    vector = FastVectorIota.parse
+    matrix = FastMatrixIota.parse
+    number = FastNumberIota.parse
+    boolean = FastBooleanIota.parse
+    null = FastNullIota.parse
+    string = FastStringIota.parse
+    unknown = FastUnknownIota.parse
+
+
 def load_reveal_parser() -> Lark:
     global _parser
     if _parser is None:
@@ -64,9 +98,31 @@ def load_reveal_parser() -> Lark:
     return _parser
 
 
-def parse_reveal(text: str) -> Iota:
+@overload
+def parse_reveal(text: str, *, validate: Literal[True] = True) -> Iota: ...
+
+
+@overload
+def parse_reveal(text: str, *, validate: Literal[False]) -> FastIota: ...
+
+
+@overload
+def parse_reveal(text: str, *, validate: bool) -> Iota | FastIota: ...
+
+
+def parse_reveal(text: str, *, validate: bool = True) -> Iota | FastIota:
+    """Parses a reveal-formatted iota.
+
+    If `validate` is False, returns the lightweight nodes from `fast_ast` instead of
+    validating every node with Pydantic. These are registered as virtual subclasses of
+    the classes in `ast`, so they work with `isinstance` and `match`, but they don't
+    have any of Pydantic's methods.
+    """
     try:
         tree = load_reveal_parser().parse(text)  # pyright: ignore[reportUnknownMemberType]
     except UnexpectedToken as e:
         raise ParseError(str(e) + "\n" + e.get_context(text) + "\n")
-    return RevealTransformer().transform(tree)
+
+    if validate:
+        return RevealTransformer().transform(tree)
+    return FastRevealTransformer().transform(tree)
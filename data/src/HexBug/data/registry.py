@@ -10,7 +10,7 @@ from collections import defaultdict
 from enum import StrEnum
 from itertools import zip_longest
 from pathlib import Path
-from typing import Any, Self, overload
+from typing import Any, Callable, Collection, Iterator, Self, overload
 
 from hexdoc.cli.utils import init_context
 from hexdoc.core import (
@@ -20,7 +20,6 @@ from hexdoc.core import (
     ResourceLocation,
 )
 from hexdoc.data import HexdocMetadata
-from hexdoc.jinja.render import create_jinja_env_with_loader
 from hexdoc.minecraft import I18n, LocalizedStr
 from hexdoc.minecraft.assets import (
     MultiItemTexture,
@@ -33,7 +32,6 @@ from hexdoc.minecraft.recipe import ItemResult, Recipe
 from hexdoc.patchouli import Book, BookContext, FormatTree
 from hexdoc.patchouli.page import EntityPage, ImagePage, Page, SpotlightPage, TextPage
 from hexdoc.plugin import PluginManager
-from jinja2 import PackageLoader
 from pydantic import BaseModel, PrivateAttr, model_validator
 from tantivy import Document, Index, SchemaBuilder
 from tantivy.tantivy import Schema
@@ -43,7 +41,7 @@ from .book import CategoryInfo, EntryInfo, PageInfo, RecipeInfo
 from .hex_math import HexDir, HexPattern
 from .lookups import PatternLookups
 from .mods import DynamicModInfo, ModInfo
-from .patterns import PatternInfo, PatternOperator
+from .patterns import PatternInfo, PatternOperator, StaticPatternInfo
 from .sources import (
     CodebergSourceInfo,
     CodebergUserInfo,
@@ -68,12 +66,23 @@ from .static_data import (
     UNDOCUMENTED_PATTERNS,
     UNTITLED_PAGES,
 )
+from .utils.build import (
+    BookDocumentInfo,
+    BookOrder,
+    BuildCache,
+    BuildStageTimer,
+    ModBuildOutput,
+    ScrapedOperator,
+    ScrapedPerWorldShape,
+    get_package_version,
+)
 from .utils.hexdoc import (
     HexBugBookContext,
     HexBugProperties,
     monkeypatch_hexdoc,
     monkeypatch_hexdoc_hexcasting,
 )
+from .utils.styling import StyleJob, TextStyler
 
 logger = logging.getLogger(__name__)
 
@@ -132,6 +141,9 @@ class HexBugRegistry(BaseModel):
         *,
         pregenerated_numbers: dict[int, HexPattern],
         book_index: Index | None = None,
+        cache_dir: Path | None = None,
+        max_workers: int | None = None,
+        timer: BuildStageTimer | None = None,
     ) -> Self:
         """Build the HexBug registry from scratch.
 
@@ -139,10 +151,23 @@ class HexBugRegistry(BaseModel):
 
         If `book_index` is provided, also populates it with the book contents. The index
         must have been created/loaded using `HexBugRegistry.load_book_index()`.
+
+        If `cache_dir` is provided, the book contents scraped for each mod are saved
+        there, and later builds only scrape the mods whose inputs have changed (or that
+        depend on a mod that changed). If no mods have changed, the book isn't loaded.
+
+        `max_workers` is the number of processes used for styling book text. Defaults
+        to the number of CPUs.
+
+        If `timer` is provided, the time spent in each stage of the build is recorded
+        there, eg. for `BuildStageTimer.to_report()`.
         """
 
         logger.info("Building HexBug registry.")
 
+        timer = timer or BuildStageTimer()
+        cache = BuildCache(cache_dir) if cache_dir else None
+
         monkeypatch_hexdoc()
         monkeypatch_hexdoc_hexcasting()
 
@@ -154,7 +179,6 @@ class HexBugRegistry(BaseModel):
             PageWithPattern,
         )
         from hexdoc_hexcasting.metadata import PatternMetadata
-        from hexdoc_hexcasting.utils.pattern import PatternInfo as HexdocPatternInfo
         from hexdoc_lapisworks.book.pages.pages import LookupPWShapePage
 
         registry = cls(
@@ -173,512 +197,711 @@ class HexBugRegistry(BaseModel):
         for key in ["GITHUB_SHA", "GITHUB_REPOSITORY", "GITHUB_PAGES_URL"]:
             os.environ.setdefault(key, "")
 
-        logger.info("Initializing hexdoc.")
+        outputs = dict[str, ModBuildOutput]()
 
-        props = HexBugProperties.load_data(props_dir=Path.cwd(), data=HEXDOC_PROPS)
-        assert props.book_id
+        with timer.stage("load"):
+            logger.info("Initializing hexdoc.")
 
-        pm = PluginManager("", props)
-        MinecraftVersion.MINECRAFT_VERSION = pm.minecraft_version()
-        book_plugin = pm.book_plugin("patchouli")
+            props = HexBugProperties.load_data(props_dir=Path.cwd(), data=HEXDOC_PROPS)
+            assert props.book_id
 
-        logger.info("Loading resources.")
+            pm = PluginManager("", props)
+            MinecraftVersion.MINECRAFT_VERSION = pm.minecraft_version()
+            book_plugin = pm.book_plugin("patchouli")
 
-        with ModResourceLoader.load_all(props, pm, export=False) as loader:
-            logger.info("Loading metadata.")
+            logger.info("Loading resources.")
 
-            hexdoc_metadatas = loader.load_metadata(model_type=HexdocMetadata)
-            pattern_metadatas = loader.load_metadata(
-                name_pattern="{modid}.patterns",
-                model_type=PatternMetadata,
-                allow_missing=True,
-            )
+            with ModResourceLoader.load_all(props, pm, export=False) as loader:
+                with timer.stage("metadata"):
+                    logger.info("Loading metadata.")
 
-            logger.info("Loading i18n.")
+                    hexdoc_metadatas = loader.load_metadata(model_type=HexdocMetadata)
+                    pattern_metadatas = loader.load_metadata(
+                        name_pattern="{modid}.patterns",
+                        model_type=PatternMetadata,
+                        allow_missing=True,
+                    )
 
-            i18n = I18n.load(loader, enabled=True, lang="en_us")
+                with timer.stage("i18n"):
+                    logger.info("Loading i18n.")
 
-            logger.info("Loading book.")
+                    i18n = I18n.load(loader, enabled=True, lang="en_us")
 
-            book_id, book_data = book_plugin.load_book_data(props.book_id, loader)
-            context = init_context(
-                book_id=book_id,
-                book_data=book_data,
-                pm=pm,
-                loader=loader,
-                i18n=i18n,
-                all_metadata=hexdoc_metadatas,
-            )
+                with timer.stage("mods"):
+                    for static_info in MODS:
+                        mod_id = static_info.id
+                        logger.info(f"Loading mod: {mod_id}")
 
-            # patch book context to force all links to include the book url
-            book_context = HexBugBookContext(**dict(BookContext.of(context)))
-            book_context.add_to_context(context, overwrite=True)
-
-            book = book_plugin.validate_book(book_data, context=context)
-            assert isinstance(book, Book)
-
-        # Jinja stuff
-
-        jinja_env = create_jinja_env_with_loader(PackageLoader("hexdoc", "_templates"))
-        jinja_env.autoescape = False
-        styled_template = jinja_env.from_string(
-            r"""
-            {%- import "macros/formatting."~extension~".jinja" as fmt with context -%}
-            {{- fmt.styled(text) if text else "" -}}
-            """,
-            globals={
-                "book_links": book_context.book_links,
-            },
-        )
+                        mod_plugin = pm.mod_plugin(mod_id, book=True)
+                        hexdoc_metadata = hexdoc_metadatas[mod_id]
 
-        def _style_text(text: FormatTree, mod: ModInfo, plain: bool = False):
-            return styled_template.render(
-                text=text,
-                page_url=str(mod.book_url),
-                extension="txt" if plain else "md",
-            ).strip()
-
-        # load mods
-
-        for static_info in MODS:
-            mod_id = static_info.id
-            logger.info(f"Loading mod: {mod_id}")
-
-            mod_plugin = pm.mod_plugin(mod_id, book=True)
-            hexdoc_metadata = hexdoc_metadatas[mod_id]
-
-            if hexdoc_metadata.book_url is None:
-                raise ValueError(f"Mod missing book url: {mod_id}")
-
-            asset_url = hexdoc_metadata.asset_url
-            match asset_url.host:
-                case "raw.githubusercontent.com":
-                    _, author, repo, commit = asset_url.parts
-                    source = GitHubSourceInfo(
-                        author=GitHubUserInfo(author),
-                        repo=repo,
-                        commit=commit,
-                    )
-                case "codeberg.org":
-                    _, author, repo, _, _, commit = asset_url.parts
-                    source = CodebergSourceInfo(
-                        author=CodebergUserInfo(author),
-                        repo=repo,
-                        commit=commit,
-                    )
-                case _:
-                    raise ValueError(
-                        f"Unhandled asset url host for {mod_id}: {asset_url}"
-                    )
+                        if hexdoc_metadata.book_url is None:
+                            raise ValueError(f"Mod missing book url: {mod_id}")
 
-            registry._register_mod(
-                ModInfo.from_parts(
-                    static_info,
-                    DynamicModInfo(
-                        version=mod_plugin.mod_version,
-                        book_url=hexdoc_metadata.book_url,
-                        book_title=i18n.localize(f"hexdoc.{mod_id}.title").value,
-                        book_description=i18n.localize(
-                            f"hexdoc.{mod_id}.description"
-                        ).value,
-                        source=source,
-                    ),
-                )
-            )
+                        asset_url = hexdoc_metadata.asset_url
+                        match asset_url.host:
+                            case "raw.githubusercontent.com":
+                                _, author, repo, commit = asset_url.parts
+                                source = GitHubSourceInfo(
+                                    author=GitHubUserInfo(author),
+                                    repo=repo,
+                                    commit=commit,
+                                )
+                            case "codeberg.org":
+                                _, author, repo, _, _, commit = asset_url.parts
+                                source = CodebergSourceInfo(
+                                    author=CodebergUserInfo(author),
+                                    repo=repo,
+                                    commit=commit,
+                                )
+                            case _:
+                                raise ValueError(
+                                    f"Unhandled asset url host for {mod_id}: {asset_url}"
+                                )
 
-        # get book info
+                        registry._register_mod(
+                            ModInfo.from_parts(
+                                static_info,
+                                DynamicModInfo(
+                                    version=mod_plugin.mod_version,
+                                    book_url=hexdoc_metadata.book_url,
+                                    book_title=i18n.localize(
+                                        f"hexdoc.{mod_id}.title"
+                                    ).value,
+                                    book_description=i18n.localize(
+                                        f"hexdoc.{mod_id}.description"
+                                    ).value,
+                                    source=source,
+                                ),
+                            )
+                        )
 
-        logger.info("Scraping Patchouli books.")
+                        if cache:
+                            cache.add_mod(
+                                mod_id,
+                                mod_plugin.mod_version,
+                                get_package_version(type(mod_plugin).__module__),
+                                hexdoc_metadata.model_dump_json(),
+                            )
+                            if output := cache.load_mod_output(mod_id):
+                                outputs[mod_id] = output
+
+                # only the mods that changed need to be scraped again, but the book
+                # still needs to be loaded for links and ordering
+
+                book_order = cache.load_book_order() if cache else None
+                changed_mod_ids = [
+                    mod_id for mod_id in registry.mods if mod_id not in outputs
+                ]
+
+                if changed_mod_ids or book_order is None:
+                    if cache:
+                        logger.info(
+                            f"Reusing cached outputs for {len(outputs)} mods, scraping "
+                            f"{len(changed_mod_ids)}: {', '.join(changed_mod_ids)}"
+                        )
 
-        id_ops = defaultdict[ResourceLocation, list[PatternOperator]](list)
-        signature_ops = defaultdict[str, list[PatternOperator]](list)
-        lapisworks_per_world_shapes = dict[ResourceLocation, HexdocPatternInfo]()
+                    with timer.stage("book"):
+                        logger.info("Loading book.")
 
-        book_index_writer = book_index.writer() if book_index else None
+                        book_id, book_data = book_plugin.load_book_data(
+                            props.book_id, loader
+                        )
+                        context = init_context(
+                            book_id=book_id,
+                            book_data=book_data,
+                            pm=pm,
+                            loader=loader,
+                            i18n=i18n,
+                            all_metadata=hexdoc_metadatas,
+                        )
 
-        for category in book.categories.values():
-            assert category.resource_dir.modid is not None
-            category_mod = registry.mods[category.resource_dir.modid]
+                        # patch book context to force all links to include the book url
+                        book_context = HexBugBookContext(
+                            **dict(BookContext.of(context))
+                        )
+                        book_context.add_to_context(context, overwrite=True)
 
-            category_description = _style_text(category.description, category_mod)
+                        book = book_plugin.validate_book(book_data, context=context)
+                        assert isinstance(book, Book)
+                else:
+                    logger.info("All mods are unchanged, skipping book.")
+                    book_context = None
+                    book = None
 
-            registry._register_category(
-                CategoryInfo(
-                    mod_id=category_mod.id,
-                    id=category.id,
-                    url=book_context.book_links[category.book_link_key],
-                    icon_urls=_get_texture_urls(category.icon.texture),
-                    name=category.name.value,
-                    description=category_description,
-                )
-            )
+        # get book info
 
-            if book_index and book_index_writer:
-                book_index_writer.add_document(
-                    cls._create_book_document(
-                        book_index,
-                        title=category.name.value,
-                        text=_style_text(
-                            category.description, category_mod, plain=True
-                        ),
-                        text_markdown=category_description,
-                        category=category.name.value,
-                        entry=None,
-                        mod_id=category_mod.id,
-                        category_id=category.id,
-                        entry_id=None,
-                        page_anchor=None,
-                        page_index=None,
-                    )
+        if book and book_context:
+            # plain text is only needed for the book index, but cached outputs need to
+            # include it in case a later build has an index
+            build_documents = book_index is not None or cache is not None
+
+            # style book text in advance, since it's the slowest part of scraping
+            with timer.stage("style"):
+                styler = TextStyler(
+                    book_context.book_links,
+                    cache=cache,
+                    max_workers=max_workers,
                 )
-
-            for entry in category.entries.values():
-                assert entry.resource_dir.modid is not None
-                entry_mod = registry.mods[entry.resource_dir.modid]
-
-                registry._register_entry(
-                    EntryInfo(
-                        mod_id=entry_mod.id,
-                        category_id=category.id,
-                        id=entry.id,
-                        url=book_context.book_links[entry.book_link_key],
-                        icon_urls=_get_texture_urls(entry.icon.texture),
-                        name=entry.name.value,
-                        color=entry.entry_color,
+                styler.prepare(
+                    _iter_style_jobs(
+                        book,
+                        registry.mods,
+                        changed_mod_ids,
+                        plain=build_documents,
                     )
                 )
 
-                for page_index, (page, next_page) in enumerate(
-                    zip_longest(entry.pages, entry.pages[1:], fillvalue=None)
-                ):
-                    assert page
+            with timer.stage("scrape"):
+                logger.info("Scraping Patchouli books.")
 
-                    if (fragment := page.fragment(entry.fragment)) in DISABLED_PAGES:
-                        logger.info(f"Skipping disabled page: {fragment}")
-                        continue
+                for mod_id in changed_mod_ids:
+                    outputs[mod_id] = ModBuildOutput(mod_id=mod_id)
 
-                    # title
-                    match page:
-                        case (
-                            Page(title=LocalizedStr(value=title))
-                            | Page(header=LocalizedStr(value=title))
-                            | Page(name=LocalizedStr(value=title))
-                        ):
-                            pass
-                        case _:
-                            if item := _get_page_item(page):
-                                title = item.name.value
-                            else:
-                                title = None
-
-                    # text
-                    match page:
-                        case Page(text=FormatTree() as text):
-                            text_plain = _style_text(text, entry_mod, plain=True)
-                            text = _style_text(text, entry_mod)
-                        case _:
-                            text_plain = None
-                            text = None
-
-                    if book_index and book_index_writer and (title or text):
-                        book_index_writer.add_document(
-                            cls._create_book_document(
-                                book_index,
-                                title=title,
-                                text=text_plain,
-                                text_markdown=text,
-                                category=category.name.value,
-                                entry=entry.name.value,
-                                mod_id=entry_mod.id,
-                                category_id=category.id,
-                                entry_id=entry.id,
-                                page_anchor=page.anchor,
-                                page_index=page_index,
+                book_order = BookOrder(categories=[], entries=[])
+                category_mods = dict[ResourceLocation, str]()
+
+                for category in book.categories.values():
+                    assert category.resource_dir.modid is not None
+                    category_mod = registry.mods[category.resource_dir.modid]
+
+                    book_order.categories.append(category.id)
+                    category_mods[category.id] = category_mod.id
+
+                    if category_mod.id in changed_mod_ids:
+                        with timer.stage(category_mod.id):
+                            output = outputs[category_mod.id]
+
+                            category_description = styler.style(
+                                category.description, category_mod
                             )
-                        )
 
-                    # TODO: this should probably work like operators
-                    for recipe in _get_page_recipes(page):
-                        if result := _get_recipe_result(recipe):
-                            assert recipe.type
-                            registry._register_recipe(
-                                RecipeInfo(
-                                    mod_id=entry_mod.id,
-                                    icon_urls=_get_texture_urls(result.texture),
-                                    entry_id=entry.id,
-                                    page_key=f"{entry.id}#{page.anchor}"
-                                    if page.anchor
-                                    else None,
-                                    type=recipe.type,
-                                    id=result.id.id,
-                                    name=result.name.value,
-                                    description=text,
+                            output.categories.append(
+                                CategoryInfo(
+                                    mod_id=category_mod.id,
+                                    id=category.id,
+                                    url=book_context.book_links[category.book_link_key],
+                                    icon_urls=_get_texture_urls(category.icon.texture),
+                                    name=category.name.value,
+                                    description=category_description,
                                 )
                             )
 
-                    url_key = page.book_link_key(entry.book_link_key)
-                    book_url = book_context.book_links.get(url_key) if url_key else None
+                            if build_documents:
+                                output.book_documents.append(
+                                    BookDocumentInfo(
+                                        title=category.name.value,
+                                        text=styler.style(
+                                            category.description,
+                                            category_mod,
+                                            plain=True,
+                                        ),
+                                        text_markdown=category_description,
+                                        category=category.name.value,
+                                        entry=None,
+                                        mod_id=category_mod.id,
+                                        category_id=category.id,
+                                        entry_id=None,
+                                        page_anchor=None,
+                                        page_index=None,
+                                    )
+                                )
 
-                    if book_url is not None:
-                        assert page.anchor is not None
+                    for entry in category.entries.values():
+                        assert entry.resource_dir.modid is not None
+                        entry_mod = registry.mods[entry.resource_dir.modid]
 
-                        if title is None:
-                            if (entry.id, page.anchor) not in UNTITLED_PAGES:
-                                logger.warning(
-                                    f"Failed to find title for page: {entry.id}#{page.anchor}"
-                                )
-                            title = (
-                                page.anchor.replace("_", " ").replace("-", " ").title()
-                            )
+                        book_order.entries.append(entry.id)
+
+                        if entry_mod.id not in changed_mod_ids:
+                            continue
 
-                        icon = _get_page_icon(page)
+                        output = outputs[entry_mod.id]
 
-                        registry._register_page(
-                            PageInfo(
+                        output.entries.append(
+                            EntryInfo(
                                 mod_id=entry_mod.id,
-                                entry_id=entry.id,
-                                anchor=page.anchor,
-                                url=book_url,
-                                icon_urls=_get_texture_urls(icon) if icon else [],
-                                title=title,
-                                text=text,
+                                category_id=category.id,
+                                id=entry.id,
+                                url=book_context.book_links[entry.book_link_key],
+                                icon_urls=_get_texture_urls(entry.icon.texture),
+                                name=entry.name.value,
+                                color=entry.entry_color,
                             )
                         )
 
-                    if not isinstance(page, PageWithPattern):
-                        continue
+                        with timer.stage(entry_mod.id):
+                            for page_index, (page, next_page) in enumerate(
+                                zip_longest(
+                                    entry.pages, entry.pages[1:], fillvalue=None
+                                )
+                            ):
+                                assert page
+
+                                if (
+                                    fragment := page.fragment(entry.fragment)
+                                ) in DISABLED_PAGES:
+                                    logger.info(f"Skipping disabled page: {fragment}")
+                                    continue
+
+                                # title
+                                match page:
+                                    case (
+                                        Page(title=LocalizedStr(value=title))
+                                        | Page(header=LocalizedStr(value=title))
+                                        | Page(name=LocalizedStr(value=title))
+                                    ):
+                                        pass
+                                    case _:
+                                        if item := _get_page_item(page):
+                                            title = item.name.value
+                                        else:
+                                            title = None
+
+                                # text
+                                match page:
+                                    case Page(text=FormatTree() as text):
+                                        text_plain = (
+                                            styler.style(text, entry_mod, plain=True)
+                                            if build_documents
+                                            else None
+                                        )
+                                        text = styler.style(text, entry_mod)
+                                    case _:
+                                        text_plain = None
+                                        text = None
+
+                                if build_documents and (title or text):
+                                    output.book_documents.append(
+                                        BookDocumentInfo(
+                                            title=title,
+                                            text=text_plain,
+                                            text_markdown=text,
+                                            category=category.name.value,
+                                            entry=entry.name.value,
+                                            mod_id=entry_mod.id,
+                                            category_id=category.id,
+                                            entry_id=entry.id,
+                                            page_anchor=page.anchor,
+                                            page_index=page_index,
+                                        )
+                                    )
+
+                                # TODO: this should probably work like operators
+                                for recipe in _get_page_recipes(page):
+                                    if result := _get_recipe_result(recipe):
+                                        assert recipe.type
+                                        output.recipes.append(
+                                            RecipeInfo(
+                                                mod_id=entry_mod.id,
+                                                icon_urls=_get_texture_urls(
+                                                    result.texture
+                                                ),
+                                                entry_id=entry.id,
+                                                page_key=f"{entry.id}#{page.anchor}"
+                                                if page.anchor
+                                                else None,
+                                                type=recipe.type,
+                                                id=result.id.id,
+                                                name=result.name.value,
+                                                description=text,
+                                            )
+                                        )
+
+                                url_key = page.book_link_key(entry.book_link_key)
+                                book_url = (
+                                    book_context.book_links.get(url_key)
+                                    if url_key
+                                    else None
+                                )
 
-                    if not isinstance(next_page, TextPage):
-                        next_page = None
+                                if book_url is not None:
+                                    assert page.anchor is not None
+
+                                    if title is None:
+                                        if (
+                                            entry.id,
+                                            page.anchor,
+                                        ) not in UNTITLED_PAGES:
+                                            logger.warning(
+                                                f"Failed to find title for page: {entry.id}#{page.anchor}"
+                                            )
+                                        title = (
+                                            page.anchor.replace("_", " ")
+                                            .replace("-", " ")
+                                            .title()
+                                        )
+
+                                    icon = _get_page_icon(page)
+
+                                    output.pages.append(
+                                        PageInfo(
+                                            mod_id=entry_mod.id,
+                                            entry_id=entry.id,
+                                            anchor=page.anchor,
+                                            url=book_url,
+                                            icon_urls=_get_texture_urls(icon)
+                                            if icon
+                                            else [],
+                                            title=title,
+                                            text=text,
+                                        )
+                                    )
+
+                                if not isinstance(page, PageWithPattern):
+                                    continue
+
+                                if not isinstance(next_page, TextPage):
+                                    next_page = None
+
+                                text = page.text or (next_page and next_page.text)
+                                if text:
+                                    description = styler.style(text, entry_mod)
+                                else:
+                                    description = None
+
+                                # use the mod that the entry came from, not the mod of the pattern
+                                # eg. MoreIotas adds operators for hexcasting:add
+                                # in that case, mod should be MoreIotas, not Hex Casting
+                                operator = PatternOperator(
+                                    description=description,
+                                    inputs=page.input,
+                                    outputs=page.output,
+                                    book_url=book_url,
+                                    mod_id=entry_mod.id,
+                                )
 
-                    text = page.text or (next_page and next_page.text)
-                    if text:
-                        description = _style_text(text, entry_mod)
-                    else:
-                        description = None
-
-                    # use the mod that the entry came from, not the mod of the pattern
-                    # eg. MoreIotas adds operators for hexcasting:add
-                    # in that case, mod should be MoreIotas, not Hex Casting
-                    operator = PatternOperator(
-                        description=description,
-                        inputs=page.input,
-                        outputs=page.output,
-                        book_url=book_url,
-                        mod_id=entry_mod.id,
-                    )
+                                output.operators.append(
+                                    ScrapedOperator(
+                                        entry_id=entry.id,
+                                        # use PageWithOpPattern instead of LookupPatternPage so we can find special handler pages
+                                        # eg. Bookkeeper's Gambit (op_id=hexcasting:mask)
+                                        op_id=page.op_id
+                                        if isinstance(page, PageWithOpPattern)
+                                        else None,
+                                        signatures=[
+                                            pattern.signature
+                                            for pattern in page.patterns
+                                        ]
+                                        if isinstance(
+                                            page,
+                                            (ManualOpPatternPage, ManualRawPatternPage),
+                                        )
+                                        else [],
+                                        operator=operator,
+                                    )
+                                )
 
-                    # use PageWithOpPattern instead of LookupPatternPage so we can find special handler pages
-                    # eg. Bookkeeper's Gambit (op_id=hexcasting:mask)
-                    if isinstance(page, PageWithOpPattern):
-                        id_ops[page.op_id].append(operator)
+                                # lapisworks per-world shapes
+                                if isinstance(page, LookupPWShapePage):
+                                    shape = page.patterns[0]
+                                    output.per_world_shapes.append(
+                                        ScrapedPerWorldShape(
+                                            entry_id=entry.id,
+                                            pattern=StaticPatternInfo(
+                                                id=page.op_id,
+                                                startdir=HexDir[shape.startdir.name],
+                                                signature=shape.signature,
+                                                is_per_world=shape.is_per_world,
+                                            ),
+                                        )
+                                    )
+
+                with timer.stage("save"):
+                    if cache:
+                        for mod_id in changed_mod_ids:
+                            output = outputs[mod_id]
+                            cache.save_mod_output(
+                                output,
+                                output.find_dependencies(
+                                    registry.mods.values(), category_mods
+                                ),
+                            )
+                        cache.save_book_order(book_order)
+                        styler.save_cache()
+
+        assert book_order is not None
+
+        # combine the outputs of each mod in the same order as the book
+
+        with timer.stage("merge"):
+            logger.info("Merging mod outputs.")
+
+            category_positions = {
+                category_id: i for i, category_id in enumerate(book_order.categories)
+            }
+            entry_positions = {
+                entry_id: i for i, entry_id in enumerate(book_order.entries)
+            }
+
+            def merge[T](
+                get_items: Callable[[ModBuildOutput], list[T]],
+                key: Callable[[T], Any],
+            ) -> list[T]:
+                return sorted(
+                    (item for output in outputs.values() for item in get_items(output)),
+                    key=key,
+                )
 
-                    if isinstance(page, (ManualOpPatternPage, ManualRawPatternPage)):
-                        for pattern in page.patterns:
-                            signature_ops[pattern.signature].append(operator)
+            for category in merge(
+                lambda output: output.categories,
+                key=lambda category: category_positions[category.id],
+            ):
+                registry._register_category(category)
 
-                    # lapisworks per-world shapes
-                    if isinstance(page, LookupPWShapePage):
-                        lapisworks_per_world_shapes[page.op_id] = page.patterns[0]
+            for entry in merge(
+                lambda output: output.entries,
+                key=lambda entry: entry_positions[entry.id],
+            ):
+                registry._register_entry(entry)
 
-        if book_index_writer:
-            logger.info("Committing book index.")
-            book_index_writer.commit()
+            for page in merge(
+                lambda output: output.pages,
+                key=lambda page: entry_positions[page.entry_id],
+            ):
+                registry._register_page(page)
 
-        # load patterns
+            for recipe in merge(
+                lambda output: output.recipes,
+                key=lambda recipe: entry_positions[recipe.entry_id],
+            ):
+                registry._register_recipe(recipe)
 
-        logger.info("Loading patterns.")
-
-        for pattern_info in itertools.chain(
-            # hack: do these first so we can validate display_as
-            lapisworks_per_world_shapes.values(),
-            (
-                pattern_info
-                for pattern_metadata in pattern_metadatas.values()
-                for pattern_info in pattern_metadata.patterns
-            ),
-            EXTRA_PATTERNS,
-        ):
-            if pattern_info.id in DISABLED_PATTERNS:
-                logger.info(f"Skipping disabled pattern: {pattern_info.id}")
-                continue
+            id_ops = defaultdict[ResourceLocation, list[PatternOperator]](list)
+            signature_ops = defaultdict[str, list[PatternOperator]](list)
+            for scraped_op in merge(
+                lambda output: output.operators,
+                key=lambda scraped_op: entry_positions[scraped_op.entry_id],
+            ):
+                if scraped_op.op_id is not None:
+                    id_ops[scraped_op.op_id].append(scraped_op.operator)
+                for signature in scraped_op.signatures:
+                    signature_ops[signature].append(scraped_op.operator)
+
+            lapisworks_per_world_shapes = dict[ResourceLocation, StaticPatternInfo]()
+            for shape in merge(
+                lambda output: output.per_world_shapes,
+                key=lambda shape: entry_positions[shape.entry_id],
+            ):
+                lapisworks_per_world_shapes[shape.pattern.id] = shape.pattern
 
-            display_as = None
-            for other in lapisworks_per_world_shapes.keys():
-                if (
-                    pattern_info.id.namespace == other.id.namespace
-                    and pattern_info.id.path.startswith(other.id.path)
-                    and pattern_info.id.path.removeprefix(other.id.path).isnumeric()
+            book_index_writer = book_index.writer() if book_index else None
+            if book_index and book_index_writer:
+                for document in merge(
+                    lambda output: output.book_documents,
+                    key=lambda document: (
+                        category_positions[document.category_id],
+                        entry_positions[document.entry_id] if document.entry_id else -1,
+                    ),
                 ):
-                    display_as = other
-                    break
-
-            can_be_undocumented = (
-                display_as is not None or pattern_info.id in UNDOCUMENTED_PATTERNS
-            )
+                    book_index_writer.add_document(
+                        cls._create_book_document(book_index, **dict(document))
+                    )
 
-            display_only = pattern_info.id in lapisworks_per_world_shapes
+        # load patterns
 
-            # hack: use the name of the first real pattern instead
-            name_id = pattern_info.id
-            if display_only:
-                name_id += "0"
+        with timer.stage("patterns"):
+            logger.info("Loading patterns.")
 
-            name = i18n.localize(
-                f"hexcasting.action.{name_id}",
-                f"hexcasting.rawhook.{name_id}",
-                silent=can_be_undocumented,
-            ).value
+            for pattern_info in itertools.chain(
+                # hack: do these first so we can validate display_as
+                lapisworks_per_world_shapes.values(),
+                (
+                    pattern_info
+                    for pattern_metadata in pattern_metadatas.values()
+                    for pattern_info in pattern_metadata.patterns
+                ),
+                EXTRA_PATTERNS,
+            ):
+                if pattern_info.id in DISABLED_PATTERNS:
+                    logger.info(f"Skipping disabled pattern: {pattern_info.id}")
+                    continue
 
-            if override_name := PATTERN_NAME_OVERRIDES.get(pattern_info.id):
-                logger.info(
-                    f"Renaming pattern from {name} to {override_name}: {pattern_info.id}"
-                )
-                name = override_name
-            elif pattern_info.id in DISAMBIGUATED_PATTERNS:
-                mod = registry.mods[pattern_info.id.namespace]
-                logger.info(
-                    f"Appending mod name ({mod.name}) to pattern name ({name}): {pattern_info.id}"
+                display_as = None
+                for other in lapisworks_per_world_shapes.keys():
+                    if (
+                        pattern_info.id.namespace == other.id.namespace
+                        and pattern_info.id.path.startswith(other.id.path)
+                        and pattern_info.id.path.removeprefix(other.id.path).isnumeric()
+                    ):
+                        display_as = other
+                        break
+
+                can_be_undocumented = (
+                    display_as is not None or pattern_info.id in UNDOCUMENTED_PATTERNS
                 )
-                name += f" ({mod.name})"
 
-            try:
-                pattern = PatternInfo(
-                    id=pattern_info.id,
-                    # don't want to use the book-specific translation here
-                    name=name,
-                    direction=HexDir[pattern_info.startdir.name],
-                    signature=pattern_info.signature,
-                    is_per_world=pattern_info.is_per_world,
-                    display_only=display_only,
-                    display_as=display_as,
-                    operators=[],
-                )
-            except Exception:
-                logger.error(f"Failed to validate pattern info: {pattern_info.id}")
-                raise
-
-            known_inputs = dict[str | None, PatternOperator]()
-            for op in id_ops[pattern.id] + signature_ops[pattern.signature]:
-                if other := known_inputs.get(op.inputs):
-                    # hexthings:unquote shows up in both id_ops and signature_ops
-                    if op == other:
-                        continue
-                    raise ValueError(
-                        f"Multiple operators found for pattern {pattern.id} with inputs {op.inputs}:\n  {op}\n  {other}"
-                    )
+                display_only = pattern_info.id in lapisworks_per_world_shapes
 
-                if op.book_url is None:
-                    logger.warning(
-                        f"Failed to get book url for operator of pattern {pattern.id}: {op}"
+                # hack: use the name of the first real pattern instead
+                name_id = pattern_info.id
+                if display_only:
+                    name_id += "0"
+
+                name = i18n.localize(
+                    f"hexcasting.action.{name_id}",
+                    f"hexcasting.rawhook.{name_id}",
+                    silent=can_be_undocumented,
+                ).value
+
+                if override_name := PATTERN_NAME_OVERRIDES.get(pattern_info.id):
+                    logger.info(
+                        f"Renaming pattern from {name} to {override_name}: {pattern_info.id}"
+                    )
+                    name = override_name
+                elif pattern_info.id in DISAMBIGUATED_PATTERNS:
+                    mod = registry.mods[pattern_info.id.namespace]
+                    logger.info(
+                        f"Appending mod name ({mod.name}) to pattern name ({name}): {pattern_info.id}"
+                    )
+                    name += f" ({mod.name})"
+
+                try:
+                    pattern = PatternInfo(
+                        id=pattern_info.id,
+                        # don't want to use the book-specific translation here
+                        name=name,
+                        direction=HexDir[pattern_info.startdir.name],
+                        signature=pattern_info.signature,
+                        is_per_world=pattern_info.is_per_world,
+                        display_only=display_only,
+                        display_as=display_as,
+                        operators=[],
                     )
+                except Exception:
+                    logger.error(f"Failed to validate pattern info: {pattern_info.id}")
+                    raise
+
+                known_inputs = dict[str | None, PatternOperator]()
+                for op in id_ops[pattern.id] + signature_ops[pattern.signature]:
+                    if other := known_inputs.get(op.inputs):
+                        # hexthings:unquote shows up in both id_ops and signature_ops
+                        if op == other:
+                            continue
+                        raise ValueError(
+                            f"Multiple operators found for pattern {pattern.id} with inputs {op.inputs}:\n  {op}\n  {other}"
+                        )
 
-                known_inputs[op.inputs] = op
-                pattern.operators.append(op)
+                    if op.book_url is None:
+                        logger.warning(
+                            f"Failed to get book url for operator of pattern {pattern.id}: {op}"
+                        )
 
-            if not (pattern.operators or can_be_undocumented):
-                logger.warning(f"No operators found for pattern: {pattern.id}")
+                    known_inputs[op.inputs] = op
+                    pattern.operators.append(op)
 
-            pattern.operators.sort(
-                key=lambda op: (
-                    # using pattern instead of pattern_info causes a type error here???
-                    0 if op.mod_id == pattern_info.id.namespace else 1,
-                    op.inputs,
-                ),
-            )
+                if not (pattern.operators or can_be_undocumented):
+                    logger.warning(f"No operators found for pattern: {pattern.id}")
+
+                pattern.operators.sort(
+                    key=lambda op: (
+                        # using pattern instead of pattern_info causes a type error here???
+                        0 if op.mod_id == pattern_info.id.namespace else 1,
+                        op.inputs,
+                    ),
+                )
 
-            registry._register_pattern(pattern)
+                registry._register_pattern(pattern)
 
-        logger.info("Loading special handlers.")
+        with timer.stage("handlers"):
+            logger.info("Loading special handlers.")
 
-        for special_handler in SPECIAL_HANDLERS.values():
-            ops = id_ops.get(special_handler.id)
-            match ops:
-                case [op]:
-                    pass
-                case None | []:
-                    if special_handler.id not in UNDOCUMENTED_PATTERNS:
-                        logger.warning(
-                            f"No operator found for special handler: {special_handler.id}"
+            for special_handler in SPECIAL_HANDLERS.values():
+                ops = id_ops.get(special_handler.id)
+                match ops:
+                    case [op]:
+                        pass
+                    case None | []:
+                        if special_handler.id not in UNDOCUMENTED_PATTERNS:
+                            logger.warning(
+                                f"No operator found for special handler: {special_handler.id}"
+                            )
+                        op = None
+                    case _:
+                        raise ValueError(
+                            f"Too many book pages found for special handler {special_handler.id} (expected 1, got {len(ops)}):\n  "
+                            + "\n  ".join(str(op) for op in ops)
                         )
-                    op = None
-                case _:
-                    raise ValueError(
-                        f"Too many book pages found for special handler {special_handler.id} (expected 1, got {len(ops)}):\n  "
-                        + "\n  ".join(str(op) for op in ops)
-                    )
 
-            raw_name = special_handler.localize(i18n).value
+                raw_name = special_handler.localize(i18n).value
 
-            for info in registry.patterns.values():
-                if info.is_per_world:
-                    continue
-                if (
-                    value := special_handler.try_match(registry, info.pattern)
-                ) is not None and (
-                    special_handler.id,
-                    info.id,
-                    value,
-                ) not in SPECIAL_HANDLER_CONFLICTS:
-                    logger.warning(
-                        f"Special handler {special_handler.id} conflicts with pattern {info.id} (value: {value})"
-                    )
+                for info in special_handler.get_candidate_patterns(registry):
+                    if info.is_per_world:
+                        continue
+                    if (
+                        value := special_handler.try_match(registry, info.pattern)
+                    ) is not None and (
+                        special_handler.id,
+                        info.id,
+                        value,
+                    ) not in SPECIAL_HANDLER_CONFLICTS:
+                        logger.warning(
+                            f"Special handler {special_handler.id} conflicts with pattern {info.id} (value: {value})"
+                        )
 
-            registry._register_special_handler(
-                SpecialHandlerInfo(
-                    id=special_handler.id,
-                    raw_name=raw_name,
-                    base_name=special_handler.get_name(raw_name, value=None),
-                    operator=op,
+                registry._register_special_handler(
+                    SpecialHandlerInfo(
+                        id=special_handler.id,
+                        raw_name=raw_name,
+                        base_name=special_handler.get_name(raw_name, value=None),
+                        operator=op,
+                    )
                 )
-            )
 
-        # attempt to detect unregistered patterns with documentation (usually special handlers)
-        for pattern_id in id_ops.keys():
-            if (
-                pattern_id not in registry.patterns
-                and pattern_id not in registry.special_handlers
-                and pattern_id not in DISABLED_PATTERNS
-            ):
-                logger.error(f"Unregistered pattern: {pattern_id}")
+            # attempt to detect unregistered patterns with documentation (usually special handlers)
+            for pattern_id in id_ops.keys():
+                if (
+                    pattern_id not in registry.patterns
+                    and pattern_id not in registry.special_handlers
+                    and pattern_id not in DISABLED_PATTERNS
+                ):
+                    logger.error(f"Unregistered pattern: {pattern_id}")
 
-        logger.info("Calculating registry stats.")
+        with timer.stage("stats"):
+            logger.info("Calculating registry stats.")
 
-        for pattern in registry.patterns.values():
-            if pattern.display_only:
-                continue
+            for pattern in registry.patterns.values():
+                if pattern.display_only:
+                    continue
 
-            registry.mods[pattern.mod_id].pattern_count += 1
-            if pattern.is_documented:
-                registry.mods[pattern.mod_id].documented_pattern_count += 1
+                registry.mods[pattern.mod_id].pattern_count += 1
+                if pattern.is_documented:
+                    registry.mods[pattern.mod_id].documented_pattern_count += 1
 
-            for operator in pattern.operators:
-                op_mod = registry.mods[operator.mod_id]
-                if pattern.mod_id == operator.mod_id:
-                    op_mod.first_party_operator_count += 1
-                else:
-                    op_mod.third_party_operator_count += 1
+                for operator in pattern.operators:
+                    op_mod = registry.mods[operator.mod_id]
+                    if pattern.mod_id == operator.mod_id:
+                        op_mod.first_party_operator_count += 1
+                    else:
+                        op_mod.third_party_operator_count += 1
 
-        for info in registry.special_handlers.values():
-            registry.mods[info.mod_id].special_handler_count += 1
+            for info in registry.special_handlers.values():
+                registry.mods[info.mod_id].special_handler_count += 1
 
-        for category in registry.categories.values():
-            registry.mods[category.mod_id].category_count += 1
+            for category in registry.categories.values():
+                registry.mods[category.mod_id].category_count += 1
 
-        for entry in registry.entries.values():
-            registry.mods[entry.mod_id].entry_count += 1
+            for entry in registry.entries.values():
+                registry.mods[entry.mod_id].entry_count += 1
 
-        for page in registry.pages.values():
-            registry.mods[page.mod_id].linkable_page_count += 1
+            for page in registry.pages.values():
+                registry.mods[page.mod_id].linkable_page_count += 1
 
-        for recipes in registry.recipes.values():
-            recipes.sort(key=lambda v: (str(v.entry_id), v.page_key))
-            for recipe in recipes:
-                registry.mods[recipe.mod_id].recipe_count += 1
+            for recipes in registry.recipes.values():
+                recipes.sort(key=lambda v: (str(v.entry_id), v.page_key))
+                for recipe in recipes:
+                    registry.mods[recipe.mod_id].recipe_count += 1
 
         if book_index_writer:
-            logger.info("Finalizing book index.")
-            book_index_writer.wait_merging_threads()
+            with timer.stage("index"):
+                with timer.stage("commit"):
+                    logger.info("Committing book index.")
+                    book_index_writer.commit()
+                with timer.stage("merge"):
+                    logger.info("Finalizing book index.")
+                    book_index_writer.wait_merging_threads()
+
+        timer.log_summary()
 
         logger.info("Done.")
         return registry
@@ -969,6 +1192,38 @@ class BookIndexField(StrEnum):
     PAGE_INDEX = "page_index"
 
 
+def _iter_style_jobs(
+    book: Book,
+    mods: dict[str, ModInfo],
+    mod_ids: Collection[str],
+    *,
+    plain: bool,
+) -> Iterator[StyleJob]:
+    for category in book.categories.values():
+        assert category.resource_dir.modid is not None
+        category_mod = mods[category.resource_dir.modid]
+
+        if category_mod.id in mod_ids:
+            yield StyleJob(category.description, category_mod)
+            if plain:
+                yield StyleJob(category.description, category_mod, plain=True)
+
+        for entry in category.entries.values():
+            assert entry.resource_dir.modid is not None
+            entry_mod = mods[entry.resource_dir.modid]
+            if entry_mod.id not in mod_ids:
+                continue
+
+            for page in entry.pages:
+                match page:
+                    case Page(text=FormatTree() as text):
+                        yield StyleJob(text, entry_mod)
+                        if plain:
+                            yield StyleJob(text, entry_mod, plain=True)
+                    case _:
+                        pass
+
+
 def _get_page_icon(page: Page) -> Texture | None:
     match page:
         case ImagePage(images=[texture, *_]) | EntityPage(texture=texture):
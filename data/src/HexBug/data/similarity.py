@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+from .hex_math import HexAngle, HexCoord, HexDir, HexSegment
+
+_MASK_64 = (1 << 64) - 1
+
+_MULTIPLIER = 0x9E3779B97F4A7C15
+
+type _Segment = tuple[int, int, int]
+"""Canonical segment as `(q, r, direction)`."""
+
+
+@dataclass
+class ShapeMatch[V]:
+    value: V
+    similarity: float
+    """Jaccard similarity of the two shapes' segment sets at the offset where they
+    overlap the most, from 0 to 1."""
+
+
+@dataclass
+class _Shape[V]:
+    segments: list[_Segment]
+    value: V
+
+
+class ShapeSimilarityIndex[V]:
+    """Locality-sensitive hashing index for finding patterns with similar shapes.
+
+    Each shape is reduced to a set of translation-invariant features (each stroke along
+    with the strokes that meet it at either end), packed into ints. A MinHash signature
+    of `bands * rows` values is computed from the features and split into bands; shapes
+    that share any band are candidates, and the candidates' exact similarities are then
+    checked. Shapes whose features have Jaccard similarity `s` become candidates with
+    probability `1 - (1 - s^rows)^bands`.
+    """
+
+    def __init__(self, *, bands: int = 16, rows: int = 2, seed: int = 0):
+        self.bands = bands
+        self.rows = rows
+
+        rng = random.Random(seed)
+        self._seeds = [rng.getrandbits(64) for _ in range(bands * rows)]
+
+        self._shapes = list[_Shape[V]]()
+        self._buckets = defaultdict[tuple[int, tuple[int, ...]], list[int]](list)
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def add(self, segments: Iterable[HexSegment], value: V):
+        shape = _to_shape(segments)
+        if not shape:
+            return
+
+        index = len(self._shapes)
+        self._shapes.append(_Shape(shape, value))
+        for key in self._get_band_keys(shape):
+            self._buckets[key].append(index)
+
+    def query(
+        self,
+        segments: Iterable[HexSegment],
+        *,
+        threshold: float,
+    ) -> list[ShapeMatch[V]]:
+        """Returns the stored shapes that have a similarity of at least `threshold` with
+        any rotation of the given shape, most similar first."""
+        segments = list(segments)
+        if not segments:
+            return []
+
+        similarities = dict[int, float]()
+        for _ in range(6):
+            segments = [segment.rotated_by(HexAngle.RIGHT) for segment in segments]
+            shape = _to_shape(segments)
+
+            candidates = set[int]()
+            for key in self._get_band_keys(shape):
+                candidates.update(self._buckets.get(key, ()))
+
+            for index in candidates:
+                similarity = get_shape_similarity(shape, self._shapes[index].segments)
+                if similarity >= max(threshold, similarities.get(index, 0)):
+                    similarities[index] = similarity
+
+        return sorted(
+            (
+                ShapeMatch(value=self._shapes[index].value, similarity=similarity)
+                for index, similarity in similarities.items()
+            ),
+            key=lambda match: match.similarity,
+            reverse=True,
+        )
+
+    def _get_band_keys(self, shape: list[_Segment]):
+        features = [_mix(feature) for feature in _get_features(shape)]
+        signature = [
+            min(((feature ^ seed) * _MULTIPLIER) & _MASK_64 for feature in features)
+            for seed in self._seeds
+        ]
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, tuple(signature[start : start + self.rows])
+
+
+def get_shape_similarity(a: list[_Segment], b: list[_Segment]) -> float:
+    """Returns the Jaccard similarity of two shapes at the offset where the most
+    segments overlap."""
+    b_by_direction = defaultdict[int, list[tuple[int, int]]](list)
+    for q, r, direction in b:
+        b_by_direction[direction].append((q, r))
+
+    # each pair of parallel segments votes for the offset that would make them overlap
+    votes = Counter[tuple[int, int]]()
+    for q, r, direction in a:
+        for other_q, other_r in b_by_direction[direction]:
+            votes[(q - other_q, r - other_r)] += 1
+
+    overlap = max(votes.values(), default=0)
+    return overlap / (len(a) + len(b) - overlap)
+
+
+def _to_shape(segments: Iterable[HexSegment]) -> list[_Segment]:
+    shape = set[_Segment]()
+    for segment in segments:
+        segment = segment.canonical
+        shape.add((segment.root.q, segment.root.r, segment.direction.value))
+    return list(shape)
+
+
+def _get_features(shape: list[_Segment]) -> set[int]:
+    # directions of the strokes leaving each point
+    masks = defaultdict[tuple[int, int], int](int)
+    for q, r, direction in shape:
+        end = HexCoord(q, r).shifted_by(HexDir(direction))
+        masks[(q, r)] |= 1 << direction
+        masks[(end.q, end.r)] |= 1 << (-HexDir(direction)).value
+
+    # each stroke, along with the strokes that meet it at either end
+    features = set[int]()
+    for q, r, direction in shape:
+        end = HexCoord(q, r).shifted_by(HexDir(direction))
+        features.add((masks[(end.q, end.r)] << 8) | (masks[(q, r)] << 2) | direction)
+    return features
+
+
+def _mix(value: int) -> int:
+    """SplitMix64 finalizer, so similar features get unrelated hashes."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return value ^ (value >> 31)
@@ -3,14 +3,14 @@ from __future__ import annotations
 import itertools
 import re
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Literal, override
+from typing import TYPE_CHECKING, Any, Iterable, Literal, override
 
 from hexdoc.core import ResourceLocation
 from hexdoc.minecraft import I18n, LocalizedStr
 from pydantic import BaseModel, Field
 
 from .hex_math import HexAngle, HexDir, HexPattern
-from .patterns import PatternOperator
+from .patterns import PatternInfo, PatternOperator
 from .utils.strings import format_number
 
 if TYPE_CHECKING:
@@ -79,6 +79,11 @@ class SpecialHandler[T](ABC):
     def try_match(self, registry: HexBugRegistry, pattern: HexPattern) -> T | None:
         """Attempts to match the given pattern against this special handler."""
 
+    def get_candidate_patterns(self, registry: HexBugRegistry) -> Iterable[PatternInfo]:
+        """Returns the registered patterns that this handler might match, for detecting
+        conflicts. By default, this is all of them."""
+        return registry.patterns.values()
+
     @property
     def supports_unprefixed_shorthand(self) -> bool:
         return False
@@ -126,6 +131,14 @@ class PrefixSpecialHandler[T, P](SpecialHandler[T]):
     @abstractmethod
     def try_match_suffix(self, prefix: P, /, suffix: str) -> T | None: ...
 
+    @override
+    def get_candidate_patterns(self, registry: HexBugRegistry) -> Iterable[PatternInfo]:
+        candidates = dict[ResourceLocation, PatternInfo]()
+        for prefix in self.prefix_map:
+            for info in registry.lookups.signature_prefixes.starting_with(prefix):
+                candidates[info.id] = info
+        return candidates.values()
+
     @override
     def try_match(self, registry: HexBugRegistry, pattern: HexPattern) -> T | None:
         for prefix, value in self.prefix_map.items():
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+import tracemalloc
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import cache
+from importlib.metadata import packages_distributions, version
+from pathlib import Path
+from typing import Any, Iterable
+
+from hexdoc.core import ResourceLocation
+from pydantic import BaseModel, Field, ValidationError
+
+from HexBug.data.book import CategoryInfo, EntryInfo, PageInfo, RecipeInfo
+from HexBug.data.mods import ModInfo
+from HexBug.data.patterns import PatternOperator, StaticPatternInfo
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+"""Increment this when the format of cached build outputs changes, or when the build
+process changes in a way that affects them."""
+
+
+@dataclass
+class BuildStageStats:
+    name: str
+    """Name of the stage, including the names of its parents (eg. `load/i18n`)."""
+    calls: int = 0
+    wall_time: float = 0
+    """Total wall time spent in this stage, in seconds."""
+    cpu_time: float = 0
+    """Total CPU time spent in this stage, in seconds, including any worker processes
+    that finished during the stage."""
+    peak_memory: int | None = None
+    """Highest amount of memory allocated by Python during this stage, in bytes, or
+    None if `tracemalloc` wasn't tracing."""
+
+
+@dataclass
+class _ActiveStage:
+    stats: BuildStageStats
+    start_wall: float
+    start_cpu: float
+    peak_memory: int = 0
+
+
+class BuildStageTimer:
+    """Times and logs the stages of `HexBugRegistry.build`.
+
+    Stages can be nested, and entering a stage with the same name more than once adds to
+    its totals. If `tracemalloc` is tracing, the peak memory of each stage is also
+    recorded.
+    """
+
+    def __init__(self):
+        self.stats = dict[str, BuildStageStats]()
+        self._active = list[_ActiveStage]()
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None]:
+        if self._active:
+            name = f"{self._active[-1].stats.name}/{name}"
+        else:
+            logger.info(f"Starting build stage: {name}")
+
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = BuildStageStats(name)
+
+        if tracemalloc.is_tracing():
+            if self._active:
+                self._update_peak_memory(self._active[-1])
+            tracemalloc.reset_peak()
+
+        active = _ActiveStage(
+            stats=stats,
+            start_wall=time.perf_counter(),
+            start_cpu=_get_cpu_time(),
+        )
+        self._active.append(active)
+        try:
+            yield
+        finally:
+            self._active.pop()
+
+            wall_time = time.perf_counter() - active.start_wall
+            stats.calls += 1
+            stats.wall_time += wall_time
+            stats.cpu_time += _get_cpu_time() - active.start_cpu
+
+            if tracemalloc.is_tracing():
+                self._update_peak_memory(active)
+                stats.peak_memory = max(stats.peak_memory or 0, active.peak_memory)
+                if self._active:
+                    parent = self._active[-1]
+                    parent.peak_memory = max(parent.peak_memory, active.peak_memory)
+                tracemalloc.reset_peak()
+
+            if not self._active:
+                logger.info(f"Finished build stage {name} in {wall_time:.2f} s")
+
+    def log_summary(self):
+        stages = [stats for stats in self.stats.values() if "/" not in stats.name]
+        total = sum(stats.wall_time for stats in stages)
+        logger.info(
+            f"Build stage times ({total:.2f} s total): "
+            + ", ".join(f"{stats.name}={stats.wall_time:.2f}s" for stats in stages)
+        )
+
+    def to_report(self) -> dict[str, Any]:
+        stages = [stats for stats in self.stats.values() if "/" not in stats.name]
+        peak_memories = [
+            stats.peak_memory for stats in stages if stats.peak_memory is not None
+        ]
+        return {
+            "wall_time": sum(stats.wall_time for stats in stages),
+            "cpu_time": sum(stats.cpu_time for stats in stages),
+            "peak_memory": max(peak_memories) if peak_memories else None,
+            "stages": [asdict(stats) for stats in self.stats.values()],
+        }
+
+    def _update_peak_memory(self, active: _ActiveStage):
+        _, peak = tracemalloc.get_traced_memory()
+        active.peak_memory = max(active.peak_memory, peak)
+
+
+def _get_cpu_time() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class ScrapedOperator(BaseModel):
+    entry_id: ResourceLocation
+    op_id: ResourceLocation | None
+    signatures: list[str]
+    operator: PatternOperator
+
+
+class ScrapedPerWorldShape(BaseModel):
+    entry_id: ResourceLocation
+    pattern: StaticPatternInfo
+
+
+class BookDocumentInfo(BaseModel):
+    """Arguments for `HexBugRegistry._create_book_document`."""
+
+    title: str | None
+    text: str | None
+    text_markdown: str | None
+    category: str | None
+    entry: str | None
+    mod_id: str
+    category_id: ResourceLocation
+    entry_id: ResourceLocation | None
+    page_anchor: str | None
+    page_index: int | None
+
+
+class ModBuildOutput(BaseModel):
+    """Everything scraped from the Patchouli book pages added by one mod."""
+
+    mod_id: str
+    categories: list[CategoryInfo] = Field(default_factory=list)
+    entries: list[EntryInfo] = Field(default_factory=list)
+    pages: list[PageInfo] = Field(default_factory=list)
+    recipes: list[RecipeInfo] = Field(default_factory=list)
+    operators: list[ScrapedOperator] = Field(default_factory=list)
+    per_world_shapes: list[ScrapedPerWorldShape] = Field(default_factory=list)
+    book_documents: list[BookDocumentInfo] = Field(default_factory=list)
+    dependencies: dict[str, str] = Field(default_factory=dict)
+    """Cache keys of the other mods that this output refers to, eg. by linking to their
+    book pages or using their item textures."""
+
+    def find_dependencies(
+        self,
+        mods: Iterable[ModInfo],
+        category_mods: dict[ResourceLocation, str],
+    ) -> set[str]:
+        data = self.model_dump_json(exclude={"dependencies"})
+        dependencies = {
+            mod.id
+            for mod in mods
+            if str(mod.book_url) in data or str(mod.source.asset_url) in data
+        }
+        # entries can be added to categories from other mods
+        for entry in self.entries:
+            dependencies.add(category_mods[entry.category_id])
+        dependencies.discard(self.mod_id)
+        return dependencies
+
+
+class BookOrder(BaseModel):
+    """The order of the categories and entries in the book, for merging the outputs of
+    several mods."""
+
+    categories: list[ResourceLocation]
+    entries: list[ResourceLocation]
+
+
+class BuildCache:
+    """Stores build outputs on disk, so they can be reused by later builds.
+
+    Each output is stored in its own JSON file, along with a key describing the inputs
+    it was built from. Outputs are discarded when the key changes, eg. because the mod
+    they came from was updated.
+
+    Every key includes `fingerprint`, which defaults to `get_build_fingerprint()`, so
+    changing HexBug's code also discards the cached outputs.
+    """
+
+    def __init__(self, path: Path, *, fingerprint: str | None = None):
+        self.path = path
+        self.fingerprint = fingerprint or get_build_fingerprint()
+        self.mod_keys = dict[str, str]()
+
+    @property
+    def base_key(self) -> str:
+        """Key for outputs that are looked up by content hash, so they only depend on
+        the build process itself."""
+        return _hash([CACHE_VERSION, version("hexdoc"), self.fingerprint])
+
+    def add_mod(self, mod_id: str, *inputs: Any):
+        """Sets the key for outputs of the given mod, based on the given inputs."""
+        self.mod_keys[mod_id] = _hash([self.base_key, mod_id, *inputs])
+
+    @property
+    def combined_key(self) -> str:
+        """Key for outputs that depend on every mod."""
+        return _hash(sorted(self.mod_keys.items()))
+
+    def load(self, kind: str, name: str, key: str) -> Any | None:
+        path = self._get_path(kind, name)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignoring invalid build cache file: {path}")
+            return None
+
+        if data.get("key") != key:
+            logger.debug(f"Build cache is outdated: {path}")
+            return None
+        return data.get("data")
+
+    def save(self, kind: str, name: str, key: str, data: Any):
+        path = self._get_path(kind, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so interrupted builds don't corrupt the cache
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"key": key, "data": data}), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def load_mod(self, kind: str, mod_id: str) -> Any | None:
+        return self.load(kind, mod_id, self.mod_keys[mod_id])
+
+    def save_mod(self, kind: str, mod_id: str, data: Any):
+        self.save(kind, mod_id, self.mod_keys[mod_id], data)
+
+    def load_mod_output(self, mod_id: str) -> ModBuildOutput | None:
+        data = self.load_mod("mod_output", mod_id)
+        if data is None:
+            return None
+
+        try:
+            output = ModBuildOutput.model_validate(data)
+        except ValidationError:
+            logger.warning(f"Ignoring invalid cached build output: {mod_id}")
+            return None
+
+        for other_id, key in output.dependencies.items():
+            if self.mod_keys.get(other_id) != key:
+                logger.info(f"Dependency {other_id} of {mod_id} has changed.")
+                return None
+
+        return output
+
+    def save_mod_output(self, output: ModBuildOutput, dependencies: Iterable[str]):
+        output.dependencies = {
+            mod_id: self.mod_keys[mod_id] for mod_id in sorted(dependencies)
+        }
+        self.save_mod("mod_output", output.mod_id, output.model_dump(mode="json"))
+
+    def load_book_order(self) -> BookOrder | None:
+        data = self.load("book_order", "book", self.combined_key)
+        return BookOrder.model_validate(data) if data is not None else None
+
+    def save_book_order(self, order: BookOrder):
+        self.save(
+            "book_order", "book", self.combined_key, order.model_dump(mode="json")
+        )
+
+    def _get_path(self, kind: str, name: str) -> Path:
+        return self.path / kind / f"{name}.json"
+
+
+@cache
+def get_package_version(module: str) -> str | None:
+    """Returns the version of the distribution that provides the given module."""
+    package = module.split(".")[0]
+    for distribution in packages_distributions().get(package, []):
+        return version(distribution)
+    return None
+
+
+@cache
+def get_build_fingerprint() -> str:
+    """Returns a hash of the HexBug version and the source code of every module in
+    `HexBug.data`.
+
+    Cached outputs contain models from most of the package, so any code change could
+    affect them.
+    """
+    package_dir = Path(__file__).parent.parent
+    return _hash([
+        version("HexBug-data"),
+        *(
+            (path.relative_to(package_dir).as_posix(), path.read_text(encoding="utf-8"))
+            for path in sorted(package_dir.rglob("*.py"))
+        ),
+    ])
+
+
+def _hash(data: Any) -> str:
+    return hashlib.blake2b(
+        json.dumps(data, default=str).encode(),
+        digest_size=16,
+    ).hexdigest()
@@ -0,0 +1,377 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Mapping, override
+
+from hexdoc.jinja.render import create_jinja_env_with_loader
+from hexdoc.patchouli import FormatTree
+from hexdoc.patchouli.text import BookLink, BookLinks, LinkStyle, ListItemStyle
+from jinja2 import PackageLoader, Template
+
+from HexBug.data.mods import ModInfo
+
+from .build import BuildCache
+
+logger = logging.getLogger(__name__)
+
+MIN_POOL_JOBS = 256
+"""Minimum number of texts that need Jinja to render before starting worker
+processes."""
+
+POOL_CHUNK_SIZE = 64
+
+_worker_template: Template | None = None
+_worker_book_links: dict[str, str] | None = None
+
+
+@dataclass(frozen=True)
+class StyleJob:
+    text: FormatTree
+    mod: ModInfo
+    plain: bool = False
+
+
+@dataclass
+class _StyledText:
+    value: str
+    links: dict[str, str | None]
+    """Book links used while rendering this text, and the urls they resolved to."""
+
+    def is_valid(self, book_links: BookLinks) -> bool:
+        for key, url in self.links.items():
+            current = book_links.get(key)
+            if (str(current) if current is not None else None) != url:
+                return False
+        return True
+
+
+class TextStyler:
+    """Renders Patchouli FormatTrees to Markdown or plain text.
+
+    Call `prepare` with every text that will be needed before calling `style`. Each
+    distinct text is only rendered once per mode, and texts in the build cache aren't
+    rendered at all.
+
+    Most texts are rendered by `style_format_tree`, which is much faster than hexdoc's
+    Jinja templates. Texts with styles it doesn't support are rendered with Jinja
+    instead, in worker processes if there are enough of them.
+    """
+
+    def __init__(
+        self,
+        book_links: BookLinks,
+        *,
+        cache: BuildCache | None = None,
+        max_workers: int | None = None,
+    ):
+        self.book_links = book_links
+        self.cache = cache
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+        self._template = _create_styled_template()
+        self._styled = dict[str, _StyledText]()
+        self._mod_keys = defaultdict[str, set[str]](set)
+        self._keys = dict[tuple[int, str, bool], tuple[FormatTree, str]]()
+
+    def prepare(self, jobs: Iterable[StyleJob]):
+        pending = dict[str, StyleJob]()
+        cached_mods = set[str]()
+
+        for job in jobs:
+            key = self._get_key(job)
+            self._mod_keys[job.mod.id].add(key)
+            if key in self._styled or key in pending:
+                continue
+
+            if self.cache and job.mod.id not in cached_mods:
+                cached_mods.add(job.mod.id)
+                self._load_cache(job.mod.id)
+                if key in self._styled:
+                    continue
+
+            pending[key] = job
+
+        logger.info(
+            f"Styling {len(pending)} texts ({len(self._styled)} loaded from cache)."
+        )
+        if not pending:
+            return
+
+        unsupported = dict[str, StyleJob]()
+        for key, job in pending.items():
+            try:
+                self._styled[key] = _render_fast(job, self.book_links)
+            except UnsupportedStyleError:
+                unsupported[key] = job
+
+        if not unsupported:
+            return
+
+        logger.info(f"Styling {len(unsupported)} texts with Jinja.")
+        if self.max_workers > 1 and len(unsupported) >= MIN_POOL_JOBS:
+            self._render_in_pool(unsupported)
+        else:
+            for key, job in unsupported.items():
+                self._styled[key] = _render(self._template, job, self.book_links)
+
+    def style(self, text: FormatTree, mod: ModInfo, plain: bool = False) -> str:
+        job = StyleJob(text, mod, plain)
+        key = self._get_key(job)
+        if (styled := self._styled.get(key)) is None:
+            # not prepared in advance, so just render it here
+            try:
+                styled = _render_fast(job, self.book_links)
+            except UnsupportedStyleError:
+                styled = _render(self._template, job, self.book_links)
+            self._styled[key] = styled
+            self._mod_keys[mod.id].add(key)
+        return styled.value
+
+    def save_cache(self):
+        """Saves the texts used in this build to the build cache, discarding any that
+        weren't used."""
+        if not self.cache:
+            return
+
+        for mod_id, keys in self._mod_keys.items():
+            self.cache.save(
+                "styled_text",
+                mod_id,
+                self.cache.base_key,
+                {
+                    key: {
+                        "value": self._styled[key].value,
+                        "links": self._styled[key].links,
+                    }
+                    for key in sorted(keys)
+                    if key in self._styled
+                },
+            )
+
+    def _load_cache(self, mod_id: str):
+        assert self.cache
+        data: dict[str, Any] | None = self.cache.load(
+            "styled_text", mod_id, self.cache.base_key
+        )
+        for key, value in (data or {}).items():
+            styled = _StyledText(value=value["value"], links=value["links"])
+            if styled.is_valid(self.book_links):
+                self._styled.setdefault(key, styled)
+
+    def _get_key(self, job: StyleJob) -> str:
+        # hashing the repr of a large FormatTree isn't free, and most texts are styled
+        # several times, so remember the key for each tree object
+        # the tree is stored alongside the key so its id can't be reused
+        memo_key = (id(job.text), job.mod.id, job.plain)
+        match self._keys.get(memo_key):
+            case (text, key) if text is job.text:
+                return key
+            case _:
+                key = _get_key(job)
+                self._keys[memo_key] = (job.text, key)
+                return key
+
+    def _render_in_pool(self, pending: dict[str, StyleJob]):
+        keys = list(pending.keys())
+        args = [
+            (job.text, str(job.mod.book_url), job.plain) for job in pending.values()
+        ]
+
+        logger.info(f"Starting styling pool with {self.max_workers} workers.")
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=({k: str(v) for k, v in self.book_links.items()},),
+        ) as executor:
+            results = executor.map(_render_in_worker, args, chunksize=POOL_CHUNK_SIZE)
+            for key, styled in zip(keys, results):
+                self._styled[key] = styled
+
+
+class UnsupportedStyleError(ValueError):
+    """Raised by `style_format_tree` if a FormatTree contains a style that it can't
+    render."""
+
+
+_MARKDOWN_STYLES: dict[str, tuple[str, str]] = {
+    "command_obfuscated": ("||", "||"),
+    "command_bold": ("**", "**"),
+    "command_strikethrough": ("~~", "~~"),
+    "command_underline": ("__", "__"),
+    "command_italic": ("*", "*"),
+    "special_base": ("", ""),
+    "function_tooltip": ("", ""),
+    "function_cmd_click": ("", ""),
+    "special_color": ("", ""),
+    "paragraph_paragraph": ("", "\n"),
+}
+"""Prefix and suffix for each macro in hexdoc's `styles.md.jinja` that just wraps the
+styled children."""
+
+_SUPPORTED_STYLES = _MARKDOWN_STYLES.keys() | {"special_link", "paragraph_list_item"}
+
+
+def style_format_tree(
+    value: FormatTree | str,
+    *,
+    page_url: str,
+    plain: bool,
+    book_links: Mapping[str, Any],
+) -> str:
+    """Renders a FormatTree to Markdown or plain text, without using Jinja.
+
+    The output matches the `styled` macro from hexdoc's `formatting.md.jinja` and
+    `formatting.txt.jinja` templates, except that it isn't stripped.
+
+    Raises `UnsupportedStyleError` if the tree contains a style that isn't in hexdoc's
+    `styles.md.jinja` and `styles.txt.jinja` templates.
+    """
+    if isinstance(value, str):
+        if plain:
+            return " ".join(value.splitlines())
+        return "\n".join(value.splitlines()).replace("*", "\\*")
+
+    style = value.style
+    macro = style.macro
+    if macro not in _SUPPORTED_STYLES:
+        raise UnsupportedStyleError(f"Unsupported style: {macro}")
+
+    children = "".join(
+        style_format_tree(
+            child,
+            page_url=page_url,
+            plain=plain,
+            book_links=book_links,
+        )
+        for child in value.children
+    )
+    if plain:
+        return children
+
+    match style:
+        case LinkStyle():
+            href = _get_href(style, book_links)
+            if href.startswith("#"):
+                href = page_url + href
+            return f"[{children}]({href})"
+        case ListItemStyle(level=level) if macro == "paragraph_list_item":
+            return "  " * level + f"- {children}\n"
+        case _ if wrapper := _MARKDOWN_STYLES.get(macro):
+            prefix, suffix = wrapper
+            return f"{prefix}{children}{suffix}"
+        case _:
+            raise UnsupportedStyleError(f"Unsupported style: {macro} ({style})")
+
+
+def _get_href(style: LinkStyle, book_links: Mapping[str, Any]) -> str:
+    # same as LinkStyle.href, which needs a Jinja context
+    match style.value:
+        case str(href):
+            return href
+        case BookLink(book_links_key=key) as book_link:
+            if key not in book_links:
+                raise ValueError(f"broken link: {book_link}")
+            return str(book_links[key])
+
+
+class _RecordingBookLinks(Mapping[str, Any]):
+    """Wrapper around the book links that records which keys were looked up, so cached
+    texts can be invalidated if a link they depend on changes."""
+
+    def __init__(self, book_links: Mapping[str, Any]):
+        self.book_links = book_links
+        self.used = dict[str, str | None]()
+
+    @override
+    def __contains__(self, key: object) -> bool:
+        if isinstance(key, str):
+            self._record(key)
+        return key in self.book_links
+
+    @override
+    def __getitem__(self, key: str) -> Any:
+        self._record(key)
+        return self.book_links[key]
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.book_links)
+
+    @override
+    def __len__(self) -> int:
+        return len(self.book_links)
+
+    def _record(self, key: str):
+        value = self.book_links.get(key)
+        self.used[key] = str(value) if value is not None else None
+
+
+def _create_styled_template() -> Template:
+    jinja_env = create_jinja_env_with_loader(PackageLoader("hexdoc", "_templates"))
+    jinja_env.autoescape = False
+    return jinja_env.from_string(
+        r"""
+        {%- import "macros/formatting."~extension~".jinja" as fmt with context -%}
+        {{- fmt.styled(text) if text else "" -}}
+        """
+    )
+
+
+def _render(template: Template, job: StyleJob, book_links: Mapping[str, Any]):
+    return _render_text(
+        template, job.text, str(job.mod.book_url), job.plain, book_links
+    )
+
+
+def _render_text(
+    template: Template,
+    text: FormatTree,
+    page_url: str,
+    plain: bool,
+    book_links: Mapping[str, Any],
+) -> _StyledText:
+    recording_links = _RecordingBookLinks(book_links)
+    value = template.render(
+        text=text,
+        page_url=page_url,
+        extension="txt" if plain else "md",
+        book_links=recording_links,
+    ).strip()
+    return _StyledText(value=value, links=recording_links.used)
+
+
+def _render_fast(job: StyleJob, book_links: Mapping[str, Any]) -> _StyledText:
+    recording_links = _RecordingBookLinks(book_links)
+    value = style_format_tree(
+        job.text,
+        page_url=str(job.mod.book_url),
+        plain=job.plain,
+        book_links=recording_links,
+    ).strip()
+    return _StyledText(value=value, links=recording_links.used)
+
+
+def _get_key(job: StyleJob) -> str:
+    data = "\0".join([repr(job.text), str(job.mod.book_url), str(job.plain)])
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def _init_worker(book_links: dict[str, str]):
+    global _worker_template, _worker_book_links
+    _worker_template = _create_styled_template()
+    _worker_book_links = book_links
+
+
+def _render_in_worker(args: tuple[FormatTree, str, bool]) -> _StyledText:
+    assert _worker_template is not None and _worker_book_links is not None, (
+        "Styling worker was not initialized"
+    )
+    text, page_url, plain = args
+    return _render_text(_worker_template, text, page_url, plain, _worker_book_links)
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from HexBug.data.utils.build import BuildCache, ModBuildOutput
+
+
+def save_output(path: Path, fingerprint: str, dependencies: list[str]):
+    cache = BuildCache(path, fingerprint=fingerprint)
+    cache.add_mod("hexcasting", "1.0")
+    cache.add_mod("hexal", "1.0")
+    cache.save_mod_output(ModBuildOutput(mod_id="hexcasting"), dependencies)
+
+
+def describe_BuildCache():
+    def test_same_fingerprint(tmp_path: Path):
+        save_output(tmp_path, "a", [])
+
+        cache = BuildCache(tmp_path, fingerprint="a")
+        cache.add_mod("hexcasting", "1.0")
+        assert cache.load_mod_output("hexcasting") == ModBuildOutput(
+            mod_id="hexcasting"
+        )
+
+    def test_changed_fingerprint(tmp_path: Path):
+        save_output(tmp_path, "a", [])
+
+        cache = BuildCache(tmp_path, fingerprint="b")
+        cache.add_mod("hexcasting", "1.0")
+        assert cache.load_mod_output("hexcasting") is None
+
+    def test_changed_mod(tmp_path: Path):
+        save_output(tmp_path, "a", [])
+
+        cache = BuildCache(tmp_path, fingerprint="a")
+        cache.add_mod("hexcasting", "1.1")
+        assert cache.load_mod_output("hexcasting") is None
+
+    def test_changed_dependency(tmp_path: Path):
+        save_output(tmp_path, "a", ["hexal"])
+
+        cache = BuildCache(tmp_path, fingerprint="a")
+        cache.add_mod("hexcasting", "1.0")
+        cache.add_mod("hexal", "1.1")
+        assert cache.load_mod_output("hexcasting") is None
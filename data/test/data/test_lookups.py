@@ -0,0 +1,39 @@
+import pytest
+
+from HexBug.data.lookups import SignaturePrefixIndex
+
+
+def describe_SignaturePrefixIndex():
+    @pytest.fixture()
+    def index() -> SignaturePrefixIndex[str]:
+        index = SignaturePrefixIndex[str]()
+        for signature, value in [
+            ("qaq", "a"),
+            ("aqaa", "b"),
+            ("aqaae", "c"),
+            ("", "d"),
+            ("aqaaw", "e"),
+            ("aq", "f"),
+            ("aqaa", "g"),
+            ("dedd", "h"),
+        ]:
+            index.add(signature, value)
+        return index
+
+    @pytest.mark.parametrize(
+        ["prefix", "want"],
+        [
+            ("", ["d", "f", "b", "g", "c", "e", "h", "a"]),
+            ("aq", ["f", "b", "g", "c", "e"]),
+            ("aqaa", ["b", "g", "c", "e"]),
+            ("aqaae", ["c"]),
+            ("aqaaq", []),
+            ("q", ["a"]),
+            ("w", []),
+            ("z", []),
+        ],
+    )
+    def test_starting_with(
+        index: SignaturePrefixIndex[str], prefix: str, want: list[str]
+    ):
+        assert list(index.starting_with(prefix)) == want
@@ -0,0 +1,58 @@
+import pytest
+
+from HexBug.data.hex_math import HexDir, HexPattern
+from HexBug.data.similarity import ShapeSimilarityIndex
+
+
+def describe_ShapeSimilarityIndex():
+    @pytest.fixture()
+    def index() -> ShapeSimilarityIndex[str]:
+        index = ShapeSimilarityIndex[str]()
+        for direction, signature in [
+            (HexDir.EAST, "qaq"),
+            (HexDir.EAST, "aqaa"),
+            (HexDir.EAST, "wawqwawaw"),
+            (HexDir.NORTH_EAST, "qqqqqaqwawaq"),
+            (HexDir.SOUTH_EAST, "aqaawede"),
+            (HexDir.WEST, "dedd"),
+        ]:
+            index.add(
+                HexPattern(direction, signature).get_aligned_segments(), signature
+            )
+        return index
+
+    @pytest.mark.parametrize("direction", HexDir)
+    def test_same_shape_any_rotation(
+        index: ShapeSimilarityIndex[str], direction: HexDir
+    ):
+        matches = index.query(
+            HexPattern(direction, "wawqwawaw").iter_segments(),
+            threshold=1,
+        )
+        assert [(m.value, m.similarity) for m in matches] == [("wawqwawaw", 1)]
+
+    def test_similar_shape(index: ShapeSimilarityIndex[str]):
+        # one extra stroke at the end
+        matches = index.query(
+            HexPattern(HexDir.EAST, "wawqwawawq").iter_segments(),
+            threshold=0.8,
+        )
+        assert [m.value for m in matches] == ["wawqwawaw"]
+        assert matches[0].similarity == pytest.approx(10 / 11)
+
+    def test_sorted_by_similarity(index: ShapeSimilarityIndex[str]):
+        matches = index.query(
+            HexPattern(HexDir.EAST, "aqaaw").iter_segments(),
+            threshold=0.5,
+        )
+        similarities = [m.similarity for m in matches]
+        # dedd is aqaa drawn backwards
+        assert {m.value for m in matches[:2]} == {"aqaa", "dedd"}
+        assert similarities == sorted(similarities, reverse=True)
+
+    def test_no_matches(index: ShapeSimilarityIndex[str]):
+        matches = index.query(
+            HexPattern(HexDir.EAST, "wwwwwwwwwwww").iter_segments(),
+            threshold=0.5,
+        )
+        assert matches == []
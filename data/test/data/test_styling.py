@@ -0,0 +1,159 @@
+import pytest
+from hexdoc.core import ResourceLocation
+from hexdoc.jinja.render import create_jinja_env_with_loader
+from hexdoc.patchouli import FormatTree
+from hexdoc.patchouli.text import (
+    CommandStyle,
+    CommandStyleType,
+    FunctionStyle,
+    FunctionStyleType,
+    LinkStyle,
+    ListItemStyle,
+    ParagraphStyle,
+    SpecialStyleType,
+    Style,
+)
+from jinja2 import PackageLoader, Template
+from yarl import URL
+
+from HexBug.data.utils.styling import UnsupportedStyleError, style_format_tree
+
+PAGE_URL = "https://example.com/v/1.0/en_us"
+
+BOOK_LINKS = {
+    "hexcasting:basics": URL(f"{PAGE_URL}#basics"),
+    "hexcasting:basics#page": URL(f"{PAGE_URL}#basics@page"),
+    "hexcasting:relative": URL("#relative"),
+    "hexal:spells": URL("https://hexal.example.com/en_us#spells"),
+}
+
+
+def tree(style: Style, *children: FormatTree | str) -> FormatTree:
+    return FormatTree(style, list(children))
+
+
+def base(*children: FormatTree | str) -> FormatTree:
+    return tree(CommandStyle(type=SpecialStyleType.base), *children)
+
+
+def paragraph(*children: FormatTree | str) -> FormatTree:
+    return tree(ParagraphStyle.paragraph(), *children)
+
+
+def command(type: CommandStyleType, *children: FormatTree | str) -> FormatTree:
+    return tree(CommandStyle(type=type), *children)
+
+
+def link(value: str, *children: FormatTree | str) -> FormatTree:
+    return tree(
+        LinkStyle.from_str(value, ResourceLocation("hexcasting", "book"), {}),
+        *children,
+    )
+
+
+TREES = {
+    "empty": base(),
+    "plain": base(paragraph("Hello, world!")),
+    "asterisks": base(paragraph("2 * 3 = *6*")),
+    "newlines": base(paragraph("line 1\nline 2\n\nline 4\n")),
+    "empty string": base(paragraph(""), paragraph("after")),
+    "commands": base(
+        paragraph(
+            *(command(type, f"{type.name} *") for type in CommandStyleType),
+        ),
+    ),
+    "nested commands": base(
+        paragraph(
+            command(
+                CommandStyleType.bold,
+                "bold ",
+                command(CommandStyleType.italic, "both"),
+            ),
+        ),
+    ),
+    "functions": base(
+        paragraph(
+            tree(FunctionStyle(type=FunctionStyleType.tooltip, value="tip"), "a"),
+            tree(FunctionStyle(type=FunctionStyleType.cmd_click, value="/x"), "b"),
+            tree(FunctionStyle(type=SpecialStyleType.color, value="b0b"), "c*"),
+        ),
+    ),
+    "links": base(
+        paragraph(
+            link("basics", "entry"),
+            " ",
+            link("basics#page", "page"),
+            " ",
+            link("relative", "relative"),
+            " ",
+            link("hexal:spells", "other book"),
+            " ",
+            link("https://example.org", "external"),
+            " ",
+            link("?query", "query"),
+        ),
+    ),
+    "lists": base(
+        paragraph("intro"),
+        tree(ListItemStyle(level=1), "one *"),
+        tree(ListItemStyle(level=2), "two\nlines"),
+        tree(ListItemStyle(level=3), command(CommandStyleType.bold, "three")),
+        paragraph("outro"),
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def jinja_template() -> Template:
+    env = create_jinja_env_with_loader(PackageLoader("hexdoc", "_templates"))
+    env.autoescape = False
+    return env.from_string(
+        r"""
+        {%- import "macros/formatting."~extension~".jinja" as fmt with context -%}
+        {{- fmt.styled(text) -}}
+        """
+    )
+
+
+def describe_style_format_tree():
+    @pytest.mark.parametrize("plain", [False, True], ids=["md", "txt"])
+    @pytest.mark.parametrize("text", TREES.values(), ids=TREES.keys())
+    def matches_jinja(jinja_template: Template, text: FormatTree, plain: bool):
+        want = jinja_template.render(
+            text=text,
+            page_url=PAGE_URL,
+            extension="txt" if plain else "md",
+            book_links=BOOK_LINKS,
+        )
+        got = style_format_tree(
+            text,
+            page_url=PAGE_URL,
+            plain=plain,
+            book_links=BOOK_LINKS,
+        )
+        assert got == want
+
+    def broken_link():
+        with pytest.raises(ValueError, match="broken link"):
+            style_format_tree(
+                base(paragraph(link("missing", "link"))),
+                page_url=PAGE_URL,
+                plain=False,
+                book_links=BOOK_LINKS,
+            )
+
+    def unsupported_style():
+        class CustomStyle(Style, frozen=True):
+            type: CommandStyleType = CommandStyleType.bold
+
+            @property
+            def macro(self) -> str:
+                return "custom_style"
+
+        with pytest.raises(UnsupportedStyleError):
+            style_format_tree(
+                base(paragraph(tree(CustomStyle(), "text"))),
+                page_url=PAGE_URL,
+                plain=True,
+                book_links=BOOK_LINKS,
+            )
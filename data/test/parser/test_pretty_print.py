@@ -1,3 +1,4 @@
+from io import StringIO
 from textwrap import dedent
 from typing import cast
 
@@ -173,3 +174,36 @@ def test_pretty_print(iota: Iota, want: str, registry: HexBugRegistry):
 )
 def test_pretty_print_flattened(iota: Iota, want: str, registry: HexBugRegistry):
     assert IotaPrinter(registry).pretty_print(iota, flatten_list=True) == want.strip()
+
+
+@pytest.mark.parametrize("flatten_list", [False, True])
+def test_write_pretty_print(flatten_list: bool, registry: HexBugRegistry):
+    iota = ListIota([
+        PatternIota(HexDir.EAST, "w"),
+        PatternIota(HexDir.EAST, "www"),
+        ListIota([NumberIota(0), NumberIota(1)]),
+        MatrixIota.from_rows([1, 2], [3, 4]),
+        PatternIota(HexDir.EAST, "wwww"),
+    ])
+    printer = IotaPrinter(registry)
+
+    stream = StringIO()
+    printer.write_pretty_print(stream, iota, indent="\t", flatten_list=flatten_list)
+
+    assert stream.getvalue() == printer.pretty_print(
+        iota, indent="\t", flatten_list=flatten_list
+    )
+
+
+def test_with_matcher(registry: HexBugRegistry):
+    class MockMatcher:
+        def try_match_pattern(self, direction: HexDir, signature: str):
+            if signature == "a":
+                return PatternInfo.model_construct(name="Pattern 3")
+            return registry.try_match_pattern(direction, signature)
+
+    printer = IotaPrinter(registry).with_matcher(MockMatcher())
+    iota = ListIota([PatternIota(HexDir.EAST, "a"), PatternIota(HexDir.EAST, "w")])
+
+    assert printer.registry is registry
+    assert printer.print(iota) == "[Pattern 3, Pattern 1]"
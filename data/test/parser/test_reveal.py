@@ -1,3 +1,5 @@
+from dataclasses import asdict
+
 import pytest
 
 from HexBug.data.hex_math import HexDir
@@ -260,3 +262,37 @@ def test_bubble(text: str, want: Iota):
 )
 def test_mote(text: str, want: Iota):
     assert want == parse_reveal(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "-23.45",
+        "(0.00, 1.00, -2.50)",
+        "True",
+        "false",
+        "NULL",
+        '"foo"',
+        '""',
+        "[(0, 0)]",
+        "[(2, 3) | 0.00, 1.00, 2.00; 3.00, 4.00, 5.00]",
+        "HexPattern(EAST aqweds)",
+        "<southwest,w>",
+        "<northeast QAQ>",
+        "HexPattern[NORTH_EAST, ]",
+        "[HexPattern(EAST) HexPattern(SOUTH_WEST w), 0.00]",
+        "[0.00, HexPattern[EAST, ], [HexPattern[NORTH_EAST, qaq]HexPattern[EAST, aa]]]",
+        "[<east,w>, Player, 0.00]",
+        "[Jump -> (Evaluate*, FinishEval)]",
+        "[Call -> ()]",
+        "[{[(0.00, 1.00, 0.00)]}]",
+        "{kowen}",
+        "[HexPattern[WEST, qqq], Amethyst Shard x244808, HexPattern[EAST, eee]]",
+    ],
+)
+def test_fast_matches_validated(text: str):
+    want = parse_reveal(text)
+    got = parse_reveal(text, validate=False)
+
+    assert isinstance(got, type(want))
+    assert asdict(got) == asdict(want)  # pyright: ignore[reportArgumentType]